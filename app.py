@@ -5,6 +5,10 @@ from modules.auth.models import db, User
 from modules.auth import login_manager
 from modules.auth.routes import auth_bp
 from modules.transcription.routes import transcription_bp
+from modules.transcription.clients import prewarm_clients
+from modules.transcription.google_ai_service import GEMINI_MODEL
+from modules.transcription.engines import available_engines, ENGINE_LABELS
+from modules.transcription.live import sock, live_available
 from flask_migrate import Migrate
 # Importar el archivo que establece las relaciones
 import modules.models
@@ -21,6 +25,8 @@ def create_app(config_class=Config):
     db.init_app(app)
     login_manager.init_app(app)
     migrate = Migrate(app, db)
+    if sock is not None:
+        sock.init_app(app)
     
     # Añadir filtros personalizados de Jinja2
     @app.template_filter('nl2br')
@@ -36,7 +42,8 @@ def create_app(config_class=Config):
     # Configurar rutas principales
     @app.route("/")
     def index():
-        return render_template("index.html")
+        engines = [(name, ENGINE_LABELS[name]) for name in available_engines()]
+        return render_template("index.html", engines=engines, live_available=live_available())
     
     @app.route("/api-settings")
     def api_settings():
@@ -60,8 +67,11 @@ def create_app(config_class=Config):
                     return jsonify({"success": False, "error": "No se proporcionó una clave de Google AI válida"})
                 app.config['GOOGLE_AI_API_KEY'] = api_key
             
-            return jsonify({"success": True, "message": "Clave de API configurada correctamente"})
+            # Crear ya los clientes con la clave nueva; los anteriores se cierran solos
+            prewarm_clients(app, GEMINI_MODEL)
             
+            return jsonify({"success": True, "message": "Clave de API configurada correctamente"})
+        
         except Exception as e:
             app.logger.error(f"Error al configurar la clave de API: {str(e)}")
             return jsonify({"success": False, "error": str(e)})
@@ -70,11 +80,11 @@ def create_app(config_class=Config):
     @app.errorhandler(404)
     def page_not_found(e):
         return render_template('errors/404.html'), 404
-
+    
     @app.errorhandler(500)
     def server_error(e):
         return render_template('errors/500.html'), 500
-        
+    
     return app
 
 def create_required_folders(app):
@@ -110,5 +120,5 @@ if __name__ == "__main__":
                 print("Usuario administrador creado con éxito.")
         except Exception as e:
             print(f"Error al inicializar la base de datos: {str(e)}")
-            
+    
     app.run(debug=True)
\ No newline at end of file
@@ -42,14 +42,26 @@ def transcribe_audio_locally(file_path):
     if not model:
         raise ValueError("No se pudo inicializar el modelo Whisper local")
     
-    # Realizar la transcripción con faster-whisper
-    # La API es un poco diferente: primero devuelve segmentos, luego hay que unirlos
-    segments, info = model.transcribe(file_path, language="es", task="transcribe")
-    
-    # Unir todos los segmentos en un texto completo
-    transcription = ""
-    for segment in segments:
-        transcription += segment.text + " "
+    # Eliminar los tramos sin voz para no procesar silencio
+    audio_path = file_path
+    if current_app.config.get('TRANSCRIPTION_VAD_FILTER'):
+        from modules.utils.vad import remove_silence
+        vad_result = remove_silence(file_path)
+        audio_path = vad_result["path"]
+        current_app.logger.info(f"Eliminados {vad_result['dropped_seconds']:.1f} s de silencio")
+    
+    try:
+        # Realizar la transcripción con faster-whisper
+        # La API es un poco diferente: primero devuelve segmentos, luego hay que unirlos
+        segments, info = model.transcribe(audio_path, language="es", task="transcribe")
+        
+        # Unir todos los segmentos en un texto completo
+        transcription = ""
+        for segment in segments:
+            transcription += segment.text + " "
+    finally:
+        if audio_path != file_path and os.path.exists(audio_path):
+            os.remove(audio_path)
     
     return transcription.strip()
 
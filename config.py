@@ -12,7 +12,8 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'supersecretkey')
     
     # Configuración de la base de datos con ruta absoluta simple
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
+    # (DATABASE_URL permite compartir la base de datos entre varios hosts)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'app.db'))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # Configuración para la aplicación de transcripción
@@ -25,5 +26,128 @@ class Config:
     
     # Límites de transcripción
     FREE_TRANSCRIPTIONS_LIMIT = int(os.environ.get('FREE_TRANSCRIPTIONS_LIMIT', 10))
-
+    
+    # Transcripción concurrente de segmentos
+    TRANSCRIPTION_MAX_WORKERS = int(os.environ.get('TRANSCRIPTION_MAX_WORKERS', 4))
+    TRANSCRIPTION_SEGMENT_RETRIES = int(os.environ.get('TRANSCRIPTION_SEGMENT_RETRIES', 3))
+    
+    # Trabajos de transcripción en segundo plano
+    # 'thread': los procesa un pool de hilos dentro de cada worker web
+    # 'worker': solo los procesan los procesos lanzados con worker.py
+    TRANSCRIPTION_JOB_MODE = os.environ.get('TRANSCRIPTION_JOB_MODE', 'thread')
+    TRANSCRIPTION_JOB_WORKERS = int(os.environ.get('TRANSCRIPTION_JOB_WORKERS', 2))
+    TRANSCRIPTION_JOB_LEASE_SECONDS = int(os.environ.get('TRANSCRIPTION_JOB_LEASE_SECONDS', 60))
+    TRANSCRIPTION_JOB_POLL_SECONDS = float(os.environ.get('TRANSCRIPTION_JOB_POLL_SECONDS', 5))
+    TRANSCRIPTION_JOB_MAX_ATTEMPTS = int(os.environ.get('TRANSCRIPTION_JOB_MAX_ATTEMPTS', 3))
+    # En modo 'thread', cada cuánto se buscan trabajos abandonados por un worker web caído
+    TRANSCRIPTION_JOB_SWEEP_SECONDS = float(os.environ.get('TRANSCRIPTION_JOB_SWEEP_SECONDS', 30))
+    # Cada cuánto consulta la página de un trabajo los segmentos ya transcritos
+    TRANSCRIPTION_STREAM_POLL_SECONDS = float(os.environ.get('TRANSCRIPTION_STREAM_POLL_SECONDS', 1))
+    # Duración máxima de cada conexión SSE de un trabajo: cada una ocupa un hilo
+    # de gunicorn; al cerrarse, el navegador reconecta y sigue donde lo dejó
+    TRANSCRIPTION_STREAM_MAX_SECONDS = float(os.environ.get('TRANSCRIPTION_STREAM_MAX_SECONDS', 60))
+    
+    # Límite de tamaño por archivo de la API de Whisper y margen de seguridad al dividir
+    WHISPER_MAX_FILE_MB = int(os.environ.get('WHISPER_MAX_FILE_MB', 25))
+    TRANSCRIPTION_SEGMENT_SAFETY_MARGIN = float(os.environ.get('TRANSCRIPTION_SEGMENT_SAFETY_MARGIN', 0.9))
+    
+    # Recodificar el audio a un formato compacto para voz (16 kHz mono) antes de transcribir
+    TRANSCRIPTION_NORMALIZE_AUDIO = os.environ.get('TRANSCRIPTION_NORMALIZE_AUDIO', 'false').lower() in ('1', 'true', 'yes')
+    TRANSCRIPTION_NORMALIZE_FORMAT = os.environ.get('TRANSCRIPTION_NORMALIZE_FORMAT', 'opus')  # 'opus' o 'mp3'
+    TRANSCRIPTION_NORMALIZE_BITRATE = os.environ.get('TRANSCRIPTION_NORMALIZE_BITRATE', '24k')
+    
+    # Cortar los segmentos en pausas y solaparlos para no perder palabras en las uniones
+    TRANSCRIPTION_SPLIT_ON_SILENCE = os.environ.get('TRANSCRIPTION_SPLIT_ON_SILENCE', 'false').lower() in ('1', 'true', 'yes')
+    TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS = float(os.environ.get('TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS', 0))
+    
+    # Eliminar los tramos sin voz antes de transcribir
+    TRANSCRIPTION_VAD_FILTER = os.environ.get('TRANSCRIPTION_VAD_FILTER', 'false').lower() in ('1', 'true', 'yes')
+    TRANSCRIPTION_VAD_MIN_SILENCE_SECONDS = float(os.environ.get('TRANSCRIPTION_VAD_MIN_SILENCE_SECONDS', 1.0))
+    TRANSCRIPTION_VAD_KEEP_SILENCE_SECONDS = float(os.environ.get('TRANSCRIPTION_VAD_KEEP_SILENCE_SECONDS', 0.3))
+    
+    # Peticiones duplicadas a la API de transcripción: si un segmento tarda más
+    # que este percentil de las latencias recientes se envía otra vez y se usa
+    # la primera respuesta; el presupuesto es la fracción máxima de duplicados
+    TRANSCRIPTION_HEDGE_ENABLED = os.environ.get('TRANSCRIPTION_HEDGE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TRANSCRIPTION_HEDGE_PERCENTILE = float(os.environ.get('TRANSCRIPTION_HEDGE_PERCENTILE', 95))
+    TRANSCRIPTION_HEDGE_BUDGET = float(os.environ.get('TRANSCRIPTION_HEDGE_BUDGET', 0.1))
+    
+    # Motor de transcripción por defecto: 'openai' (API de Whisper) o 'local'
+    # (faster-whisper en este servidor; se puede elegir también al subir cada
+    # archivo) y si se carga al arrancar cada proceso
+    TRANSCRIPTION_ENGINE = os.environ.get('TRANSCRIPTION_ENGINE', 'openai')
+    TRANSCRIPTION_ENGINE_PRELOAD = os.environ.get('TRANSCRIPTION_ENGINE_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Motor local: tamaño del modelo, dispositivo, cuantización (int8 en CPU),
+    # hilos de CPU por modelo (0 = los que elija CTranslate2), transcripciones
+    # simultáneas por modelo y tamaño del beam search
+    LOCAL_WHISPER_MODEL = os.environ.get('LOCAL_WHISPER_MODEL', 'medium')
+    LOCAL_WHISPER_DEVICE = os.environ.get('LOCAL_WHISPER_DEVICE', 'cpu')
+    LOCAL_WHISPER_COMPUTE_TYPE = os.environ.get('LOCAL_WHISPER_COMPUTE_TYPE', 'int8')
+    LOCAL_WHISPER_CPU_THREADS = int(os.environ.get('LOCAL_WHISPER_CPU_THREADS', 0))
+    LOCAL_WHISPER_NUM_WORKERS = int(os.environ.get('LOCAL_WHISPER_NUM_WORKERS', 1))
+    LOCAL_WHISPER_BEAM_SIZE = int(os.environ.get('LOCAL_WHISPER_BEAM_SIZE', 5))
+    
+    # Modelos locales según la carga: modelos precargados de más rápido a más
+    # preciso (vacío = solo LOCAL_WHISPER_MODEL), mejor modelo de cada plan,
+    # trabajos en cola a partir de los que se baja cada nivel y duración a
+    # partir de la que un audio baja otro nivel si hay cola
+    LOCAL_WHISPER_TIERS = os.environ.get('LOCAL_WHISPER_TIERS', '')
+    LOCAL_WHISPER_PLAN_TIERS = os.environ.get('LOCAL_WHISPER_PLAN_TIERS', 'free:medium,premium:large')
+    LOCAL_WHISPER_TIER_QUEUE_THRESHOLDS = os.environ.get('LOCAL_WHISPER_TIER_QUEUE_THRESHOLDS', '4,8')
+    LOCAL_WHISPER_LONG_AUDIO_MINUTES = float(os.environ.get('LOCAL_WHISPER_LONG_AUDIO_MINUTES', 60))
+    
+    # Transcripción en directo (requiere flask-sock y el motor local): modelo
+    # (vacío = el más rápido de los locales), pausa que cierra cada segmento,
+    # duración máxima de un segmento y de una sesión
+    LIVE_TRANSCRIPTION_MODEL = os.environ.get('LIVE_TRANSCRIPTION_MODEL', '')
+    LIVE_VAD_MIN_SILENCE_SECONDS = float(os.environ.get('LIVE_VAD_MIN_SILENCE_SECONDS', 0.6))
+    LIVE_MAX_SEGMENT_SECONDS = float(os.environ.get('LIVE_MAX_SEGMENT_SECONDS', 15))
+    LIVE_MAX_SESSION_MINUTES = float(os.environ.get('LIVE_MAX_SESSION_MINUTES', 180))
+    
+    # Servidor de inferencia local (inference_server.py): dirección host:puerto
+    # a la que envían los trabajos los workers web (vacío = cada proceso carga
+    # su propio modelo), clave de acceso (por defecto SECRET_KEY) y procesos
+    # del servidor (0 = uno cada 4 núcleos)
+    LOCAL_WHISPER_SERVER = os.environ.get('LOCAL_WHISPER_SERVER', '')
+    LOCAL_WHISPER_SERVER_AUTHKEY = os.environ.get('LOCAL_WHISPER_SERVER_AUTHKEY', '')
+    LOCAL_INFERENCE_PROCESSES = int(os.environ.get('LOCAL_INFERENCE_PROCESSES', 0))
+    
+    # Límites de la cuenta de OpenAI, compartidos por todos los procesos a
+    # través de la base de datos (0 = sin límite), y máximo de llamadas
+    # simultáneas por proceso a cada API, que se reduce solo ante 429/5xx
+    WHISPER_REQUESTS_PER_MINUTE = float(os.environ.get('WHISPER_REQUESTS_PER_MINUTE', 50))
+    WHISPER_AUDIO_MINUTES_PER_MINUTE = float(os.environ.get('WHISPER_AUDIO_MINUTES_PER_MINUTE', 0))
+    OPENAI_CHAT_REQUESTS_PER_MINUTE = float(os.environ.get('OPENAI_CHAT_REQUESTS_PER_MINUTE', 500))
+    PROVIDER_MAX_CONCURRENCY = int(os.environ.get('PROVIDER_MAX_CONCURRENCY', 8))
+    
+    # Clientes de los proveedores de IA: conexiones HTTP persistentes con
+    # OpenAI, tiempo máximo por petición y conexiones que se abren al arrancar
+    OPENAI_HTTP_MAX_CONNECTIONS = int(os.environ.get('OPENAI_HTTP_MAX_CONNECTIONS', 20))
+    OPENAI_HTTP_TIMEOUT = float(os.environ.get('OPENAI_HTTP_TIMEOUT', 600))
+    PROVIDER_CLIENT_PREWARM = os.environ.get('PROVIDER_CLIENT_PREWARM', 'true').lower() in ('1', 'true', 'yes')
+    OPENAI_PREWARM_CONNECTIONS = int(os.environ.get('OPENAI_PREWARM_CONNECTIONS', 2))
+    
+    # Caché de documentos generados: caducidad y número máximo de entradas
+    DOCUMENT_CACHE_TTL_DAYS = int(os.environ.get('DOCUMENT_CACHE_TTL_DAYS', 30))
+    DOCUMENT_CACHE_MAX_ENTRIES = int(os.environ.get('DOCUMENT_CACHE_MAX_ENTRIES', 1000))
+    
+    # Generación de documentos por fragmentos: la transcripción va en una sola
+    # llamada si cabe en la ventana de contexto del proveedor (si es mayor que 0,
+    # DOCUMENT_CHUNK_TOKENS reduce ese límite); si no, se extraen notas de
+    # DOCUMENT_MAP_WORKERS fragmentos a la vez
+    DOCUMENT_CHUNK_TOKENS = int(os.environ.get('DOCUMENT_CHUNK_TOKENS', 0))
+    DOCUMENT_MAP_WORKERS = int(os.environ.get('DOCUMENT_MAP_WORKERS', 4))
+    
+    # Circuit breaker de los proveedores de IA: fallos seguidos para dejar de
+    # usar un proveedor y segundos hasta volver a probarlo
+    DOCUMENT_PROVIDER_FAILURE_THRESHOLD = int(os.environ.get('DOCUMENT_PROVIDER_FAILURE_THRESHOLD', 3))
+    DOCUMENT_PROVIDER_COOLDOWN_SECONDS = float(os.environ.get('DOCUMENT_PROVIDER_COOLDOWN_SECONDS', 60))
+    
+    # Pregenerar el acta al terminar cada transcripción: planes en los que está
+    # activado por defecto (separados por comas; cada usuario puede cambiarlo
+    # en su perfil) e hilos dedicados
+    SPECULATIVE_ACTA_PLANS = os.environ.get('SPECULATIVE_ACTA_PLANS', 'premium')
+    SPECULATIVE_ACTA_WORKERS = int(os.environ.get('SPECULATIVE_ACTA_WORKERS', 2))
+    
     GOOGLE_AI_API_KEY = os.environ.get("GOOGLE_AI_API_KEY", "")
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Servidor de inferencia local para el motor de transcripción 'local'.
+
+Mantiene un número fijo de procesos, cada uno con un modelo de
+faster-whisper precargado y su parte de los núcleos de la máquina, y
+atiende las transcripciones de todos los workers web del mismo host, que
+así no cargan ningún modelo:
+    
+    python inference_server.py
+    python inference_server.py --procesos 2
+
+Los workers web se conectan a él si LOCAL_WHISPER_SERVER tiene su
+dirección (por ejemplo 127.0.0.1:50055).
+"""
+import argparse
+from app import create_app
+from modules.transcription.inference_server import serve
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de inferencia local de ZentraText")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos de inferencia, con un modelo cada uno (por defecto LOCAL_INFERENCE_PROCESSES o uno cada 4 núcleos)")
+    args = parser.parse_args()
+    
+    serve(app, args.procesos)
@@ -26,4 +26,8 @@ class RegistrationForm(FlaskForm):
     def validate_email(self, email):
         user = User.query.filter_by(email=email.data).first()
         if user is not None:
-            raise ValidationError('Por favor, usa un correo electrónico diferente.')
\ No newline at end of file
+            raise ValidationError('Por favor, usa un correo electrónico diferente.')
+
+class PreferencesForm(FlaskForm):
+    speculative_acta = BooleanField('Preparar el acta de reunión en segundo plano al terminar cada transcripción')
+    submit = SubmitField('Guardar preferencias')
@@ -14,6 +14,10 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(sa.String(128))
     created_at = db.Column(sa.DateTime, default=datetime.utcnow)
     is_admin = db.Column(sa.Boolean, default=False)
+    plan = db.Column(sa.String(20), default='free')
+    # Generar el acta en segundo plano al terminar cada transcripción
+    # (None: lo que corresponda a su plan)
+    speculative_acta = db.Column(sa.Boolean, nullable=True)
     
     # Relación con las transcripciones
     transcriptions = relationship('Transcription', backref='user', lazy='dynamic')
@@ -34,5 +38,11 @@ class User(UserMixin, db.Model):
         # Por ahora, solo comprobamos el límite gratuito
         return self.get_transcription_count() < free_limit
     
+    def wants_speculative_acta(self, default_plans):
+        """Comprueba si hay que pregenerar el acta de sus transcripciones"""
+        if self.speculative_acta is not None:
+            return self.speculative_acta
+        return (self.plan or 'free') in default_plans
+    
     def __repr__(self):
         return f'<User {self.username}>'
\ No newline at end of file
@@ -2,7 +2,8 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
 from urllib.parse import urlparse  # Usar urllib.parse en lugar de werkzeug
 from modules.auth.models import User, db
-from modules.auth.forms import LoginForm, RegistrationForm
+from modules.auth.forms import LoginForm, RegistrationForm, PreferencesForm
+from modules.transcription.speculative import should_pregenerate
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -50,7 +51,17 @@ def register():
         
     return render_template('auth/register.html', title='Registro', form=form)
 
-@auth_bp.route('/profile')
+@auth_bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
-    return render_template('auth/profile.html', title='Perfil')
\ No newline at end of file
+    form = PreferencesForm()
+    if form.validate_on_submit():
+        current_user.speculative_acta = form.speculative_acta.data
+        db.session.commit()
+        flash('Preferencias guardadas')
+        return redirect(url_for('auth.profile'))
+    
+    if request.method == 'GET':
+        form.speculative_acta.data = should_pregenerate(current_user)
+    
+    return render_template('auth/profile.html', title='Perfil', form=form)
\ No newline at end of file
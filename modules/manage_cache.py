@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Gestión de las cachés de transcripciones y documentos de ZentraText (desde la raíz del proyecto):
+    
+    python -m modules.manage_cache estadisticas
+    python -m modules.manage_cache vaciar
+    python -m modules.manage_cache eliminar <hash>
+    python -m modules.manage_cache purgar <dias>
+"""
+
+import sys
+from app import create_app
+from modules.transcription.models import TranscriptionCache, DocumentCache
+from modules.transcription.cache import evict_transcription_cache, evict_document_cache
+from modules.transcription.counters import get_counters
+
+app = create_app()
+
+# ----------------------------------------------------------------------
+def show_stats():
+    """Muestra el número de entradas y los aciertos/fallos de cada caché."""
+    with app.app_context():
+        caches = [
+            ("transcripciones", "transcription_cache", TranscriptionCache),
+            ("documentos", "document_cache", DocumentCache),
+        ]
+        for label, prefix, model in caches:
+            counters = get_counters(prefix + ".")
+            hits = counters.get(prefix + ".hit", 0)
+            misses = counters.get(prefix + ".miss", 0)
+            total = hits + misses
+            print(f"\nCaché de {label}:")
+            print("-" * 40)
+            print(f"{'Entradas':<20} {model.query.count()}")
+            print(f"{'Aciertos':<20} {hits}")
+            print(f"{'Fallos':<20} {misses}")
+            print(f"{'Tasa de aciertos':<20} {(100 * hits / total) if total else 0:.1f}%")
+            print("-" * 40)
+        
+        counters = get_counters("speculative_acta.")
+        generated = counters.get("speculative_acta.generated", 0)
+        used = counters.get("speculative_acta.used", 0)
+        print("\nActas pregeneradas:")
+        print("-" * 40)
+        print(f"{'Generadas':<20} {generated}")
+        print(f"{'Usadas':<20} {used}")
+        print(f"{'Fallidas':<20} {counters.get('speculative_acta.failed', 0)}")
+        print(f"{'Tasa de uso':<20} {(100 * used / generated) if generated else 0:.1f}%")
+        print("-" * 40)
+        
+        counters = get_counters("transcription_hedge.")
+        fired = counters.get("transcription_hedge.fired", 0)
+        won = counters.get("transcription_hedge.won", 0)
+        print("\nPeticiones duplicadas de transcripción:")
+        print("-" * 40)
+        print(f"{'Lanzadas':<20} {fired}")
+        print(f"{'Ganadas':<20} {won}")
+        print(f"{'Tasa de victorias':<20} {(100 * won / fired) if fired else 0:.1f}%")
+        print("-" * 40)
+        
+        counters = get_counters("rate_limit.")
+        if counters:
+            print("\nRespuestas de sobrecarga de las APIs (429/5xx):")
+            print("-" * 40)
+            for name, value in sorted(counters.items()):
+                print(f"{name.split('.')[1]:<20} {value}")
+            print("-" * 40)
+        print()
+
+# ----------------------------------------------------------------------
+def clear_cache():
+    """Elimina todas las entradas de ambas cachés."""
+    with app.app_context():
+        deleted = evict_transcription_cache()
+        deleted_documents = evict_document_cache()
+        print(f"Eliminadas {deleted} transcripciones y {deleted_documents} documentos de la caché.")
+
+# ----------------------------------------------------------------------
+def delete_entry(audio_hash):
+    """Elimina las entradas de un audio (se admite un prefijo del hash)."""
+    with app.app_context():
+        deleted = evict_transcription_cache(audio_hash=audio_hash)
+        print(f"Eliminadas {deleted} entradas para el hash '{audio_hash}'.")
+
+# ----------------------------------------------------------------------
+def purge_old(days):
+    """Elimina las transcripciones sin usar y los documentos generados hace más de N días."""
+    with app.app_context():
+        deleted = evict_transcription_cache(older_than_days=days)
+        deleted_documents = evict_document_cache(older_than_days=days)
+        print(f"Eliminadas {deleted} transcripciones y {deleted_documents} documentos de más de {days} días.")
+
+# ----------------------------------------------------------------------
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        cmd_help = (
+            "Uso:\n"
+            "  estadisticas        – Muestra entradas, aciertos y fallos\n"
+            "  vaciar              – Vacía ambas cachés\n"
+            "  eliminar <hash>     – Elimina las entradas de un audio\n"
+            "  purgar <dias>       – Elimina las entradas de más de N días\n"
+        )
+        print(cmd_help)
+        sys.exit(1)
+    
+    command = sys.argv[1]
+    
+    if command == "estadisticas":
+        show_stats()
+    
+    elif command == "vaciar":
+        clear_cache()
+    
+    elif command == "eliminar" and len(sys.argv) == 3:
+        delete_entry(sys.argv[2])
+    
+    elif command == "purgar" and len(sys.argv) == 3:
+        purge_old(int(sys.argv[2]))
+    
+    else:
+        print("Comando o argumentos incorrectos.\n")
+        sys.exit(1)
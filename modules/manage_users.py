@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """
-Gestión sencilla de usuarios ZentraText:
+Gestión sencilla de usuarios ZentraText (desde la raíz del proyecto):
 
-    python manage_users.py listar
-    python manage_users.py eliminar <usuario>
-    python manage_users.py crear_admin
-    python manage_users.py cambiar_password <usuario> <nueva_clave>
+    python -m modules.manage_users listar
+    python -m modules.manage_users eliminar <usuario>
+    python -m modules.manage_users crear_admin
+    python -m modules.manage_users cambiar_password <usuario> <nueva_clave>
+    python -m modules.manage_users cambiar_plan <usuario> <plan>
 """
 
 import sys
@@ -21,11 +22,11 @@ def list_users():
         users = User.query.all()
         print("\nLista de usuarios:")
         print("-" * 60)
-        print(f"{'ID':<5} {'Username':<20} {'Email':<30} {'Admin':<5}")
+        print(f"{'ID':<5} {'Username':<20} {'Email':<30} {'Admin':<5} {'Plan':<10}")
         print("-" * 60)
         for user in users:
             print(f"{user.id:<5} {user.username:<20} {user.email:<30} "
-                  f"{'Sí' if user.is_admin else 'No'}")
+                  f"{'Sí' if user.is_admin else 'No':<5} {user.plan or 'free':<10}")
         print("-" * 60)
         print(f"Total: {len(users)} usuarios\n")
 
@@ -70,6 +71,18 @@ def delete_user(username):
         print(f"Usuario '{username}' eliminado junto con "
               f"{len(transcriptions)} transcripciones.")
 
+# ----------------------------------------------------------------------
+def change_plan(username, plan):
+    """Cambia el plan de un usuario existente."""
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            print(f"❌  El usuario '{username}' no existe.")
+            return
+        user.plan = plan
+        db.session.commit()
+        print(f"✅  Plan de '{username}' cambiado a '{plan}'.")
+
 # ----------------------------------------------------------------------
 def create_admin():
     """Crea el usuario administrador por defecto si no existe."""
@@ -92,6 +105,7 @@ if __name__ == "__main__":
             "  listar                                – Muestra todos los usuarios\n"
             "  eliminar <username>                  – Elimina un usuario\n"
             "  cambiar_password <username> <clave>  – Cambia la contraseña\n"
+            "  cambiar_plan <username> <plan>       – Cambia el plan (free, premium...)\n"
             "  crear_admin                          – Crea un usuario admin\n"
         )
         print(cmd_help)
@@ -108,6 +122,9 @@ if __name__ == "__main__":
     elif command == "cambiar_password" and len(sys.argv) == 4:
         change_password(sys.argv[2], sys.argv[3])
 
+    elif command == "cambiar_plan" and len(sys.argv) == 4:
+        change_plan(sys.argv[2], sys.argv[3])
+
     elif command == "crear_admin":
         create_admin()
 
@@ -0,0 +1,190 @@
+import hashlib
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from modules.auth.models import db
+from modules.transcription.models import TranscriptionCache, DocumentCache
+from modules.transcription.counters import increment_counter
+
+def get_cached_transcription(audio_hash, engine, language, model):
+    """
+    Busca una transcripción previa del mismo audio con el mismo motor,
+    idioma y modelo. Registra el acierto o el fallo en los contadores.
+    
+    Returns:
+        El texto transcrito, o None si no está en caché
+    """
+    entry = TranscriptionCache.query.filter_by(
+        audio_hash=audio_hash,
+        engine=engine,
+        language=language,
+        model=model
+    ).first()
+    
+    if entry is None:
+        increment_counter("transcription_cache.miss")
+        return None
+    
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    db.session.commit()
+    increment_counter("transcription_cache.hit")
+    current_app.logger.info(f"Transcripción encontrada en caché ({audio_hash[:12]}...)")
+    return entry.transcript_text
+
+def store_cached_transcription(audio_hash, engine, language, model, transcript_text):
+    """Guarda una transcripción en la caché (si otro proceso ya la guardó, no hace nada)"""
+    try:
+        db.session.add(TranscriptionCache(
+            audio_hash=audio_hash,
+            engine=engine,
+            language=language,
+            model=model,
+            transcript_text=transcript_text
+        ))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+def evict_transcription_cache(audio_hash=None, older_than_days=None):
+    """
+    Elimina entradas de la caché de transcripciones.
+    
+    Args:
+        audio_hash: Eliminar solo las entradas de este audio (admite prefijo)
+        older_than_days: Eliminar solo las entradas sin usar en esos días
+    
+    Returns:
+        Número de entradas eliminadas
+    """
+    query = TranscriptionCache.query
+    if audio_hash:
+        query = query.filter(TranscriptionCache.audio_hash.startswith(audio_hash))
+    if older_than_days is not None:
+        limit = datetime.utcnow() - timedelta(days=older_than_days)
+        query = query.filter(TranscriptionCache.last_used_at < limit)
+    
+    deleted = query.delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def hash_text(text):
+    """Hash SHA-256 del contenido de un texto"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def get_cached_document(transcript_hash, document_type, keys):
+    """
+    Busca un documento ya generado para la misma transcripción y tipo con
+    alguno de los proveedores indicados. Las entradas más antiguas que
+    DOCUMENT_CACHE_TTL_DAYS no se devuelven.
+    
+    Args:
+        keys: Lista de tuplas (proveedor, modelo, versión del prompt) válidas
+    
+    Returns:
+        La entrada de la caché (la usada más recientemente si hay varias), o
+        None si no está en caché
+    """
+    if not keys:
+        return None
+    
+    ttl_days = current_app.config.get('DOCUMENT_CACHE_TTL_DAYS', 30)
+    entry = DocumentCache.query.filter(
+        DocumentCache.transcript_hash == transcript_hash,
+        DocumentCache.document_type == document_type,
+        sa.or_(*[
+            sa.and_(
+                DocumentCache.provider == provider,
+                DocumentCache.model == model,
+                DocumentCache.prompt_version == prompt_version
+            )
+            for provider, model, prompt_version in keys
+        ]),
+        DocumentCache.created_at >= datetime.utcnow() - timedelta(days=ttl_days)
+    ).order_by(DocumentCache.last_used_at.desc()).first()
+    
+    if entry is None:
+        increment_counter("document_cache.miss")
+        return None
+    
+    if entry.source == "speculative" and not entry.hits:
+        # Primera vez que se pide un acta generada de antemano
+        increment_counter("speculative_acta.used")
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    db.session.commit()
+    increment_counter("document_cache.hit")
+    current_app.logger.info(f"Documento '{document_type}' encontrado en caché ({transcript_hash[:12]}...)")
+    return entry
+
+def store_cached_document(transcript_hash, document_type, provider, model, prompt_version, content, provider_label, source="request"):
+    """
+    Guarda un documento generado en la caché y aplica la política de expulsión.
+    source indica quién lo generó: una petición del usuario ('request'), la
+    transcripción en modo pipeline ('pipeline') o la pregeneración ('speculative').
+    """
+    try:
+        # Sustituir una entrada caducada con la misma clave
+        DocumentCache.query.filter_by(
+            transcript_hash=transcript_hash,
+            document_type=document_type,
+            provider=provider,
+            model=model,
+            prompt_version=prompt_version
+        ).delete(synchronize_session=False)
+        db.session.add(DocumentCache(
+            transcript_hash=transcript_hash,
+            document_type=document_type,
+            provider=provider,
+            model=model,
+            prompt_version=prompt_version,
+            content=content,
+            provider_label=provider_label,
+            source=source
+        ))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+    
+    evict_document_cache(
+        older_than_days=current_app.config.get('DOCUMENT_CACHE_TTL_DAYS', 30),
+        max_entries=current_app.config.get('DOCUMENT_CACHE_MAX_ENTRIES', 1000)
+    )
+
+def evict_document_cache(older_than_days=None, max_entries=None):
+    """
+    Elimina documentos de la caché.
+    
+    Args:
+        older_than_days: Eliminar los documentos generados hace más de esos días
+        max_entries: Conservar como máximo ese número de documentos, eliminando
+            los que lleven más tiempo sin usarse
+    
+    Sin argumentos vacía la caché.
+    
+    Returns:
+        Número de entradas eliminadas
+    """
+    if older_than_days is None and max_entries is None:
+        deleted = DocumentCache.query.delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    
+    deleted = 0
+    if older_than_days is not None:
+        limit = datetime.utcnow() - timedelta(days=older_than_days)
+        deleted += DocumentCache.query.filter(DocumentCache.created_at < limit).delete(synchronize_session=False)
+    
+    if max_entries is not None:
+        stale_ids = db.session.query(DocumentCache.id).order_by(
+            DocumentCache.last_used_at.desc()
+        ).offset(max_entries).all()
+        if stale_ids:
+            deleted += DocumentCache.query.filter(
+                DocumentCache.id.in_([row.id for row in stale_ids])
+            ).delete(synchronize_session=False)
+    
+    db.session.commit()
+    return deleted
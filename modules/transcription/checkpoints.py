@@ -0,0 +1,93 @@
+import os
+import json
+import shutil
+from flask import current_app
+from modules.auth.models import db
+from modules.transcription.models import TranscriptionJob, TranscriptionSegment
+
+class JobCheckpoint:
+    """
+    Puntos de control de la transcripción de un trabajo.
+    
+    Al dividir un archivo grande se guarda en el trabajo el plan de segmentos
+    (archivo, inicio, duración y solapamiento de cada uno) y los segmentos
+    se conservan en una carpeta propia del trabajo; el texto de cada segmento
+    se guarda en transcription_segment en cuanto se transcribe. Si el worker
+    muere a mitad del archivo, el siguiente intento retoma el mismo plan y
+    solo transcribe los segmentos que faltan.
+    """
+    
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "temp_segments", f"job_{job_id}")
+    
+    def completed_texts(self):
+        """Textos ya transcritos: índice del segmento -> texto"""
+        segments = TranscriptionSegment.query.filter_by(job_id=self.job_id).all()
+        return {segment.index: segment.text for segment in segments}
+    
+    def save_segment(self, index, text):
+        """
+        Guarda el texto de un segmento en cuanto se transcribe, para que la
+        página del trabajo lo muestre y un reintento no lo repita.
+        """
+        segment = TranscriptionSegment.query.filter_by(job_id=self.job_id, index=index).first()
+        if segment is None:
+            segment = TranscriptionSegment(job_id=self.job_id, index=index)
+            db.session.add(segment)
+        segment.text = text
+        db.session.commit()
+    
+    def load_plan(self):
+        """
+        Plan de segmentos de un intento anterior, con la ruta de cada
+        segmento en path. Devuelve None si no hay plan o si falta el archivo
+        de algún segmento pendiente (el plan ya no se puede retomar).
+        """
+        job = db.session.get(TranscriptionJob, self.job_id)
+        if not job.segment_plan:
+            return None
+        
+        plan = json.loads(job.segment_plan)
+        completed = self.completed_texts()
+        for index, segment in enumerate(plan["segments"]):
+            segment["path"] = os.path.join(self.folder, segment["filename"])
+            if index not in completed and not os.path.exists(segment["path"]):
+                current_app.logger.warning(
+                    f"Falta el segmento {index + 1} del trabajo {self.job_id}, se vuelve a dividir el archivo"
+                )
+                return None
+        return plan
+    
+    def save_plan(self, segments, stats):
+        """Guarda el plan de segmentos recién dividido y descarta los textos de planes anteriores"""
+        plan = {
+            "segments": [
+                {
+                    "filename": os.path.basename(segment["path"]),
+                    "start": segment["start"],
+                    "duration": segment.get("duration"),
+                    "overlap": segment.get("overlap", 0)
+                }
+                for segment in segments
+            ],
+            "stats": {key: stats[key] for key in ("original_size", "processed_size", "silence_removed", "offset_map") if key in stats}
+        }
+        TranscriptionSegment.query.filter_by(job_id=self.job_id).delete()
+        job = db.session.get(TranscriptionJob, self.job_id)
+        job.segment_plan = json.dumps(plan)
+        db.session.commit()
+    
+    def reset(self):
+        """Descarta el plan, los textos y los archivos de un intento anterior y deja la carpeta vacía"""
+        self.clear()
+        os.makedirs(self.folder, exist_ok=True)
+    
+    def clear(self):
+        """Elimina todos los puntos de control del trabajo (terminado o fallido)"""
+        TranscriptionSegment.query.filter_by(job_id=self.job_id).delete()
+        job = db.session.get(TranscriptionJob, self.job_id)
+        if job is not None:
+            job.segment_plan = None
+        db.session.commit()
+        shutil.rmtree(self.folder, ignore_errors=True)
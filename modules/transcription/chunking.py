@@ -0,0 +1,188 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Codificación usada para contar tokens cuando tiktoken está instalado
+TOKEN_ENCODING = "cl100k_base"
+
+# Fin de frase: signo de puntuación final seguido de espacio
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+')
+
+# Instrucciones de la fase de extracción (map) para cada tipo de documento
+MAP_INSTRUCTIONS = {
+    "acta": """
+        Eres un secretario que prepara el acta de una reunión larga. A continuación tienes el fragmento {index} de {total} de la transcripción.
+        Extrae de este fragmento, en forma de notas concisas pero sin omitir nada relevante:
+        - Personas que intervienen y su rol, si se menciona
+        - Fecha, hora, duración o modalidad de la reunión, si se mencionan
+        - Temas tratados, con las posiciones y conclusiones de cada uno
+        - Citas textuales relevantes
+        - TODOS los acuerdos, compromisos y tareas, con responsable, fecha límite y entregable si se mencionan
+        No redactes el acta ni inventes información que no esté en el fragmento.
+        
+        FRAGMENTO {index} DE {total}:
+        {chunk}
+        """,
+    "requirements": """
+        Eres un ingeniero de requerimientos que analiza una reunión larga. A continuación tienes el fragmento {index} de {total} de la transcripción.
+        Extrae de este fragmento, en forma de lista y sin omitir nada relevante:
+        - Stakeholders mencionados y sus roles/intereses
+        - Requerimientos funcionales y no funcionales (explícitos o implícitos), con su prioridad aparente y criterios de aceptación si se mencionan
+        - Restricciones técnicas y de negocio
+        - Solicitudes de cambio, supuestos y dependencias
+        - Términos de dominio y su significado
+        - Ambigüedades o conflictos detectados
+        No redactes el documento final ni inventes información que no esté en el fragmento.
+        
+        FRAGMENTO {index} DE {total}:
+        {chunk}
+        """
+}
+
+def count_tokens(text):
+    """
+    Cuenta los tokens de un texto. Sin tiktoken se usa una estimación
+    conservadora (un token cada 3 caracteres).
+    """
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding(TOKEN_ENCODING).encode(text))
+    # Los textos en español rondan los 4 caracteres por token: con 3 se
+    # sobrestima y los fragmentos nunca se pasan de la ventana del modelo
+    return len(text) // 3 + 1
+
+def split_sentences(text):
+    """Divide un texto en frases por los signos de puntuación final"""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+def chunk_text(text, max_tokens):
+    """
+    Agrupa las frases de un texto en fragmentos de como máximo max_tokens.
+    
+    Los fragmentos se cortan siempre entre frases; solo una frase que por sí
+    sola supere el límite (p. ej. una transcripción sin puntuación) se corta
+    entre palabras.
+    
+    Returns:
+        Lista de fragmentos de texto en orden
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    for sentence in split_sentences(text):
+        sentence_tokens = count_tokens(sentence)
+        
+        if sentence_tokens > max_tokens:
+            # Frase demasiado larga: partirla por palabras, sumando los
+            # tokens de cada palabra con su espacio en lugar de volver a
+            # contar el trozo entero a cada palabra
+            pieces = []
+            piece = []
+            piece_tokens = 0
+            for word in sentence.split():
+                word_tokens = count_tokens(" " + word)
+                if piece and piece_tokens + word_tokens > max_tokens:
+                    pieces.append(" ".join(piece))
+                    piece = []
+                    piece_tokens = 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                pieces.append(" ".join(piece))
+        else:
+            pieces = [sentence]
+        
+        for piece in pieces:
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    
+    if current:
+        chunks.append(" ".join(current))
+    
+    return chunks
+
+def build_map_prompt(document_type, chunk, index, total):
+    """Prompt de extracción de notas parciales para un fragmento"""
+    return MAP_INSTRUCTIONS[document_type].format(chunk=chunk, index=index, total=total)
+
+def join_partial_results(partials):
+    """Une las notas parciales en el texto que recibe la fase de combinación (reduce)"""
+    sections = [
+        f"--- Fragmento {index} de {len(partials)} ---\n{partial}"
+        for index, partial in enumerate(partials, start=1)
+    ]
+    return (
+        "NOTAS EXTRAÍDAS, EN ORDEN CRONOLÓGICO, DE LOS FRAGMENTOS DE UNA TRANSCRIPCIÓN LARGA:\n\n"
+        + "\n\n".join(sections)
+    )
+
+def condense_transcription(transcription, document_type, extract, max_tokens, max_workers=None):
+    """
+    Reduce una transcripción hasta que quepa en una sola llamada al modelo.
+    
+    Si la transcripción cabe en max_tokens se devuelve tal cual. Si no, se
+    divide en fragmentos por frases y se extraen notas parciales de todos los
+    fragmentos en paralelo, de modo que la latencia depende del número de
+    rondas de llamadas en paralelo y no de la longitud de la transcripción.
+    
+    Args:
+        transcription: Texto de la transcripción
+        document_type: 'acta' o 'requirements'
+        extract: Función prompt -> notas parciales, llamada desde varios hilos
+        max_tokens: Tokens de transcripción por llamada (DocumentProvider.input_tokens)
+        max_workers: Llamadas de extracción simultáneas (DOCUMENT_MAP_WORKERS por defecto)
+    
+    Returns:
+        La transcripción o las notas unidas, listas para el prompt final
+    """
+    if max_workers is None:
+        max_workers = current_app.config.get('DOCUMENT_MAP_WORKERS', 4)
+    
+    text = transcription
+    # Normalmente basta una ronda; si las notas siguen sin caber se resumen otra vez
+    for _ in range(3):
+        if count_tokens(text) <= max_tokens:
+            break
+        
+        chunks = chunk_text(text, max_tokens)
+        current_app.logger.info(
+            f"Transcripción de {count_tokens(text)} tokens: generando {document_type} por fragmentos ({len(chunks)} fragmentos)"
+        )
+        
+        app = current_app._get_current_object()
+        
+        def extract_chunk(index, chunk):
+            with app.app_context():
+                return extract(build_map_prompt(document_type, chunk, index, len(chunks)))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            partials = list(pool.map(extract_chunk, range(1, len(chunks) + 1), chunks))
+        
+        text = join_partial_results(partials)
+    
+    return text
+
+def map_reduce_document(transcription, document_type, complete, extract, max_tokens, max_workers=None):
+    """
+    Genera un documento a partir de una transcripción de cualquier longitud:
+    en una sola llamada si cabe, o con el prompt completo sobre las notas
+    extraídas de los fragmentos (ver condense_transcription).
+    
+    Args:
+        complete: Función texto -> documento final con el prompt completo del proveedor
+        (el resto, como en condense_transcription)
+    
+    Returns:
+        El texto del documento generado
+    """
+    return complete(condense_transcription(transcription, document_type, extract, max_tokens, max_workers))
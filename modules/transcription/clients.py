@@ -0,0 +1,126 @@
+import hashlib
+import threading
+import httpx
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from openai import OpenAI
+from flask import current_app
+
+# Clientes de los proveedores, compartidos por todos los hilos del proceso:
+# nombre -> (huella de la clave API, cliente)
+clients = {}
+clients_lock = threading.Lock()
+
+# Tiempo que se mantiene abierto un cliente sustituido, para que terminen
+# las peticiones que lo estaban usando
+RETIRED_CLIENT_GRACE_SECONDS = 300
+
+def key_fingerprint(api_key):
+    """Huella de una clave API, para detectar cambios sin guardarla en claro"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+def retire_client(client):
+    """Cierra un cliente sustituido cuando ya no debería haber peticiones en curso"""
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    timer = threading.Timer(RETIRED_CLIENT_GRACE_SECONDS, close)
+    timer.daemon = True
+    timer.start()
+
+def get_client(name, api_key, build):
+    """
+    Devuelve el cliente name para la clave api_key, creándolo con
+    build(api_key) la primera vez o si la clave ha cambiado (p. ej. desde
+    /set-api-key). El cliente anterior se cierra pasado un tiempo.
+    """
+    fingerprint = key_fingerprint(api_key)
+    with clients_lock:
+        entry = clients.get(name)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        client = build(api_key)
+        clients[name] = (fingerprint, client)
+    
+    if entry is not None:
+        current_app.logger.info(f"Clave API de {name} cambiada: cliente reconstruido")
+        retire_client(entry[1])
+    return client
+
+def build_openai_client(api_key):
+    """Cliente de OpenAI con un pool de conexiones HTTP persistentes"""
+    max_connections = current_app.config.get('OPENAI_HTTP_MAX_CONNECTIONS', 20)
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(current_app.config.get('OPENAI_HTTP_TIMEOUT', 600), connect=10)
+    )
+    # Sin reintentos del SDK: los 429 deben llegar al control de concurrencia
+    # y los reintentos se hacen respetando los límites compartidos
+    client = OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+    current_app.logger.info("Cliente OpenAI inicializado correctamente")
+    return client
+
+def get_openai_client():
+    """Cliente de OpenAI para la clave configurada (None si no hay clave)"""
+    api_key = current_app.config.get('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    return get_client("openai", api_key, build_openai_client)
+
+def get_gemini_model(model_name):
+    """
+    Modelo de Gemini para la clave configurada.
+    
+    genai.configure cambia la clave de todo el proceso, así que solo se
+    llama al crear el modelo; el modelo conserva el cliente con el que hizo
+    su primera petición, de modo que no hay que configurar nada por llamada.
+    """
+    api_key = current_app.config.get('GOOGLE_AI_API_KEY', '')
+    if not api_key:
+        raise ValueError("No se ha configurado la clave de API de Google AI")
+    
+    def build(key):
+        genai.configure(api_key=key)
+        current_app.logger.info("Cliente Google AI inicializado correctamente")
+        return genai.GenerativeModel(model_name)
+    
+    return get_client(f"google:{model_name}", api_key, build)
+
+def prewarm_clients(app, gemini_model=None):
+    """
+    Crea los clientes configurados y abre sus conexiones (DNS, TCP y TLS) en
+    segundo plano al arrancar el proceso, para que la primera petición real
+    no pague ese coste. Las llamadas de calentamiento no consumen tokens.
+    """
+    def prewarm_openai():
+        with app.app_context():
+            client = get_openai_client()
+            if client is None:
+                return
+            try:
+                client.models.list()
+            except Exception as e:
+                current_app.logger.warning(f"No se pudo precalentar la conexión con OpenAI: {str(e)}")
+    
+    def prewarm_google():
+        with app.app_context():
+            if not current_app.config.get('GOOGLE_AI_API_KEY'):
+                return
+            try:
+                model = get_gemini_model(gemini_model)
+                # Es el mismo cliente que usará el modelo en su primera petición
+                genai_client.get_default_generative_client().count_tokens(
+                    model=model.model_name,
+                    contents=[{"parts": [{"text": "ping"}]}]
+                )
+            except Exception as e:
+                current_app.logger.warning(f"No se pudo precalentar la conexión con Google AI: {str(e)}")
+    
+    if not app.config.get('PROVIDER_CLIENT_PREWARM', True):
+        return
+    
+    threads = [threading.Thread(target=prewarm_openai, daemon=True) for _ in range(app.config.get('OPENAI_PREWARM_CONNECTIONS', 2))]
+    if gemini_model:
+        threads.append(threading.Thread(target=prewarm_google, daemon=True))
+    for thread in threads:
+        thread.start()
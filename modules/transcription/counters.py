@@ -0,0 +1,32 @@
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from modules.auth.models import db
+from modules.transcription.models import UsageCounter
+
+def increment_counter(name, amount=1):
+    """
+    Incrementa un contador persistente de forma atómica.
+    
+    El incremento se hace en la propia base de datos (value = value + n), de
+    modo que varios procesos pueden sumar a la vez sin perder cuentas.
+    """
+    try:
+        result = db.session.execute(
+            sa.update(UsageCounter)
+            .where(UsageCounter.name == name)
+            .values(value=UsageCounter.value + amount, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.add(UsageCounter(name=name, value=amount))
+        db.session.commit()
+    except IntegrityError:
+        # Otro proceso ha creado el contador a la vez: sumar sobre el suyo
+        db.session.rollback()
+        increment_counter(name, amount)
+
+def get_counters(prefix=""):
+    """Devuelve un diccionario nombre -> valor con los contadores que empiezan por prefix"""
+    counters = UsageCounter.query.filter(UsageCounter.name.startswith(prefix)).all()
+    return {counter.name: counter.value for counter in counters}
@@ -0,0 +1,281 @@
+import time
+import threading
+from flask import current_app
+from modules.utils.audio_processing import get_file_size
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# Modelo de la API de OpenAI e idioma de transcripción (junto con el motor
+# forman la clave de la caché de transcripciones)
+WHISPER_MODEL = "whisper-1"
+TRANSCRIPTION_LANGUAGE = "es"
+
+# Nombre visible de cada motor, para el formulario de subida
+ENGINE_LABELS = {
+    "openai": "OpenAI Whisper (API)",
+    "local": "Whisper local (faster-whisper)"
+}
+
+# Motores ya creados en este proceso: (nombre, modelo local) -> motor
+engines = {}
+engines_lock = threading.Lock()
+
+class TranscriptionEngine:
+    """
+    Motor de transcripción de audio.
+    
+    Todos los motores transcriben un archivo completo con la misma firma que
+    transcribe_audio_file: rellenan stats con los tamaños y el silencio
+    eliminado, e informan del avance con progress_callback (completados,
+    total) y segment_callback (índice, total, texto). checkpoint permite
+    retomar un trabajo interrumpido en los motores que dividen el archivo.
+    """
+    
+    name = None
+    
+    @property
+    def model_name(self):
+        """Modelo usado, que forma parte de la clave de la caché"""
+        raise NotImplementedError
+    
+    def is_available(self):
+        """Indica si el motor se puede usar en este proceso"""
+        return True
+    
+    def preload(self):
+        """Carga lo necesario antes de la primera transcripción"""
+    
+    def transcribe(self, file_path, stats, progress_callback=None, segment_callback=None, checkpoint=None):
+        raise NotImplementedError
+
+
+class OpenAIEngine(TranscriptionEngine):
+    """Transcripción con la API de Whisper de OpenAI (división en segmentos, reintentos, límites)"""
+    
+    name = "openai"
+    
+    @property
+    def model_name(self):
+        return WHISPER_MODEL
+    
+    def is_available(self):
+        return bool(current_app.config.get('OPENAI_API_KEY'))
+    
+    def transcribe(self, file_path, stats, progress_callback=None, segment_callback=None, checkpoint=None):
+        from modules.transcription.services import transcribe_audio_file
+        return transcribe_audio_file(file_path, stats, progress_callback, segment_callback, checkpoint)
+
+
+class LocalWhisperEngine(TranscriptionEngine):
+    """
+    Transcripción en este servidor con faster-whisper.
+    
+    Si LOCAL_WHISPER_SERVER indica la dirección de un servidor de inferencia
+    (inference_server.py), los trabajos se le envían y los procesos web no
+    cargan ningún modelo. Si no, el modelo se carga una sola vez por proceso
+    (preferiblemente al arrancar, ver preload_engines) y lo comparten todos
+    los hilos. En CPU se usa por defecto cuantización int8, bastante más
+    rápida que float32 y con una precisión prácticamente igual.
+    """
+    
+    name = "local"
+    
+    def __init__(self, model_size, device="cpu", compute_type="int8", cpu_threads=0, num_workers=1, beam_size=5,
+                 server_address=None, server_authkey=None):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.server_address = server_address
+        self.server_authkey = server_authkey
+        self.model = None
+        self.server = None
+        self.lock = threading.Lock()
+    
+    @property
+    def model_name(self):
+        return f"faster-whisper-{self.model_size}"
+    
+    def is_available(self):
+        return WhisperModel is not None or bool(self.server_address)
+    
+    def load(self):
+        """Devuelve el modelo, cargándolo la primera vez"""
+        with self.lock:
+            if self.model is None:
+                if WhisperModel is None:
+                    raise ValueError("faster-whisper no está instalado (pip install faster-whisper)")
+                start_time = time.monotonic()
+                self.model = WhisperModel(
+                    self.model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers
+                )
+                current_app.logger.info(
+                    f"Modelo Whisper local '{self.model_size}' ({self.device}, {self.compute_type}) "
+                    f"cargado en {time.monotonic() - start_time:.1f}s"
+                )
+        return self.model
+    
+    def connect(self):
+        """Devuelve la conexión con el servidor de inferencia, abriéndola la primera vez"""
+        from modules.transcription.inference_server import connect_inference_server
+        with self.lock:
+            if self.server is None:
+                self.server = connect_inference_server(self.server_address, self.server_authkey)
+                current_app.logger.info(f"Conectado al servidor de inferencia local {self.server_address}: {self.server.info()}")
+        return self.server
+    
+    def preload(self):
+        if self.server_address:
+            self.connect()
+        else:
+            self.load()
+    
+    def run_on_server(self, file_path, options):
+        """Envía una transcripción al servidor de inferencia, reconectando una vez si la conexión se ha perdido"""
+        try:
+            return self.connect().transcribe(file_path, options, self.model_size)
+        except (ConnectionError, EOFError):
+            with self.lock:
+                self.server = None
+            return self.connect().transcribe(file_path, options, self.model_size)
+    
+    def transcribe(self, file_path, stats, progress_callback=None, segment_callback=None, checkpoint=None):
+        stats["original_size"] = get_file_size(file_path)
+        stats["processed_size"] = stats["original_size"]
+        
+        # faster-whisper decodifica cualquier formato y no tiene límite de
+        # tamaño, así que no hace falta recodificar ni dividir el audio; los
+        # silencios se eliminan con su propio VAD
+        options = {
+            "language": TRANSCRIPTION_LANGUAGE,
+            "task": "transcribe",
+            "beam_size": self.beam_size,
+            "vad_filter": current_app.config.get('TRANSCRIPTION_VAD_FILTER', False)
+        }
+        if self.server_address:
+            # El servidor solo devuelve el resultado final
+            if progress_callback:
+                progress_callback(0, 1)
+            result = self.run_on_server(file_path, options)
+        else:
+            result = transcribe_with_model(self.load(), file_path, options, progress_callback)
+        
+        duration_after_vad = result["duration_after_vad"]
+        if duration_after_vad is not None and duration_after_vad < result["duration"]:
+            stats["silence_removed"] = round(result["duration"] - duration_after_vad, 2)
+        
+        if segment_callback:
+            segment_callback(0, 1, result["text"])
+        if progress_callback:
+            progress_callback(1, 1)
+        return result["text"]
+
+
+def transcribe_with_model(model, file_path, options, progress_callback=None):
+    """
+    Transcribe un archivo con un modelo de faster-whisper ya cargado.
+    
+    progress_callback, si se indica, recibe (segundos transcritos, duración
+    total) cada vez que avanza al menos un 1%.
+    
+    Returns:
+        Diccionario con text, duration y duration_after_vad (None si el VAD
+        no está activado o la versión de faster-whisper no lo informa)
+    """
+    segments, info = model.transcribe(file_path, **options)
+    
+    total_seconds = max(1, int(info.duration))
+    if progress_callback:
+        progress_callback(0, total_seconds)
+    
+    texts = []
+    reported_percent = 0
+    for segment in segments:
+        texts.append(segment.text.strip())
+        percent = int(100 * segment.end / total_seconds)
+        if progress_callback and percent > reported_percent:
+            reported_percent = percent
+            progress_callback(min(total_seconds, int(segment.end)), total_seconds)
+    
+    return {
+        "text": " ".join(text for text in texts if text),
+        "duration": info.duration,
+        "duration_after_vad": getattr(info, "duration_after_vad", None)
+    }
+
+
+def build_engine(name, config, tier=None):
+    """Crea el motor name con la configuración de la aplicación (tier: modelo local a usar)"""
+    if name == "openai":
+        return OpenAIEngine()
+    if name == "local":
+        return LocalWhisperEngine(
+            tier or config.get('LOCAL_WHISPER_MODEL', 'medium'),
+            device=config.get('LOCAL_WHISPER_DEVICE', 'cpu'),
+            compute_type=config.get('LOCAL_WHISPER_COMPUTE_TYPE', 'int8'),
+            cpu_threads=config.get('LOCAL_WHISPER_CPU_THREADS', 0),
+            num_workers=config.get('LOCAL_WHISPER_NUM_WORKERS', 1),
+            beam_size=config.get('LOCAL_WHISPER_BEAM_SIZE', 5),
+            server_address=config.get('LOCAL_WHISPER_SERVER') or None,
+            server_authkey=config.get('LOCAL_WHISPER_SERVER_AUTHKEY') or config.get('SECRET_KEY')
+        )
+    raise ValueError(f"Motor de transcripción desconocido: {name}")
+
+def get_engine(name=None, tier=None):
+    """
+    Devuelve el motor name (por defecto, TRANSCRIPTION_ENGINE), creándolo la
+    primera vez. tier elige el modelo del motor local (ver tiering.py) y el
+    resto de motores lo ignoran.
+    """
+    name = name or current_app.config.get('TRANSCRIPTION_ENGINE', 'openai')
+    if name == "local":
+        key = (name, tier or current_app.config.get('LOCAL_WHISPER_MODEL', 'medium'))
+    else:
+        key = (name, None)
+    with engines_lock:
+        if key not in engines:
+            engines[key] = build_engine(name, current_app.config, key[1])
+        return engines[key]
+
+def local_tiers(config):
+    """Modelos locales que hay que tener cargados: LOCAL_WHISPER_TIERS o, si no, LOCAL_WHISPER_MODEL"""
+    tiers = [tier.strip() for tier in (config.get('LOCAL_WHISPER_TIERS') or '').split(',') if tier.strip()]
+    return tiers or [config.get('LOCAL_WHISPER_MODEL', 'medium')]
+
+def available_engines():
+    """Nombres de los motores que se pueden elegir al subir un archivo"""
+    return [name for name in ENGINE_LABELS if get_engine(name).is_available()]
+
+def preload_engines(app, background=False):
+    """
+    Carga el motor por defecto (con el motor local, todos sus modelos) al
+    arrancar el proceso para que la primera transcripción no espere a leer
+    el modelo. Con background, la carga se hace en un hilo y las
+    transcripciones que lleguen antes esperan a que termine.
+    """
+    def preload():
+        with app.app_context():
+            try:
+                if current_app.config.get('TRANSCRIPTION_ENGINE', 'openai') == "local":
+                    for tier in local_tiers(current_app.config):
+                        get_engine("local", tier).preload()
+                else:
+                    get_engine().preload()
+            except Exception as e:
+                current_app.logger.error(f"No se pudo precargar el motor de transcripción: {str(e)}")
+    
+    if not app.config.get('TRANSCRIPTION_ENGINE_PRELOAD', True):
+        return
+    if background:
+        threading.Thread(target=preload, daemon=True).start()
+    else:
+        preload()
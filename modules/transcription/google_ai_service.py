@@ -1,38 +1,32 @@
-import google.generativeai as genai
-from flask import current_app
+from modules.transcription.clients import get_gemini_model
+from modules.transcription.chunking import condense_transcription
 
-def initialize_google_ai_client():
-    """Inicializa el cliente de Google AI con la clave API configurada"""
-    api_key = current_app.config.get('GOOGLE_AI_API_KEY', '')
-    
-    if not api_key:
-        raise ValueError("No se ha configurado la clave de API de Google AI")
-    
-    genai.configure(api_key=api_key)
-    current_app.logger.info("Cliente Google AI inicializado correctamente")
-    return True
+# Modelo de Gemini para generar documentos (adecuado para textos extensos)
+GEMINI_MODEL = 'gemini-1.5-pro'
 
-def generate_meeting_minutes_with_google(transcription):
-    """Genera un acta de reunión basada en la transcripción usando Google AI"""
-    try:
-        # Inicializar el cliente
-        initialize_google_ai_client()
-        
-        # Configurar el modelo - usar un modelo adecuado para textos extensos
-        model = genai.GenerativeModel('gemini-1.5-pro')
+# Ventana de contexto de GEMINI_MODEL y tokens máximos de la respuesta
+GEMINI_CONTEXT_TOKENS = 1000000
+GEMINI_OUTPUT_TOKENS = 8192
 
-        # Configuración optimizada para generar actas más detalladas
-        generation_config = {
-            "temperature": 0.2,        # Temperatura más baja para respuestas más precisas y menos creativas
-            "top_p": 0.95,             # Filtrado de probabilidad conservador
-            "top_k": 40,               # Considerar un buen rango de tokens
-            "max_output_tokens": 8192, # Asegurar suficiente espacio para una respuesta detallada
-        }
-        
-        # Crear el prompt para el modelo
-        prompt = f"""
-        Actúa como un secretario profesional especializado en la redacción de actas de reuniones empresariales. Tu tarea es transformar la siguiente transcripción en un acta formal, detallada y completa.
+# Versión de cada prompt de Gemini: incrementarla al modificar el prompt
+# invalida en la caché solo los documentos de ese tipo generados con Gemini
+GOOGLE_PROMPT_VERSIONS = {
+    "acta": 2,
+    "requirements": 2
+}
 
+def initialize_google_ai_client():
+    """
+    Devuelve el modelo de Gemini para la clave API configurada. El modelo se
+    reutiliza entre peticiones y solo se vuelve a crear si cambia la clave.
+    """
+    return get_gemini_model(GEMINI_MODEL)
+
+def build_google_minutes_prompt(transcription):
+    """Prompt de Gemini para convertir una transcripción en un acta de reunión"""
+    return f"""
+        Actúa como un secretario profesional especializado en la redacción de actas de reuniones empresariales. Tu tarea es transformar la siguiente transcripción en un acta formal, detallada y completa.
+        
         INSTRUCCIONES ESPECÍFICAS:
         1. Analiza minuciosamente la transcripción completa, sin omitir ninguna sección relevante.
         2. Identifica todas las personas mencionadas y su rol en la conversación.
@@ -40,7 +34,7 @@ def generate_meeting_minutes_with_google(transcription):
         4. Preserva el nivel de detalle técnico cuando sea importante para los acuerdos.
         5. Identifica los puntos de debate y las diferentes posiciones tomadas en la reunión.
         6. Organiza la información por temas, manteniendo una estructura clara.
-
+        
         FORMATO DEL ACTA:
         1. TÍTULO: "ACTA DE REUNIÓN" seguido del tema principal.
         2. INFORMACIÓN GENERAL:
@@ -61,62 +55,32 @@ def generate_meeting_minutes_with_google(transcription):
         7. CONCLUSIONES:
         - Resumen ejecutivo de los resultados de la reunión
         - Próximos pasos claramente definidos
-
+        
         # Añade estas instrucciones en la sección "FORMATO DEL ACTA" del prompt
-
+        
         - Asegúrate de incluir CITAS TEXTUALES RELEVANTES bajo cada punto tratado, para proporcionar contexto de las decisiones.
-
+        
         - Para la sección "ACUERDOS Y COMPROMISOS", utiliza SIEMPRE el siguiente formato de tabla markdown:
         | Tarea | Responsable | Fecha Límite | Entregable |
         |-------|-------------|--------------|------------|
         | [Descripción clara de la tarea] | [Nombre del responsable] | [Fecha específica, nunca "Sin fecha límite"] | [Producto o resultado esperado] |
-
+        
         - Al describir las fechas límite, utiliza términos específicos como: "Esta semana", "Próximo sprint", "Próxima reunión", "15 días", "Mañana", "Fin de mes", etc. NUNCA dejes fechas sin especificar.
-
+        
         - Para cada tarea, define un ENTREGABLE concreto y medible que permita verificar su cumplimiento.
         
-
+        
         TRANSCRIPCIÓN:
         {transcription}
-
+        
         Importante: No omitas ningún detalle relevante. El acta debe ser lo suficientemente completa como para que alguien que no asistió a la reunión pueda entender todos los temas tratados, acuerdos tomados y compromisos adquiridos.
         """
-        
-        # Generar la respuesta
-        response = model.generate_content(prompt, generation_config=generation_config)
-        
-        # Obtener el texto generado
-        acta_text = response.text
-        
-        current_app.logger.info("Acta generada exitosamente con Google AI (Gemini)")
-        
-        return {"success": True, "acta": acta_text, "provider": "Google AI (Gemini)"}
-    
-    except Exception as e:
-        current_app.logger.error(f"Error al generar el acta con Google AI: {str(e)}")
-        return {"success": False, "error": str(e), "provider": "Google AI (Gemini)"}
-
-def extract_requirements_with_google(transcription):
-    """Extrae requerimientos funcionales, no funcionales y RFC a partir de una transcripción usando Google AI"""
-    try:
-        # Inicializar el cliente
-        initialize_google_ai_client()
-        
-        # Configurar el modelo - usar un modelo adecuado para textos extensos
-        model = genai.GenerativeModel('gemini-1.5-pro')
 
-        # Configuración optimizada para análisis de requisitos preciso
-        generation_config = {
-            "temperature": 0.1,        # Temperatura muy baja para respuestas precisas y estructuradas
-            "top_p": 0.95,             # Filtrado de probabilidad conservador
-            "top_k": 40,               # Considerar un buen rango de tokens
-            "max_output_tokens": 8192, # Asegurar suficiente espacio para una respuesta detallada
-        }
-        
-        # Crear el prompt para el modelo
-        prompt = f"""
+def build_google_requirements_prompt(transcription):
+    """Prompt de Gemini para extraer requerimientos de software de una transcripción"""
+    return f"""
         Actúa como un ingeniero de requerimientos y experto Arquitecto de Software experimentado especializado en análisis y documentación de requisitos de software. Tu tarea es analizar la siguiente transcripción de reunión y extraer todos los requerimientos del sistema mencionados.
-
+        
         INSTRUCCIONES ESPECÍFICAS:
         1. Analiza minuciosamente la transcripción completa, sin omitir ninguna información relevante.
         2. Identifica y categoriza claramente todos los requerimientos mencionados (explícita o implícitamente).
@@ -125,7 +89,7 @@ def extract_requirements_with_google(transcription):
         5. Detecta posibles conflictos o ambigüedades entre los requerimientos.
         6. Captura criterios de aceptación cuando se mencionen.
         7. Identifica stakeholders relacionados con cada requerimiento.
-
+        
         FORMATO DEL DOCUMENTO DE REQUERIMIENTOS:
         1. TÍTULO: "DOCUMENTO DE ESPECIFICACIÓN DE REQUERIMIENTOS"
         2. INFORMACIÓN GENERAL:
@@ -166,23 +130,59 @@ def extract_requirements_with_google(transcription):
         10. PUNTOS DE AMBIGÜEDAD:
             - Aspectos que requieren clarificación adicional
             - Posibles conflictos entre requerimientos
-
+        
         TRANSCRIPCIÓN:
         {transcription}
-
+        
         Importante: Sé metódico y exhaustivo. Cada requerimiento debe ser atómico, consistente, verificable y rastreable. Utiliza un lenguaje claro y preciso. Evita interpretaciones subjetivas y céntrate en las necesidades explícitas e implícitas mencionadas en la transcripción. El documento debe permitir a un equipo de desarrollo comprender completamente lo que se necesita construir.
         """
-        
-        # Generar la respuesta
-        response = model.generate_content(prompt, generation_config=generation_config)
-        
-        # Obtener el texto generado
-        requirements_doc = response.text
-        
-        current_app.logger.info("Documento de requerimientos generado exitosamente con Google AI (Gemini)")
-        
-        return {"success": True, "requirements_doc": requirements_doc, "provider": "Google AI (Gemini)"}
+
+# Prompt y temperatura de cada tipo de documento
+GOOGLE_DOCUMENT_PROMPTS = {
+    "acta": (build_google_minutes_prompt, 0.2),
+    "requirements": (build_google_requirements_prompt, 0.1)
+}
+
+def google_document_generation_config(document_type):
+    """Modelo de Gemini, prompt y configuración de generación para un tipo de documento"""
+    build_prompt, temperature = GOOGLE_DOCUMENT_PROMPTS[document_type]
+    generation_config = {
+        "temperature": temperature,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": GEMINI_OUTPUT_TOKENS,
+    }
+    return initialize_google_ai_client(), build_prompt, generation_config
+
+def google_document_generators(document_type):
+    """Funciones (complete, extract) de Gemini para un tipo de documento"""
+    model, build_prompt, generation_config = google_document_generation_config(document_type)
+    return (
+        lambda text: model.generate_content(build_prompt(text), generation_config=generation_config).text,
+        lambda prompt: model.generate_content(prompt, generation_config=generation_config).text
+    )
+
+def stream_document_with_google(transcription, document_type, max_tokens):
+    """
+    Genera un documento con Google AI devolviendo el texto a trozos según
+    lo produce el modelo (generate_content con stream=True).
+    
+    Las transcripciones de más de max_tokens se condensan antes por
+    fragmentos; solo se transmite la llamada final.
+    
+    Yields:
+        Fragmentos de texto del documento
+    """
+    model, build_prompt, generation_config = google_document_generation_config(document_type)
+    
+    text = condense_transcription(
+        transcription,
+        document_type,
+        extract=lambda prompt: model.generate_content(prompt, generation_config=generation_config).text,
+        max_tokens=max_tokens
+    )
     
-    except Exception as e:
-        current_app.logger.error(f"Error al generar documento de requerimientos con Google AI: {str(e)}")
-        return {"success": False, "error": str(e), "provider": "Google AI (Gemini)"}
\ No newline at end of file
+    response = model.generate_content(build_prompt(text), generation_config=generation_config, stream=True)
+    for chunk in response:
+        if chunk.text:
+            yield chunk.text
@@ -0,0 +1,124 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+from modules.transcription.counters import increment_counter
+
+# Muestras necesarias antes de empezar a duplicar peticiones
+MIN_LATENCY_SAMPLES = 10
+
+class LatencyTracker:
+    """
+    Latencias recientes de las llamadas a la API de transcripción.
+    
+    Se guardan en segundos por MB de audio, porque el tiempo de respuesta
+    depende sobre todo del tamaño del segmento.
+    """
+    
+    def __init__(self, window=200):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=window)
+    
+    def record(self, seconds, size_bytes):
+        with self.lock:
+            self.samples.append(seconds / max(size_bytes / (1024 * 1024), 0.1))
+    
+    def threshold(self, percentile, size_bytes):
+        """Segundos a partir de los cuales una llamada de ese tamaño es lenta (None si no hay datos)"""
+        with self.lock:
+            if len(self.samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index] * max(size_bytes / (1024 * 1024), 0.1)
+
+
+class HedgeBudget:
+    """
+    Limita las peticiones duplicadas a una fracción de las normales.
+    
+    Cada petición normal suma ratio créditos y cada duplicada gasta uno; el
+    saldo tiene un máximo para que no se acumulen ráfagas de duplicados.
+    """
+    
+    def __init__(self, max_credits=5.0):
+        self.lock = threading.Lock()
+        self.credits = 0.0
+        self.max_credits = max_credits
+    
+    def deposit(self, ratio):
+        with self.lock:
+            self.credits = min(self.max_credits, self.credits + ratio)
+    
+    def try_spend(self):
+        with self.lock:
+            if self.credits >= 1.0:
+                self.credits -= 1.0
+                return True
+            return False
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+def hedged_call(primary, hedge, size_bytes):
+    """
+    Ejecuta primary y, si tarda más que el percentil configurado de las
+    latencias recientes, lanza hedge en paralelo y se queda con la primera
+    respuesta correcta. La petición que pierde no se puede cancelar, pero su
+    resultado se descarta.
+    
+    El tiempo se cuenta desde que primary supera los límites de peticiones
+    y de concurrencia propios: mientras espera en ellos no se duplica, porque
+    la espera no es lentitud de la API y el duplicado gastaría más cupo.
+    
+    Args:
+        primary: Función de la petición normal; recibe on_admitted, que debe
+            llamar cuando la petición sale hacia la API
+        hedge: Función sin argumentos de la petición duplicada
+        size_bytes: Tamaño del audio, para escalar el umbral
+    
+    Returns:
+        El resultado de la primera petición que termina bien
+    """
+    app = current_app._get_current_object()
+    hedge_budget.deposit(app.config.get('TRANSCRIPTION_HEDGE_BUDGET', 0.1))
+    
+    threshold = None
+    if app.config.get('TRANSCRIPTION_HEDGE_ENABLED', False):
+        threshold = latency_tracker.threshold(app.config.get('TRANSCRIPTION_HEDGE_PERCENTILE', 95), size_bytes)
+    if threshold is None:
+        return primary(None)
+    
+    def run(fn):
+        with app.app_context():
+            return fn()
+    
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    try:
+        admitted = threading.Event()
+        primary_future = pool.submit(run, lambda: primary(admitted.set))
+        # Si falla antes de salir, tampoco hay que seguir esperando
+        primary_future.add_done_callback(lambda future: admitted.set())
+        admitted.wait()
+        done, _ = wait([primary_future], timeout=threshold)
+        if done or not hedge_budget.try_spend():
+            return primary_future.result()
+        
+        current_app.logger.info(f"Petición lenta (más de {threshold:.1f}s): lanzando una petición duplicada")
+        increment_counter("transcription_hedge.fired")
+        hedge_future = pool.submit(run, hedge)
+        pending = {primary_future, hedge_future}
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge_future:
+                        increment_counter("transcription_hedge.won")
+                    return future.result()
+            if not pending:
+                # Las dos han fallado: propagar el error de la petición normal
+                return primary_future.result()
+    finally:
+        pool.shutdown(wait=False)
@@ -0,0 +1,111 @@
+import os
+import multiprocessing
+from multiprocessing.managers import BaseManager
+from modules.transcription.engines import WhisperModel, transcribe_with_model, local_tiers
+
+# Modelos cargados en cada proceso del pool: tamaño -> modelo
+models = {}
+
+def cpu_budget(processes=None, cores=None):
+    """
+    Reparte los núcleos de la máquina entre los procesos de inferencia para
+    que cada modelo use sus propios hilos y la CPU no quede sobresuscrita.
+    
+    Sin número de procesos se usa uno por cada 4 núcleos, que en CPU suele
+    dar más transcripciones por núcleo que un solo modelo con todos.
+    
+    Returns:
+        Tupla (procesos, hilos de CPU por proceso)
+    """
+    cores = cores or os.cpu_count() or 1
+    processes = processes or max(1, cores // 4)
+    return processes, max(1, cores // processes)
+
+def load_models(model_sizes, device, compute_type, cpu_threads):
+    """Inicializador de cada proceso del pool: carga sus modelos una sola vez"""
+    for model_size in model_sizes:
+        models[model_size] = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=1)
+        print(f"Proceso {os.getpid()}: modelo '{model_size}' ({compute_type}, {cpu_threads} hilos) cargado")
+
+def run_transcription(file_path, options, model_size):
+    """Transcribe un archivo con el modelo indicado de este proceso"""
+    if model_size not in models:
+        raise ValueError(f"El servidor de inferencia no tiene cargado el modelo '{model_size}'")
+    return transcribe_with_model(models[model_size], file_path, options)
+
+
+class InferenceService:
+    """
+    Servicio que exponen los procesos de inferencia a los workers web.
+    
+    Cada petición se atiende en un hilo del servidor, que la encola en el
+    pool y espera su resultado; el pool reparte los trabajos entre los
+    procesos según van quedando libres.
+    """
+    
+    def __init__(self, pool, processes, cpu_threads, model_sizes):
+        self.pool = pool
+        self.processes = processes
+        self.cpu_threads = cpu_threads
+        self.model_sizes = model_sizes
+    
+    def transcribe(self, file_path, options, model_size):
+        return self.pool.apply(run_transcription, (file_path, options, model_size))
+    
+    def info(self):
+        return {"models": self.model_sizes, "processes": self.processes, "cpu_threads": self.cpu_threads}
+
+
+class InferenceServerManager(BaseManager):
+    pass
+
+
+class InferenceClientManager(BaseManager):
+    pass
+
+
+InferenceClientManager.register('inference')
+
+def parse_address(address):
+    """Convierte 'host:puerto' en la tupla que espera multiprocessing"""
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+def connect_inference_server(address, authkey):
+    """Conecta con un servidor de inferencia y devuelve el proxy del servicio"""
+    manager = InferenceClientManager(address=parse_address(address), authkey=authkey.encode("utf-8"))
+    manager.connect()
+    return manager.inference()
+
+def serve(app, processes=None):
+    """
+    Arranca el servidor de inferencia local (ver inference_server.py): un
+    pool fijo de procesos, cada uno con sus modelos precargados (todos los
+    de LOCAL_WHISPER_TIERS) y su parte de los núcleos, que atiende las transcripciones de todos los workers web.
+    """
+    if WhisperModel is None:
+        raise ValueError("faster-whisper no está instalado (pip install faster-whisper)")
+    
+    config = app.config
+    processes, cpu_threads = cpu_budget(processes or config.get('LOCAL_INFERENCE_PROCESSES') or None)
+    if config.get('LOCAL_WHISPER_CPU_THREADS'):
+        cpu_threads = config['LOCAL_WHISPER_CPU_THREADS']
+    model_sizes = local_tiers(config)
+    
+    pool = multiprocessing.Pool(
+        processes,
+        initializer=load_models,
+        initargs=(model_sizes, config.get('LOCAL_WHISPER_DEVICE', 'cpu'), config.get('LOCAL_WHISPER_COMPUTE_TYPE', 'int8'), cpu_threads)
+    )
+    service = InferenceService(pool, processes, cpu_threads, model_sizes)
+    
+    InferenceServerManager.register('inference', callable=lambda: service)
+    address = config.get('LOCAL_WHISPER_SERVER') or '127.0.0.1:50055'
+    authkey = config.get('LOCAL_WHISPER_SERVER_AUTHKEY') or config['SECRET_KEY']
+    manager = InferenceServerManager(address=parse_address(address), authkey=authkey.encode("utf-8"))
+    
+    app.logger.info(f"Servidor de inferencia en {address}: {processes} procesos con los modelos {', '.join(model_sizes)} y {cpu_threads} hilos cada uno")
+    try:
+        manager.get_server().serve_forever()
+    finally:
+        pool.terminate()
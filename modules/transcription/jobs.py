@@ -0,0 +1,433 @@
+import os
+import json
+import time
+import socket
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import sqlalchemy as sa
+from flask import current_app
+from modules.auth.models import db, User
+from modules.transcription.models import Transcription, TranscriptionJob
+from modules.transcription.services import process_saved_audio_file
+from modules.transcription.pipeline import IncrementalSummarizer
+from modules.transcription.speculative import should_pregenerate, schedule_speculative_acta
+from modules.transcription.tiering import select_tier
+from modules.transcription.checkpoints import JobCheckpoint
+
+# Pool de hilos que procesa los trabajos de transcripción fuera de las peticiones
+executor = None
+executor_lock = threading.Lock()
+
+# Tareas run_job encoladas o en curso en el pool de este proceso
+active_runs = 0
+
+def get_executor(app):
+    """Devuelve el pool de trabajos, creándolo la primera vez"""
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=app.config.get('TRANSCRIPTION_JOB_WORKERS', 2),
+                thread_name_prefix="transcription-job"
+            )
+    return executor
+
+def submit_run(app, job_id, only_if_idle=False):
+    """
+    Encola run_job en el pool. Con only_if_idle solo se encola si el pool
+    tiene algún hilo libre, para no acumular tareas en su cola.
+    
+    Returns:
+        True si se ha encolado
+    """
+    global active_runs
+    with executor_lock:
+        if only_if_idle and active_runs >= app.config.get('TRANSCRIPTION_JOB_WORKERS', 2):
+            return False
+        active_runs += 1
+    get_executor(app).submit(run_job, app, job_id)
+    return True
+
+def get_worker_id():
+    """Identificador único del hilo que procesa un trabajo (host:pid:hilo)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+def create_job(file_info, user_id, pipeline_acta=False, engine=None):
+    """
+    Registra un trabajo pendiente para un archivo ya guardado. Con
+    pipeline_acta, el acta se genera a la vez que se transcribe el audio;
+    engine es el motor de transcripción elegido (None para el por defecto).
+    """
+    job = TranscriptionJob(
+        user_id=user_id,
+        original_filename=file_info["original_filename"],
+        file_path=file_info["filepath"],
+        audio_hash=file_info.get("sha256"),
+        pipeline_acta=pipeline_acta,
+        engine=engine,
+        status=TranscriptionJob.PENDING
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def submit_job(job_id):
+    """
+    Encola un trabajo en el pool de segundo plano. En modo 'worker' no hace
+    nada: el trabajo queda pendiente hasta que lo reclame un proceso worker.py.
+    """
+    app = current_app._get_current_object()
+    if app.config.get('TRANSCRIPTION_JOB_MODE', 'thread') != 'thread':
+        return
+    submit_run(app, job_id)
+
+def count_active_jobs(user_id):
+    """Número de trabajos del usuario que aún no han terminado"""
+    return TranscriptionJob.query.filter(
+        TranscriptionJob.user_id == user_id,
+        TranscriptionJob.status.in_([TranscriptionJob.PENDING, TranscriptionJob.RUNNING])
+    ).count()
+
+def claimable_condition(now, max_attempts):
+    """Trabajos pendientes o cuya reserva ha caducado sin agotar los intentos"""
+    return sa.and_(
+        sa.or_(
+            TranscriptionJob.status == TranscriptionJob.PENDING,
+            sa.and_(
+                TranscriptionJob.status == TranscriptionJob.RUNNING,
+                TranscriptionJob.lease_expires_at < now
+            )
+        ),
+        sa.func.coalesce(TranscriptionJob.attempts, 0) < max_attempts
+    )
+
+def claim_job(worker_id, job_id=None):
+    """
+    Reserva de forma atómica un trabajo para este worker.
+    
+    La reserva es un UPDATE condicionado al estado del trabajo: si dos
+    procesos intentan reservar el mismo trabajo a la vez, solo a uno le
+    afecta la fila. Funciona igual con SQLite y con PostgreSQL.
+    
+    Args:
+        worker_id: Identificador del proceso que reserva
+        job_id: Reservar este trabajo concreto en lugar del más antiguo
+    
+    Returns:
+        El trabajo reservado, o None si no hay ninguno disponible
+    """
+    lease_seconds = current_app.config.get('TRANSCRIPTION_JOB_LEASE_SECONDS', 60)
+    max_attempts = current_app.config.get('TRANSCRIPTION_JOB_MAX_ATTEMPTS', 3)
+    now = datetime.utcnow()
+    
+    query = db.session.query(TranscriptionJob.id).filter(claimable_condition(now, max_attempts))
+    if job_id is not None:
+        query = query.filter(TranscriptionJob.id == job_id)
+    candidate_ids = [row.id for row in query.order_by(TranscriptionJob.created_at).limit(5)]
+    
+    for candidate_id in candidate_ids:
+        result = db.session.execute(
+            sa.update(TranscriptionJob)
+            .where(TranscriptionJob.id == candidate_id, claimable_condition(now, max_attempts))
+            .values(
+                status=TranscriptionJob.RUNNING,
+                claimed_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=sa.func.coalesce(TranscriptionJob.attempts, 0) + 1,
+                started_at=now
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        if result.rowcount == 1:
+            return db.session.get(TranscriptionJob, candidate_id, populate_existing=True)
+    
+    return None
+
+def renew_lease(job_id, worker_id):
+    """
+    Amplía la reserva de un trabajo que este worker sigue procesando.
+    
+    Returns:
+        False si el trabajo ya no pertenece a este worker
+    """
+    lease_seconds = current_app.config.get('TRANSCRIPTION_JOB_LEASE_SECONDS', 60)
+    result = db.session.execute(
+        sa.update(TranscriptionJob)
+        .where(
+            TranscriptionJob.id == job_id,
+            TranscriptionJob.claimed_by == worker_id,
+            TranscriptionJob.status == TranscriptionJob.RUNNING
+        )
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def fail_exhausted_jobs():
+    """
+    Marca como fallidos los trabajos cuya reserva caducó tras agotar los
+    intentos y elimina sus puntos de control, que ya no se van a retomar.
+    """
+    max_attempts = current_app.config.get('TRANSCRIPTION_JOB_MAX_ATTEMPTS', 3)
+    now = datetime.utcnow()
+    exhausted = sa.and_(
+        TranscriptionJob.status == TranscriptionJob.RUNNING,
+        TranscriptionJob.lease_expires_at < now,
+        TranscriptionJob.attempts >= max_attempts
+    )
+    job_ids = [row.id for row in db.session.query(TranscriptionJob.id).filter(exhausted)]
+    if not job_ids:
+        return
+    
+    db.session.execute(
+        sa.update(TranscriptionJob)
+        .where(TranscriptionJob.id.in_(job_ids), exhausted)
+        .values(
+            status=TranscriptionJob.FAILED,
+            error="El trabajo se interrumpió demasiadas veces",
+            finished_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    for job_id in job_ids:
+        JobCheckpoint(job_id).clear()
+
+class LeaseKeeper(threading.Thread):
+    """Hilo que renueva periódicamente la reserva de un trabajo mientras se procesa"""
+    
+    def __init__(self, app, job_id, worker_id):
+        super().__init__(name=f"lease-{job_id}", daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.lost = False
+    
+    def run(self):
+        interval = self.app.config.get('TRANSCRIPTION_JOB_LEASE_SECONDS', 60) / 3
+        while not self.stopped.wait(interval):
+            with self.app.app_context():
+                try:
+                    if not renew_lease(self.job_id, self.worker_id):
+                        current_app.logger.warning(f"Se ha perdido la reserva del trabajo {self.job_id}")
+                        self.lost = True
+                        return
+                except Exception as e:
+                    current_app.logger.error(f"Error al renovar la reserva del trabajo {self.job_id}: {str(e)}")
+    
+    def stop(self):
+        self.stopped.set()
+
+def process_job(app, job, worker_id):
+    """Transcribe un trabajo ya reservado y crea la transcripción"""
+    job_id = job.id
+    keeper = LeaseKeeper(app, job_id, worker_id)
+    keeper.start()
+    
+    def update_progress(completed, total):
+        job.completed_segments = completed
+        job.total_segments = total
+        db.session.commit()
+    
+    summarizer = None
+    if job.pipeline_acta:
+        try:
+            summarizer = IncrementalSummarizer(app)
+        except Exception as e:
+            current_app.logger.error(f"No se generará el acta del trabajo {job_id} durante la transcripción: {str(e)}")
+    
+    # Plan de segmentos y textos ya transcritos, para retomar el trabajo si
+    # este proceso muere antes de terminar
+    checkpoint = JobCheckpoint(job_id)
+    
+    def segment_done(index, total, text):
+        checkpoint.save_segment(index, text)
+        if summarizer:
+            summarizer.add_segment(index, total, text)
+    
+    try:
+        file_info = {
+            "original_filename": job.original_filename,
+            "filepath": job.file_path,
+            "sha256": job.audio_hash
+        }
+        
+        # Con el motor local, elegir el modelo según la carga, el audio y el plan
+        tier = None
+        if (job.engine or current_app.config.get('TRANSCRIPTION_ENGINE', 'openai')) == "local":
+            tier = select_tier(db.session.get(User, job.user_id), job.file_path)
+        
+        result = process_saved_audio_file(
+            file_info,
+            job.user_id,
+            progress_callback=update_progress,
+            segment_callback=segment_done,
+            engine=job.engine,
+            tier=tier,
+            checkpoint=checkpoint
+        )
+        acta_text = summarizer.finish(result["transcription_text"]) if summarizer else None
+        
+        keeper.stop()
+        if keeper.lost or not renew_lease(job_id, worker_id):
+            # Otro worker ha reclamado el trabajo: su resultado es el que cuenta
+            current_app.logger.warning(f"Trabajo {job_id} reclamado por otro worker, se descarta el resultado")
+            return
+        
+        # Guardar la transcripción en la base de datos
+        transcription = Transcription(
+            user_id=job.user_id,
+            original_filename=result["original_filename"],
+            file_path=result["file_path"],
+            transcript_path=result["transcript_path"],
+            transcript_text=result["transcription_text"],
+            processing_time=result["processing_time"],
+            original_size=result["original_size"],
+            processed_size=result["processed_size"],
+            silence_removed=result["silence_removed"],
+            offset_map=json.dumps(result["offset_map"]) if result["offset_map"] else None,
+            model_tier=result["model_tier"]
+        )
+        if acta_text:
+            transcription.acta_text = acta_text
+            transcription.document_type = 'acta'
+        db.session.add(transcription)
+        db.session.flush()
+        
+        job.transcription_id = transcription.id
+        job.status = TranscriptionJob.COMPLETED
+        job.finished_at = datetime.utcnow()
+        job.lease_expires_at = None
+        db.session.commit()
+        # El texto completo ya está en la transcripción
+        checkpoint.clear()
+        current_app.logger.info(f"Trabajo {job_id} completado por {worker_id} (transcripción ID {transcription.id})")
+        
+        # Adelantar el acta, que casi siempre se pide justo después de transcribir
+        if not acta_text and should_pregenerate(db.session.get(User, job.user_id)):
+            schedule_speculative_acta(app, transcription.transcript_text)
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al procesar el trabajo {job_id}: {str(e)}")
+        if keeper.lost:
+            return
+        job.status = TranscriptionJob.FAILED
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        job.lease_expires_at = None
+        db.session.commit()
+        checkpoint.clear()
+    
+    finally:
+        keeper.stop()
+        if summarizer:
+            summarizer.close()
+
+def run_job(app, job_id):
+    """
+    Procesa un trabajo encolado desde una petición web (o, con job_id None,
+    el más antiguo que se pueda reclamar). Al terminar, el mismo hilo sigue
+    con los trabajos pendientes o con reservas caducadas que otros workers
+    hayan abandonado.
+    """
+    global active_runs
+    try:
+        with app.app_context():
+            worker_id = get_worker_id()
+            job = claim_job(worker_id, job_id=job_id)
+            while job is not None:
+                process_job(app, job, worker_id)
+                job = claim_job(worker_id)
+    finally:
+        with executor_lock:
+            active_runs -= 1
+
+def has_claimable_jobs():
+    """Indica si hay trabajos pendientes o con la reserva caducada que se puedan reclamar"""
+    max_attempts = current_app.config.get('TRANSCRIPTION_JOB_MAX_ATTEMPTS', 3)
+    return db.session.query(
+        TranscriptionJob.query.filter(claimable_condition(datetime.utcnow(), max_attempts)).exists()
+    ).scalar()
+
+def sweep_jobs(app):
+    """
+    Revisa los trabajos abandonados por un worker web que ha muerto: marca
+    como fallidos los que han agotado sus intentos y, si el pool tiene algún
+    hilo libre, encola la reclamación de los que tienen la reserva caducada.
+    Con el pool ocupado no hace falta: cada hilo reclama los trabajos
+    pendientes al terminar el suyo.
+    
+    Returns:
+        True si se ha encolado la reclamación de algún trabajo
+    """
+    fail_exhausted_jobs()
+    if not has_claimable_jobs():
+        return False
+    return submit_run(app, None, only_if_idle=True)
+
+def start_job_sweeper(app):
+    """
+    En modo 'thread', ejecuta sweep_jobs periódicamente para no depender de
+    que otra subida ponga el pool a reclamar los trabajos abandonados.
+    """
+    interval = app.config.get('TRANSCRIPTION_JOB_SWEEP_SECONDS', 30)
+    
+    def sweep():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    sweep_jobs(app)
+                except Exception as e:
+                    current_app.logger.error(f"Error al revisar los trabajos abandonados: {str(e)}")
+    
+    threading.Thread(target=sweep, name="job-sweeper", daemon=True).start()
+
+def run_worker(app, concurrency=None):
+    """
+    Bucle principal de un proceso worker independiente (worker.py).
+    
+    Reclama trabajos de la base de datos compartida mientras tenga hilos
+    libres. Varios procesos, en uno o varios hosts, pueden ejecutarse a la
+    vez sobre la misma base de datos y el mismo almacenamiento de archivos.
+    """
+    with app.app_context():
+        concurrency = concurrency or app.config.get('TRANSCRIPTION_JOB_WORKERS', 2)
+        poll_seconds = app.config.get('TRANSCRIPTION_JOB_POLL_SECONDS', 5)
+    
+    slots = threading.Semaphore(concurrency)
+    
+    def work(worker_id, job_id):
+        try:
+            with app.app_context():
+                job = db.session.get(TranscriptionJob, job_id)
+                process_job(app, job, worker_id)
+        finally:
+            slots.release()
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="transcription-worker") as pool:
+        while True:
+            slots.acquire()
+            with app.app_context():
+                try:
+                    fail_exhausted_jobs()
+                    # La reserva se hace a nombre del hilo que va a procesar el trabajo
+                    worker_id = f"{socket.gethostname()}:{os.getpid()}:{time.monotonic_ns()}"
+                    job = claim_job(worker_id)
+                except Exception as e:
+                    current_app.logger.error(f"Error al reclamar trabajos: {str(e)}")
+                    job = None
+                
+                if job is None:
+                    slots.release()
+                    time.sleep(poll_seconds)
+                    continue
+                
+                current_app.logger.info(f"Trabajo {job.id} reclamado por {worker_id}")
+                pool.submit(work, worker_id, job.id)
@@ -0,0 +1,254 @@
+import os
+import time
+import shutil
+import uuid
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from modules.auth.models import db
+from modules.utils.vad import VAD_SAMPLE_RATE
+from modules.transcription.models import Transcription, TranscriptionJob
+from modules.transcription.engines import get_engine, local_tiers
+from modules.transcription.services import save_transcription
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+    ConnectionClosed = ConnectionError
+
+# Extensión para los WebSockets (None si flask-sock no está instalado)
+sock = Sock() if Sock is not None else None
+
+def live_available():
+    """Indica si se puede transcribir en directo (flask-sock y motor local disponibles)"""
+    return sock is not None and get_engine("local").is_available()
+
+# Formato del audio que envía el navegador: PCM de 16 bits, mono, 16 kHz
+BYTES_PER_SECOND = VAD_SAMPLE_RATE * 2
+
+class LiveSegmenter:
+    """
+    Corta en segmentos el audio que llega en directo, en las pausas.
+    
+    Es la versión incremental de detect_speech_regions: la energía de cada
+    trama se compara con el ruido de fondo de los últimos segundos (percentil
+    10 más un margen). Un segmento termina tras min_silence segundos sin voz
+    o al llegar a max_segment segundos; el audio sin voz se descarta salvo
+    un pequeño margen antes de cada segmento.
+    """
+    
+    def __init__(self, min_silence=0.6, max_segment=15.0, frame_ms=30, padding=0.3,
+                 threshold_margin_db=12, min_threshold_db=-50, max_threshold_db=-35, history_seconds=10):
+        self.frame_bytes = int(VAD_SAMPLE_RATE * frame_ms / 1000) * 2
+        self.frame_seconds = frame_ms / 1000
+        self.min_silence = min_silence
+        self.max_segment = max_segment
+        self.padding_bytes = int(padding * VAD_SAMPLE_RATE) * 2
+        self.threshold_margin_db = threshold_margin_db
+        self.min_threshold_db = min_threshold_db
+        self.max_threshold_db = max_threshold_db
+        self.energies = deque(maxlen=int(history_seconds / self.frame_seconds))
+        self.pending = bytearray()
+        self.segment = bytearray()
+        self.has_speech = False
+        self.silent_frames = 0
+    
+    def is_speech(self, frame):
+        samples = np.frombuffer(bytes(frame), dtype=np.int16).astype(np.float32)
+        energy = 20 * np.log10(np.sqrt(np.mean(samples ** 2)) / 32768.0 + 1e-10)
+        self.energies.append(energy)
+        noise_floor = np.percentile(self.energies, 10)
+        # Con el límite superior, la voz normal cuenta siempre como voz
+        # aunque se hable sin pausas durante todo el historial
+        threshold = min(max(noise_floor + self.threshold_margin_db, self.min_threshold_db), self.max_threshold_db)
+        return energy > threshold
+    
+    def cut(self):
+        """Devuelve el segmento actual y empieza uno nuevo"""
+        segment = bytes(self.segment)
+        self.segment = bytearray()
+        self.has_speech = False
+        self.silent_frames = 0
+        return segment
+    
+    def add(self, data):
+        """
+        Añade audio recibido.
+        
+        Returns:
+            Lista de segmentos terminados (bytes PCM), normalmente vacía
+        """
+        self.pending.extend(data)
+        segments = []
+        while len(self.pending) >= self.frame_bytes:
+            frame = self.pending[:self.frame_bytes]
+            del self.pending[:self.frame_bytes]
+            self.segment.extend(frame)
+            
+            if self.is_speech(frame):
+                self.has_speech = True
+                self.silent_frames = 0
+            else:
+                self.silent_frames += 1
+            
+            seconds = len(self.segment) / BYTES_PER_SECOND
+            if self.has_speech and (self.silent_frames * self.frame_seconds >= self.min_silence or seconds >= self.max_segment):
+                segments.append(self.cut())
+            elif not self.has_speech and len(self.segment) > self.padding_bytes:
+                # Solo silencio: conservar el final como margen del próximo segmento
+                del self.segment[:len(self.segment) - self.padding_bytes]
+        return segments
+    
+    def flush(self):
+        """Devuelve el último segmento al terminar la sesión (None si no tiene voz)"""
+        self.segment.extend(self.pending)
+        self.pending = bytearray()
+        return self.cut() if self.has_speech else None
+
+
+def write_wav(path, pcm, mode="wb"):
+    """Guarda audio PCM de 16 bits, mono, 16 kHz en un archivo WAV"""
+    with wave.open(path, mode) as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(VAD_SAMPLE_RATE)
+        wav.writeframes(pcm)
+
+
+class LiveSession:
+    """
+    Sesión de transcripción en directo de un usuario.
+    
+    El audio completo se va guardando en un WAV (el "archivo original" de la
+    transcripción) y cada segmento detectado se transcribe con el motor
+    local en un hilo aparte, en orden, mientras se sigue recibiendo audio.
+    Al terminar se guarda una transcripción normal, con su trabajo ya
+    completado para que se pueda abrir en la página de resultado.
+    """
+    
+    def __init__(self, app, user_id, on_partial):
+        self.app = app
+        self.user_id = user_id
+        self.on_partial = on_partial
+        self.started_at = time.monotonic()
+        self.texts = []
+        self.received_bytes = 0
+        
+        config = app.config
+        model = config.get('LIVE_TRANSCRIPTION_MODEL') or local_tiers(config)[0]
+        self.engine = get_engine("local", model)
+        self.segmenter = LiveSegmenter(
+            min_silence=config.get('LIVE_VAD_MIN_SILENCE_SECONDS', 0.6),
+            max_segment=config.get('LIVE_MAX_SEGMENT_SECONDS', 15)
+        )
+        self.max_bytes = int(config.get('LIVE_MAX_SESSION_MINUTES', 180) * 60 * BYTES_PER_SECOND)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.filename = f"directo_{timestamp}.wav"
+        self.folder = os.path.join(config["UPLOAD_FOLDER"], "live", uuid.uuid4().hex)
+        os.makedirs(self.folder, exist_ok=True)
+        self.audio_path = os.path.join(config["UPLOAD_FOLDER"], f"{timestamp}_{user_id}_{self.filename}")
+        self.audio_file = wave.open(self.audio_path, "wb")
+        self.audio_file.setnchannels(1)
+        self.audio_file.setsampwidth(2)
+        self.audio_file.setframerate(VAD_SAMPLE_RATE)
+        
+        # Un solo hilo para que los segmentos se transcriban y se envíen en orden
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-transcription")
+    
+    @property
+    def full(self):
+        """Indica si la sesión ha llegado a su duración máxima"""
+        return self.received_bytes >= self.max_bytes
+    
+    def add_audio(self, data):
+        """Recibe un bloque de audio del navegador"""
+        if self.full:
+            return
+        self.received_bytes += len(data)
+        self.audio_file.writeframes(data)
+        for segment in self.segmenter.add(data):
+            self.submit(segment)
+    
+    def submit(self, segment):
+        index = len(self.texts)
+        self.texts.append(None)
+        self.executor.submit(self.transcribe_segment, index, segment)
+    
+    def transcribe_segment(self, index, segment):
+        path = os.path.join(self.folder, f"segment_{index:05d}.wav")
+        with self.app.app_context():
+            try:
+                write_wav(path, segment)
+                text = self.engine.transcribe(path, {})
+            except Exception as e:
+                current_app.logger.error(f"Error al transcribir el segmento {index} en directo: {str(e)}")
+                text = ""
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        self.texts[index] = text
+        if text:
+            self.on_partial(index, text)
+    
+    def finish(self):
+        """
+        Transcribe lo que queda, guarda la transcripción y devuelve el
+        trabajo completado (None si no se ha dicho nada).
+        """
+        segment = self.segmenter.flush()
+        if segment:
+            self.submit(segment)
+        self.executor.shutdown(wait=True)
+        self.audio_file.close()
+        os.rmdir(self.folder)
+        
+        text = " ".join(text for text in self.texts if text)
+        if not text:
+            os.remove(self.audio_path)
+            return None
+        
+        transcription_info = save_transcription(text, self.filename, self.user_id)
+        transcription = Transcription(
+            user_id=self.user_id,
+            original_filename=self.filename,
+            file_path=self.audio_path,
+            transcript_path=transcription_info["transcript_path"],
+            transcript_text=text,
+            processing_time=round(time.monotonic() - self.started_at, 2),
+            original_size=os.path.getsize(self.audio_path),
+            model_tier=self.engine.model_size
+        )
+        db.session.add(transcription)
+        db.session.flush()
+        
+        now = datetime.utcnow()
+        job = TranscriptionJob(
+            user_id=self.user_id,
+            original_filename=self.filename,
+            file_path=self.audio_path,
+            engine=self.engine.name,
+            status=TranscriptionJob.COMPLETED,
+            completed_segments=len(self.texts),
+            total_segments=len(self.texts),
+            transcription_id=transcription.id,
+            started_at=now,
+            finished_at=now
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+    
+    def abort(self):
+        """Libera los recursos de una sesión que no se va a guardar y borra su audio"""
+        # Se espera al segmento en curso para que no escriba en la carpeta ya borrada
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.audio_file.close()
+        if os.path.exists(self.audio_path):
+            os.remove(self.audio_path)
+        shutil.rmtree(self.folder, ignore_errors=True)
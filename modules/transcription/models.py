@@ -12,7 +12,146 @@ class Transcription(db.Model):
     acta_text = db.Column(sa.Text, nullable=True)
     document_type = db.Column(sa.String(20), default='acta')  # Nueva columna
     processing_time = db.Column(sa.Float)
+    original_size = db.Column(sa.Integer, nullable=True)  # Bytes del archivo subido
+    processed_size = db.Column(sa.Integer, nullable=True)  # Bytes del audio enviado a la API
+    silence_removed = db.Column(sa.Float, nullable=True)  # Segundos de silencio eliminados antes de transcribir
+    offset_map = db.Column(sa.Text, nullable=True)  # JSON [inicio filtrado, inicio original, duración] de los tramos conservados (ver vad.map_to_original)
+    model_tier = db.Column(sa.String(20), nullable=True)  # Modelo local elegido según la carga (small, medium, large)
     created_at = db.Column(sa.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<Transcription {self.original_filename}>'
+
+
+class TranscriptionJob(db.Model):
+    """Trabajo de transcripción que se procesa en segundo plano"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    id = db.Column(sa.Integer, primary_key=True)
+    user_id = db.Column(sa.Integer, sa.ForeignKey('user.id'), nullable=False)
+    status = db.Column(sa.String(20), nullable=False, default=PENDING, index=True)
+    original_filename = db.Column(sa.String(255), nullable=False)
+    file_path = db.Column(sa.String(255), nullable=False)
+    completed_segments = db.Column(sa.Integer, default=0)
+    total_segments = db.Column(sa.Integer, nullable=True)
+    error = db.Column(sa.Text, nullable=True)
+    audio_hash = db.Column(sa.String(64), nullable=True)  # SHA-256 del archivo subido
+    pipeline_acta = db.Column(sa.Boolean, default=False)  # Generar el acta durante la transcripción
+    engine = db.Column(sa.String(20), nullable=True)  # Motor de transcripción elegido (None: el por defecto)
+    segment_plan = db.Column(sa.Text, nullable=True)  # JSON con los segmentos del archivo, para retomar la transcripción
+    attempts = db.Column(sa.Integer, default=0)
+    claimed_by = db.Column(sa.String(120), nullable=True)  # Proceso que tiene el trabajo reservado
+    lease_expires_at = db.Column(sa.DateTime, nullable=True, index=True)  # Fin de la reserva si no se renueva
+    transcription_id = db.Column(sa.Integer, sa.ForeignKey('transcription.id'), nullable=True)
+    created_at = db.Column(sa.DateTime, default=datetime.utcnow)
+    started_at = db.Column(sa.DateTime, nullable=True)
+    finished_at = db.Column(sa.DateTime, nullable=True)
+    
+    @property
+    def progress(self):
+        """Porcentaje completado (0-100) según los segmentos transcritos"""
+        if self.status == self.COMPLETED:
+            return 100
+        if not self.total_segments:
+            return 0
+        return round(100 * (self.completed_segments or 0) / self.total_segments)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "completed_segments": self.completed_segments or 0,
+            "total_segments": self.total_segments,
+            "error": self.error,
+            "transcription_id": self.transcription_id,
+            "original_filename": self.original_filename
+        }
+    
+    def __repr__(self):
+        return f'<TranscriptionJob {self.id} {self.status}>'
+
+
+class TranscriptionSegment(db.Model):
+    """Texto de un segmento de un trabajo, guardado en cuanto se transcribe"""
+    __table_args__ = (
+        sa.UniqueConstraint('job_id', 'index', name='uq_transcription_segment_job_index'),
+    )
+    
+    id = db.Column(sa.Integer, primary_key=True)
+    job_id = db.Column(sa.Integer, sa.ForeignKey('transcription_job.id'), nullable=False, index=True)
+    index = db.Column(sa.Integer, nullable=False)  # Posición del segmento en el audio (desde 0)
+    text = db.Column(sa.Text, nullable=False)
+    created_at = db.Column(sa.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {"index": self.index, "text": self.text}
+    
+    def __repr__(self):
+        return f'<TranscriptionSegment {self.job_id}#{self.index}>'
+
+
+class TranscriptionCache(db.Model):
+    """Transcripciones ya realizadas, indexadas por el hash SHA-256 del audio"""
+    __table_args__ = (
+        sa.UniqueConstraint('audio_hash', 'engine', 'language', 'model', name='uq_transcription_cache_key'),
+    )
+    
+    id = db.Column(sa.Integer, primary_key=True)
+    audio_hash = db.Column(sa.String(64), nullable=False, index=True)
+    engine = db.Column(sa.String(50), nullable=False)
+    language = db.Column(sa.String(10), nullable=False)
+    model = db.Column(sa.String(50), nullable=False)
+    transcript_text = db.Column(sa.Text, nullable=False)
+    hits = db.Column(sa.Integer, default=0)
+    created_at = db.Column(sa.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(sa.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TranscriptionCache {self.audio_hash[:12]} {self.engine}/{self.model}>'
+
+
+class DocumentCache(db.Model):
+    """Documentos generados (actas, requerimientos), indexados por el hash de la transcripción"""
+    __table_args__ = (
+        sa.UniqueConstraint('transcript_hash', 'document_type', 'provider', 'model', 'prompt_version', name='uq_document_cache_key'),
+    )
+    
+    id = db.Column(sa.Integer, primary_key=True)
+    transcript_hash = db.Column(sa.String(64), nullable=False, index=True)
+    document_type = db.Column(sa.String(20), nullable=False)
+    provider = db.Column(sa.String(20), nullable=False)
+    model = db.Column(sa.String(50), nullable=False)
+    prompt_version = db.Column(sa.Integer, nullable=False)
+    content = db.Column(sa.Text, nullable=False)
+    provider_label = db.Column(sa.String(50))
+    source = db.Column(sa.String(20), default='request')  # request, pipeline o speculative
+    hits = db.Column(sa.Integer, default=0)
+    created_at = db.Column(sa.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(sa.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<DocumentCache {self.transcript_hash[:12]} {self.document_type} {self.provider}/{self.model} v{self.prompt_version}>'
+
+
+class UsageCounter(db.Model):
+    """Contador persistente compartido por todos los procesos (aciertos de caché, etc.)"""
+    name = db.Column(sa.String(100), primary_key=True)
+    value = db.Column(sa.Integer, nullable=False, default=0)
+    updated_at = db.Column(sa.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UsageCounter {self.name}={self.value}>'
+
+
+class RateLimitBucket(db.Model):
+    """Cubo de tokens compartido por todos los procesos para limitar las llamadas a una API"""
+    name = db.Column(sa.String(100), primary_key=True)
+    tokens = db.Column(sa.Float, nullable=False)
+    updated_at = db.Column(sa.Float, nullable=False)  # time.time() de la última actualización
+    
+    def __repr__(self):
+        return f'<RateLimitBucket {self.name}={self.tokens:.1f}>'
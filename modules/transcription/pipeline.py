@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from modules.transcription.chunking import (
+    count_tokens, chunk_text, build_map_prompt, join_partial_results,
+    condense_transcription, map_reduce_document
+)
+from modules.transcription.cache import store_cached_document, hash_text
+from modules.transcription.services import get_document_provider
+
+class IncrementalSummarizer:
+    """
+    Genera un documento (por defecto, el acta) a la vez que se transcribe el audio.
+    
+    Cada segmento transcrito se pasa a add_segment. En cuanto el texto
+    recibido deja de caber en una sola llamada (input_tokens del proveedor), las
+    notas parciales de cada segmento se extraen en segundo plano con el
+    mismo prompt de la generación por fragmentos mientras siguen
+    transcribiéndose los demás. Al terminar la transcripción, finish solo
+    tiene que combinar las notas con el prompt completo del proveedor. Si
+    el texto cabe en una llamada no se extrae nada: las notas no harían falta.
+    
+    El documento se guarda en la caché de documentos, de modo que pedirlo
+    después desde la página de resultado es instantáneo.
+    """
+    
+    def __init__(self, app, document_type="acta"):
+        self.app = app
+        self.document_type = document_type
+        self.partials = {}
+        self.texts = {}
+        self.received_tokens = 0
+        with app.app_context():
+            self.provider = get_document_provider()
+            self.complete, self.extract = self.provider.generators(document_type)
+            self.max_tokens = self.provider.input_tokens()
+            max_workers = app.config.get('DOCUMENT_MAP_WORKERS', 4)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+    
+    def extract_notes(self, prompt):
+        with self.app.app_context():
+            return self.extract(prompt)
+    
+    def add_segment(self, index, total, text):
+        """
+        Recibe un segmento recién transcrito y, si el texto recibido ya no
+        cabe en una sola llamada, empieza a extraer sus notas (y las de los
+        segmentos anteriores que aún no se habían enviado)
+        """
+        if total < 2:
+            return
+        self.texts[index] = (total, text)
+        self.received_tokens += count_tokens(text)
+        if self.received_tokens <= self.max_tokens:
+            return
+        
+        for pending_index in sorted(self.texts):
+            if pending_index not in self.partials:
+                pending_total, pending_text = self.texts[pending_index]
+                self.partials[pending_index] = [
+                    self.executor.submit(self.extract_notes, build_map_prompt(self.document_type, chunk, pending_index + 1, pending_total))
+                    for chunk in chunk_text(pending_text, self.max_tokens)
+                ]
+    
+    def finish(self, transcription):
+        """
+        Genera el documento final de la transcripción completa.
+        
+        Si la transcripción cabe en una sola llamada (y por tanto no se han
+        extraído notas) se genera directamente con el prompt completo.
+        
+        Returns:
+            El texto del documento, o None si no se ha podido generar (la
+            transcripción no debe fallar por ello)
+        """
+        try:
+            if len(self.partials) < 2 or count_tokens(transcription) <= self.max_tokens:
+                content = map_reduce_document(transcription, self.document_type, self.complete, self.extract, self.max_tokens)
+            else:
+                partials = [
+                    future.result()
+                    for index in sorted(self.partials)
+                    for future in self.partials[index]
+                ]
+                notes = condense_transcription(join_partial_results(partials), self.document_type, self.extract, self.max_tokens)
+                content = self.complete(notes)
+            
+            store_cached_document(
+                hash_text(transcription),
+                self.document_type,
+                self.provider.name,
+                self.provider.model,
+                self.provider.prompt_versions[self.document_type],
+                content,
+                self.provider.label,
+                source="pipeline"
+            )
+            current_app.logger.info(f"Documento '{self.document_type}' generado durante la transcripción")
+            return content
+        
+        except Exception as e:
+            current_app.logger.error(f"Error al generar el documento durante la transcripción: {str(e)}")
+            return None
+        
+        finally:
+            self.close()
+    
+    def close(self):
+        """Libera los hilos, cancelando las extracciones que no hayan empezado"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+import time
+import threading
+from collections import deque
+from statistics import median
+from flask import current_app
+
+# Tokens reservados para las instrucciones del prompt en cada llamada
+PROMPT_RESERVE_TOKENS = 2000
+
+class DocumentProvider:
+    """
+    Proveedor de generación de documentos (OpenAI, Google AI...).
+    
+    Todos los proveedores exponen la misma interfaz: generators devuelve las
+    funciones (complete, extract) para generar un tipo de documento y stream
+    devuelve un iterador con el texto a trozos. Las funciones deben lanzar
+    una excepción si fallan, para que el router pueda pasar al siguiente.
+    
+    context_tokens es la ventana de contexto del modelo y output_tokens lo
+    que se reserva para la respuesta: con ellos se decide cuánta
+    transcripción cabe en una sola llamada (ver input_tokens).
+    """
+    
+    def __init__(self, name, label, model, prompt_versions, is_configured, generators, stream,
+                 context_tokens, output_tokens):
+        self.name = name
+        self.label = label
+        self.model = model
+        self.prompt_versions = prompt_versions
+        self.is_configured = is_configured
+        self.generators = generators
+        self.stream = stream
+        self.context_tokens = context_tokens
+        self.output_tokens = output_tokens
+    
+    def input_tokens(self):
+        """
+        Tokens de transcripción que caben en una sola llamada: la ventana de
+        contexto menos la respuesta y las instrucciones. Por encima se genera
+        por fragmentos. DOCUMENT_CHUNK_TOKENS, si se configura, la reduce.
+        """
+        tokens = self.context_tokens - self.output_tokens - PROMPT_RESERVE_TOKENS
+        limit = current_app.config.get('DOCUMENT_CHUNK_TOKENS', 0)
+        return min(tokens, limit) if limit else tokens
+    
+    def __repr__(self):
+        return f'<DocumentProvider {self.name}/{self.model}>'
+
+
+class ProviderStats:
+    """
+    Estadísticas recientes de un proveedor y su circuit breaker.
+    
+    El circuito se abre tras varios fallos seguidos y deja de enviarse
+    tráfico al proveedor durante un tiempo; después se deja pasar una única
+    petición de prueba (semiabierto) que lo cierra si va bien o lo vuelve a
+    abrir si falla.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, window=20):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.results = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.trial_in_progress = False
+    
+    def latency(self):
+        """Mediana de la latencia de las últimas peticiones correctas (None si no hay datos)"""
+        with self.lock:
+            return median(self.latencies) if self.latencies else None
+    
+    def error_rate(self):
+        with self.lock:
+            return self.results.count(False) / len(self.results) if self.results else 0.0
+    
+    def is_available(self, cooldown_seconds):
+        """Comprueba, sin reservar nada, si el circuito admite peticiones"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= cooldown_seconds
+            return not self.trial_in_progress
+    
+    def allow_request(self, cooldown_seconds):
+        """Comprueba si se puede enviar una petición y reserva la de prueba si el circuito está semiabierto"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= cooldown_seconds:
+                self.state = self.HALF_OPEN
+                self.trial_in_progress = False
+            
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.trial_in_progress:
+                self.trial_in_progress = True
+                return True
+            return False
+    
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.results.append(True)
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self.trial_in_progress = False
+    
+    def record_failure(self, failure_threshold):
+        with self.lock:
+            self.results.append(False)
+            self.consecutive_failures += 1
+            self.trial_in_progress = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def release_trial(self):
+        """Libera la petición de prueba sin registrar resultado (la petición se abandonó a medias)"""
+        with self.lock:
+            self.trial_in_progress = False
+    
+    def to_dict(self):
+        latency = self.latency()
+        return {
+            "state": self.state,
+            "latency": round(latency, 2) if latency is not None else None,
+            "error_rate": round(self.error_rate(), 2),
+            "consecutive_failures": self.consecutive_failures
+        }
+
+
+class ProviderRouter:
+    """
+    Elige el proveedor para cada petición y pasa al siguiente si falla.
+    
+    Los proveedores configurados y con el circuito cerrado se ordenan por su
+    latencia reciente; uno sin datos todavía se prueba primero para poder
+    medirlo, y a igualdad se respeta el orden de registro. Las estadísticas
+    se guardan en memoria en cada proceso.
+    """
+    
+    def __init__(self, providers, window=20):
+        self.providers = providers
+        self.stats = {provider.name: ProviderStats(window) for provider in providers}
+    
+    def configured(self):
+        return [provider for provider in self.providers if provider.is_configured()]
+    
+    def ranked(self):
+        """Proveedores configurados, del preferido al menos preferido"""
+        cooldown = current_app.config.get('DOCUMENT_PROVIDER_COOLDOWN_SECONDS', 60)
+        
+        def sort_key(item):
+            index, provider = item
+            stats = self.stats[provider.name]
+            latency = stats.latency()
+            return (
+                not stats.is_available(cooldown),
+                latency if latency is not None else 0.0,
+                index
+            )
+        
+        return [provider for _, provider in sorted(enumerate(self.configured()), key=sort_key)]
+    
+    def best(self):
+        """El proveedor preferido ahora mismo (None si no hay ninguno configurado)"""
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+    
+    def candidates(self):
+        """
+        Recorre los proveedores en orden de preferencia, saltando los que
+        tienen el circuito abierto. Quien consume cada proveedor debe
+        registrar el resultado con record_success o record_failure.
+        """
+        cooldown = current_app.config.get('DOCUMENT_PROVIDER_COOLDOWN_SECONDS', 60)
+        for provider in self.ranked():
+            if self.stats[provider.name].allow_request(cooldown):
+                yield provider
+    
+    def record_success(self, provider, latency):
+        self.stats[provider.name].record_success(latency)
+    
+    def record_failure(self, provider, error):
+        threshold = current_app.config.get('DOCUMENT_PROVIDER_FAILURE_THRESHOLD', 3)
+        self.stats[provider.name].record_failure(threshold)
+        current_app.logger.warning(f"Fallo del proveedor {provider.label}: {str(error)}")
+    
+    def release(self, provider):
+        """Libera la reserva de un proveedor cuya petición se abandonó sin resultado"""
+        self.stats[provider.name].release_trial()
+    
+    def call(self, fn):
+        """
+        Ejecuta fn(proveedor) con el mejor proveedor disponible, pasando al
+        siguiente si lanza una excepción.
+        
+        Returns:
+            Tupla (proveedor, resultado)
+        """
+        last_error = None
+        for provider in self.candidates():
+            start_time = time.monotonic()
+            try:
+                result = fn(provider)
+            except Exception as e:
+                self.record_failure(provider, e)
+                last_error = e
+                continue
+            self.record_success(provider, time.monotonic() - start_time)
+            return provider, result
+        
+        if last_error is not None:
+            raise last_error
+        raise Exception("No hay ningún proveedor de IA configurado y disponible")
+    
+    def status(self):
+        """Estado de cada proveedor, para diagnóstico"""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
@@ -0,0 +1,194 @@
+import time
+import random
+import threading
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from modules.auth.models import db
+from modules.transcription.models import RateLimitBucket
+from modules.transcription.counters import increment_counter
+
+# Espera máxima entre dos comprobaciones de un cubo sin tokens
+MAX_BUCKET_WAIT_SECONDS = 5.0
+
+# Límites de concurrencia adaptativos de este proceso, por API
+concurrency_limiters = {}
+concurrency_lock = threading.Lock()
+
+def acquire_tokens(name, cost, per_minute):
+    """
+    Consume cost tokens del cubo name, esperando a que se rellene si no hay
+    suficientes. El cubo admite per_minute tokens por minuto, con ráfagas de
+    hasta un minuto de tokens, y se guarda en la base de datos para que todos
+    los procesos (y hosts) compartan el mismo límite.
+    
+    La actualización es optimista: solo se aplica si nadie ha modificado el
+    cubo desde que se leyó, y si no se vuelve a intentar.
+    
+    Args:
+        name: Nombre del cubo (p. ej. 'whisper.requests')
+        cost: Tokens a consumir (peticiones, minutos de audio...)
+        per_minute: Límite por minuto; 0 o None desactiva el límite
+    """
+    if not per_minute or per_minute <= 0:
+        return
+    
+    capacity = float(per_minute)
+    rate = capacity / 60
+    # Una petición mayor que el cubo nunca cabría: se limita a vaciarlo
+    cost = min(float(cost), capacity)
+    
+    while True:
+        now = time.time()
+        bucket = db.session.get(RateLimitBucket, name)
+        
+        if bucket is None:
+            try:
+                db.session.add(RateLimitBucket(name=name, tokens=capacity - cost, updated_at=now))
+                db.session.commit()
+                return
+            except IntegrityError:
+                # Otro proceso ha creado el cubo a la vez
+                db.session.rollback()
+                continue
+        
+        previous_tokens = bucket.tokens
+        previous_updated_at = bucket.updated_at
+        available = min(capacity, previous_tokens + max(0.0, now - previous_updated_at) * rate)
+        
+        if available >= cost:
+            result = db.session.execute(
+                sa.update(RateLimitBucket)
+                .where(
+                    RateLimitBucket.name == name,
+                    RateLimitBucket.tokens == previous_tokens,
+                    RateLimitBucket.updated_at == previous_updated_at
+                )
+                .values(tokens=available - cost, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return
+            continue
+        
+        # Terminar la transacción de lectura antes de esperar
+        db.session.rollback()
+        wait_seconds = min(MAX_BUCKET_WAIT_SECONDS, (cost - available) / rate)
+        time.sleep(wait_seconds + random.uniform(0, 0.1))
+
+
+class AdaptiveConcurrency:
+    """
+    Límite de llamadas simultáneas de este proceso a una API, con control AIMD.
+    
+    Cada llamada correcta sube el límite poco a poco (aumento aditivo, una
+    llamada más por cada "ventana" completa) y cada respuesta de sobrecarga
+    (429 o 5xx) lo reduce a la mitad (disminución multiplicativa). Varias
+    sobrecargas seguidas de la misma ráfaga solo lo reducen una vez.
+    """
+    
+    def __init__(self, max_limit, min_limit=1, decrease_interval=1.0):
+        self.condition = threading.Condition()
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.decrease_interval = decrease_interval
+        self.last_decrease = 0.0
+    
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+    
+    def release(self, overloaded=False):
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self.last_decrease >= self.decrease_interval:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+    
+    def to_dict(self):
+        with self.condition:
+            return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "max_limit": self.max_limit}
+
+
+def get_concurrency_limiter(name):
+    """Devuelve el límite de concurrencia de una API en este proceso, creándolo la primera vez"""
+    with concurrency_lock:
+        if name not in concurrency_limiters:
+            concurrency_limiters[name] = AdaptiveConcurrency(current_app.config.get('PROVIDER_MAX_CONCURRENCY', 8))
+        return concurrency_limiters[name]
+
+def error_status(error):
+    """Código HTTP de un error de la API, si lo tiene"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+def is_overload_error(error):
+    """Indica si el error significa que la API está saturada (429 o 5xx)"""
+    status = error_status(error)
+    return status is not None and (status == 429 or status >= 500)
+
+def retry_delay(attempt, error=None, max_delay=30.0):
+    """
+    Segundos a esperar antes de reintentar: el Retry-After de la respuesta si
+    lo trae, o un backoff exponencial con jitter completo para que los
+    reintentos de varios procesos no se sincronicen.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return min(max_delay, float(retry_after)) + random.uniform(0, 1)
+        except ValueError:
+            pass
+    return random.uniform(0, min(max_delay, 2 ** (attempt + 1)))
+
+def limited_call(api, fn, limits=(), on_admitted=None):
+    """
+    Llama a fn respetando los límites compartidos de la API y su límite de
+    concurrencia adaptativo en este proceso.
+    
+    Args:
+        api: Nombre de la API (p. ej. 'whisper'), para el límite de concurrencia
+        fn: Función sin argumentos que hace la llamada
+        limits: Lista de (cubo, coste, límite por minuto) a consumir antes
+        on_admitted: Función sin argumentos que se llama cuando la petición
+            ya tiene sus tokens y su hueco, justo antes de fn
+    
+    Returns:
+        El resultado de fn
+    """
+    for bucket, cost, per_minute in limits:
+        acquire_tokens(bucket, cost, per_minute)
+    
+    limiter = get_concurrency_limiter(api)
+    limiter.acquire()
+    overloaded = False
+    try:
+        if on_admitted is not None:
+            on_admitted()
+        return fn()
+    except Exception as e:
+        overloaded = is_overload_error(e)
+        if overloaded:
+            increment_counter(f"rate_limit.{api}.overloaded")
+        raise
+    finally:
+        limiter.release(overloaded)
+
+def concurrency_status():
+    """Estado de los límites de concurrencia de este proceso, para diagnóstico"""
+    with concurrency_lock:
+        limiters = dict(concurrency_limiters)
+    return {name: limiter.to_dict() for name, limiter in limiters.items()}
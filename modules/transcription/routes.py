@@ -1,9 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 import os
-from modules.transcription.services import process_audio_file, generate_meeting_minutes, generate_requirements
-from modules.transcription.models import Transcription, db
+import time
+from modules.transcription.services import save_uploaded_file, generate_meeting_minutes, generate_requirements, stream_document, document_router
+from modules.transcription.models import Transcription, TranscriptionJob, TranscriptionSegment, db
+from modules.transcription.jobs import create_job, submit_job, count_active_jobs
+from modules.transcription.rate_limit import concurrency_status
+from modules.transcription.engines import get_engine, ENGINE_LABELS
+from modules.transcription.live import sock, live_available, LiveSession, ConnectionClosed
 import re
+import json
 
 transcription_bp = Blueprint('transcription', __name__, url_prefix='/transcription')
 
@@ -14,59 +20,237 @@ def upload_audio():
     if "file" not in request.files:
         flash("No se encontró ningún archivo en la solicitud")
         return redirect(url_for("index"))
-
+    
     file = request.files["file"]
     if file.filename == "":
         flash("No se seleccionó ningún archivo")
         return redirect(url_for("index"))
-
+    
     # Verificar la extensión del archivo
     allowed_extensions = {'mp3', 'wav', 'm4a', 'ogg', 'mp4'}
     if not '.' in file.filename or file.filename.rsplit('.', 1)[1].lower() not in allowed_extensions:
         flash("Formato de archivo no soportado. Por favor, sube un archivo MP3, WAV, M4A, OGG o MP4.")
         return redirect(url_for("index"))
-
-    # Verificar si tenemos la clave API configurada
-    if not current_app.config['OPENAI_API_KEY']:
-        flash("No se ha configurado la clave de API de OpenAI. Por favor, configúrala primero.")
-        return redirect(url_for("api_settings"))
+    
+    # Motor elegido en el formulario (si no, el configurado por defecto)
+    engine_name = request.form.get("engine") or None
+    if engine_name is not None and engine_name not in ENGINE_LABELS:
+        flash("Motor de transcripción no válido.")
+        return redirect(url_for("index"))
+    
+    # Verificar si tenemos la clave API configurada (o el motor local instalado)
+    engine = get_engine(engine_name)
+    if not engine.is_available():
+        if engine.name == "openai":
+            flash("No se ha configurado la clave de API de OpenAI. Por favor, configúrala primero.")
+            return redirect(url_for("api_settings"))
+        flash("El motor de transcripción local no está disponible en este servidor.")
+        return redirect(url_for("index"))
     
     # Verificar si el usuario puede realizar más transcripciones gratuitas
+    # (los trabajos que aún están en cola también cuentan)
     free_limit = current_app.config['FREE_TRANSCRIPTIONS_LIMIT']
-    if not current_user.can_transcribe(free_limit):
+    if not current_user.can_transcribe(free_limit - count_active_jobs(current_user.id)):
         flash(f"Has alcanzado el límite de {free_limit} transcripciones gratuitas. Por favor, actualiza a un plan de pago.")
         return redirect(url_for("index"))
-
-    # Procesar el archivo
+    
+    # Guardar el archivo y encolar la transcripción en segundo plano
     try:
-        result = process_audio_file(file, current_user.id)
-        
-        # Guardar la transcripción en la base de datos
-        transcription = Transcription(
-            user_id=current_user.id,
-            original_filename=result["original_filename"],
-            file_path=result["file_path"],
-            transcript_path=result["transcript_path"],
-            transcript_text=result["transcription_text"],
-            processing_time=result["processing_time"]
-        )
-        db.session.add(transcription)
-        db.session.commit()
-        
-        # Mostrar los resultados
-        return render_template(
-            "result.html", 
-            transcription=result["transcription_text"],
-            filename=result["original_filename"],
-            processing_time=result["processing_time"],
-            transcript_path=result["transcript_path"],
-            transcription_id=transcription.id  # Añadir el ID directamente
+        file_info = save_uploaded_file(file, current_user.id)
+        job = create_job(
+            file_info,
+            current_user.id,
+            pipeline_acta=request.form.get("pipeline_acta") == "on",
+            engine=engine_name
         )
+        submit_job(job.id)
     
     except Exception as e:
         current_app.logger.error(f"Error al procesar el archivo: {str(e)}")
         flash(f"Error al procesar el archivo: {str(e)}")
         return redirect(url_for("index"))
+    
+    # Los clientes que piden JSON reciben el ID del trabajo; el navegador va a la página de resultado
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status_url": url_for("transcription.job_status", job_id=job.id)
+        }), 202
+    
+    return redirect(url_for("transcription.job_result", job_id=job.id))
+
+@transcription_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Devuelve el estado y el progreso de un trabajo de transcripción"""
+    job = TranscriptionJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    
+    if not job:
+        return jsonify({"success": False, "error": "Trabajo no encontrado"}), 404
+    
+    response = job.to_dict()
+    response["success"] = True
+    if job.status == TranscriptionJob.COMPLETED:
+        response["result_url"] = url_for("transcription.job_result", job_id=job.id)
+    return jsonify(response)
+
+@transcription_bp.route('/jobs/<int:job_id>/stream')
+@login_required
+def stream_job(job_id):
+    """
+    Envía por SSE el texto de cada segmento de un trabajo en cuanto se
+    transcribe (evento segment), su progreso (progress) y, al terminar,
+    done con la URL del resultado o failure con el error. El trabajo puede
+    procesarse en otro proceso, así que el estado se lee de la base de datos.
+    
+    Cada conexión ocupa un hilo del worker, así que se cierra tras
+    TRANSCRIPTION_STREAM_MAX_SECONDS. EventSource reconecta solo y envía en
+    Last-Event-ID el id del último segmento recibido, desde el que se sigue.
+    """
+    job = TranscriptionJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"success": False, "error": "Trabajo no encontrado"}), 404
+    
+    poll_seconds = current_app.config.get('TRANSCRIPTION_STREAM_POLL_SECONDS', 1)
+    max_seconds = current_app.config.get('TRANSCRIPTION_STREAM_MAX_SECONDS', 60)
+    try:
+        resume_from = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        resume_from = 0
+    
+    def events():
+        last_segment_id = resume_from
+        last_progress = None
+        deadline = time.monotonic() + max_seconds
+        while True:
+            # Terminar la transacción para ver lo que han guardado otros procesos
+            db.session.commit()
+            current = db.session.get(TranscriptionJob, job_id, populate_existing=True)
+            
+            segments = TranscriptionSegment.query.filter(
+                TranscriptionSegment.job_id == job_id,
+                TranscriptionSegment.id > last_segment_id
+            ).order_by(TranscriptionSegment.id).all()
+            for segment in segments:
+                last_segment_id = segment.id
+                yield sse_event("segment", segment.to_dict(), event_id=segment.id)
+            
+            progress = (current.status, current.completed_segments, current.total_segments)
+            if progress != last_progress:
+                last_progress = progress
+                yield sse_event("progress", current.to_dict())
+            
+            if current.status == TranscriptionJob.COMPLETED:
+                yield sse_event("done", {"result_url": url_for("transcription.job_result", job_id=job_id)})
+                return
+            if current.status == TranscriptionJob.FAILED:
+                yield sse_event("failure", {"error": current.error})
+                return
+            if time.monotonic() >= deadline:
+                # Liberar el hilo; el navegador vuelve a conectar
+                return
+            time.sleep(poll_seconds)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@transcription_bp.route('/jobs/<int:job_id>/result')
+@login_required
+def job_result(job_id):
+    """Muestra el resultado de un trabajo, o su progreso si aún no ha terminado"""
+    job = TranscriptionJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    
+    if not job:
+        flash("No se encontró el trabajo solicitado o no tienes permisos para acceder a él.")
+        return redirect(url_for("index"))
+    
+    if job.status != TranscriptionJob.COMPLETED:
+        segments = TranscriptionSegment.query.filter_by(job_id=job.id).order_by(TranscriptionSegment.index).all()
+        return render_template("result.html", job=job, filename=job.original_filename, segments=segments)
+    
+    transcription = db.session.get(Transcription, job.transcription_id)
+    return render_template(
+        "result.html",
+        job=job,
+        transcription=transcription.transcript_text,
+        filename=transcription.original_filename,
+        processing_time=transcription.processing_time,
+        transcript_path=transcription.transcript_path,
+        transcription_id=transcription.id
+    )
+
+@transcription_bp.route('/live')
+@login_required
+def live():
+    """Página de transcripción en directo desde el micrófono"""
+    if not live_available():
+        flash("La transcripción en directo no está disponible en este servidor.")
+        return redirect(url_for("index"))
+    return render_template("transcription/live.html")
+
+if sock is not None:
+    @sock.route('/live/ws', bp=transcription_bp)
+    def live_socket(ws):
+        """
+        WebSocket de la transcripción en directo.
+        
+        El navegador envía el audio (PCM de 16 bits, mono, 16 kHz) en mensajes
+        binarios y el texto "stop" al terminar. El servidor responde con
+        mensajes JSON: partial con el texto de cada segmento según se
+        transcribe, y final con la transcripción guardada. Si la conexión se
+        corta, lo transcrito hasta entonces se guarda igualmente.
+        """
+        if not current_user.is_authenticated:
+            ws.send(json.dumps({"type": "error", "error": "No autorizado"}))
+            return
+        
+        free_limit = current_app.config['FREE_TRANSCRIPTIONS_LIMIT']
+        if not current_user.can_transcribe(free_limit - count_active_jobs(current_user.id)):
+            ws.send(json.dumps({"type": "error", "error": f"Has alcanzado el límite de {free_limit} transcripciones gratuitas."}))
+            return
+        
+        def send_partial(index, text):
+            try:
+                ws.send(json.dumps({"type": "partial", "index": index, "text": text}))
+            except ConnectionClosed:
+                pass
+        
+        session = LiveSession(current_app._get_current_object(), current_user.id, send_partial)
+        connected = True
+        try:
+            ws.send(json.dumps({"type": "ready"}))
+            while True:
+                message = ws.receive()
+                if isinstance(message, str):
+                    if message == "stop":
+                        break
+                    continue
+                session.add_audio(message)
+                if session.full:
+                    ws.send(json.dumps({"type": "limit", "error": "Se ha alcanzado la duración máxima de la sesión"}))
+                    break
+        except ConnectionClosed:
+            connected = False
+        except Exception as e:
+            session.abort()
+            current_app.logger.error(f"Error en la transcripción en directo: {str(e)}")
+            try:
+                ws.send(json.dumps({"type": "error", "error": str(e)}))
+            except ConnectionClosed:
+                pass
+            return
+        
+        job = session.finish()
+        if connected:
+            ws.send(json.dumps({
+                "type": "final",
+                "job_id": job.id if job else None,
+                "result_url": url_for("transcription.job_result", job_id=job.id) if job else None
+            }))
 
 @transcription_bp.route('/download/<filename>')
 @login_required
@@ -88,7 +272,7 @@ def download_transcript(filename):
         if not os.path.exists(file_path):
             flash("El archivo de transcripción no se encuentra en el servidor.")
             return redirect(url_for("index"))
-            
+        
         # En Python 3.11, send_file puede requerir parámetros adicionales
         return send_file(
             file_path, 
@@ -129,7 +313,8 @@ def generate_document():
             "success": result.get("success", False),
             "content": result.get("acta") or result.get("requirements_doc") or "",
             "provider": result.get("provider", "Desconocido"),
-            "error": result.get("error", "")
+            "error": result.get("error", ""),
+            "cached": result.get("cached", False)
         }
         
         return jsonify(response)
@@ -138,6 +323,66 @@ def generate_document():
         current_app.logger.error(f"Error al generar el documento: {str(e)}")
         return jsonify({"success": False, "error": str(e), "provider": "Error en generación"})
 
+@transcription_bp.route('/providers/status')
+@login_required
+def providers_status():
+    """Estado de los proveedores de IA en este proceso (latencia, errores, circuito, concurrencia)"""
+    if not current_user.is_admin:
+        return jsonify({"success": False, "error": "No autorizado"}), 403
+    return jsonify({
+        "success": True,
+        "providers": document_router.status(),
+        "concurrency": concurrency_status()
+    })
+
+def sse_event(event, data, event_id=None):
+    """Formatea un evento server-sent events con datos JSON"""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message
+
+@transcription_bp.route('/transcriptions/<int:transcription_id>/generate-document/stream')
+@login_required
+def stream_generate_document(transcription_id):
+    """
+    Genera el documento de una transcripción enviando el texto por SSE a
+    medida que lo produce el modelo. Al terminar, el documento se guarda en
+    la transcripción igual que con /save-acta.
+    """
+    transcription = Transcription.query.filter_by(id=transcription_id, user_id=current_user.id).first()
+    if not transcription:
+        return jsonify({"success": False, "error": "Transcripción no encontrada"}), 404
+    
+    document_type = request.args.get("document_type", "acta")
+    if document_type not in ("acta", "requirements"):
+        document_type = "acta"
+    
+    def events():
+        try:
+            for event, data in stream_document(transcription.transcript_text, document_type):
+                if event == "delta":
+                    yield sse_event(None, {"delta": data})
+                elif event == "provider":
+                    yield sse_event("provider", {"provider": data})
+                elif event == "done":
+                    transcription.acta_text = data["content"]
+                    transcription.document_type = document_type
+                    db.session.commit()
+                    current_app.logger.info(f"Documento tipo {document_type} generado y guardado para transcripción ID {transcription_id}")
+                    yield sse_event("done", {"provider": data["provider"], "cached": data["cached"]})
+        except Exception as e:
+            current_app.logger.error(f"Error al generar el documento en streaming: {str(e)}")
+            yield sse_event("failure", {"error": str(e)})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @transcription_bp.route('/save-acta', methods=["POST"])
 @login_required
 def save_acta():
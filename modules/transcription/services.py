@@ -1,110 +1,541 @@
 import os
 import time
+import uuid
+import shutil
+import hashlib
 import datetime
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import current_app
 from werkzeug.utils import secure_filename
-from modules.utils.audio_processing import split_audio_file, combine_transcriptions, get_file_size
-from modules.transcription.google_ai_service import generate_meeting_minutes_with_google
+from modules.utils.audio_processing import (
+    split_audio_to_limit, combine_transcriptions, get_file_size, get_file_duration,
+    extract_audio_stream, transcode_for_speech
+)
+from modules.transcription.google_ai_service import (
+    google_document_generators, stream_document_with_google,
+    GEMINI_MODEL, GOOGLE_PROMPT_VERSIONS, GEMINI_CONTEXT_TOKENS, GEMINI_OUTPUT_TOKENS
+)
+from modules.transcription.chunking import map_reduce_document, condense_transcription
+from modules.transcription.speculative import wait_for_speculative
+from modules.transcription.providers import DocumentProvider, ProviderRouter
+from modules.transcription.hedging import hedged_call, latency_tracker
+from modules.transcription.rate_limit import limited_call, retry_delay
+from modules.transcription.clients import get_openai_client
+from modules.transcription.engines import get_engine, WHISPER_MODEL, TRANSCRIPTION_LANGUAGE
+from modules.transcription.cache import (
+    get_cached_transcription, store_cached_transcription,
+    get_cached_document, store_cached_document, hash_text
+)
 
-# Cliente de OpenAI
-client = None
+# Tamaño de los bloques al guardar los archivos subidos
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Modelo de OpenAI para generar documentos
+OPENAI_CHAT_MODEL = "gpt-4-turbo-preview"
+
+# Ventana de contexto de OPENAI_CHAT_MODEL y tokens máximos de la respuesta
+OPENAI_CHAT_CONTEXT_TOKENS = 128000
+OPENAI_CHAT_OUTPUT_TOKENS = 4096
+
+# Versión de cada prompt de OpenAI: incrementarla al modificar el prompt
+# invalida en la caché solo los documentos de ese tipo generados con OpenAI
+OPENAI_PROMPT_VERSIONS = {
+    "acta": 2,
+    "requirements": 2
+}
+
+# Campo del resultado en el que cada generador devuelve el documento
+DOCUMENT_RESULT_KEYS = {
+    "acta": "acta",
+    "requirements": "requirements_doc"
+}
 
 def initialize_openai_client():
-    """Inicializa el cliente de OpenAI con la clave API configurada"""
-    global client
-    api_key = current_app.config['OPENAI_API_KEY']
+    """
+    Devuelve el cliente de OpenAI para la clave API configurada (None si no
+    hay clave). El cliente y su pool de conexiones se comparten entre
+    peticiones y se vuelven a crear si cambia la clave.
+    """
+    return get_openai_client()
+
+def request_transcription(client, segment_path, audio_minutes, on_admitted=None):
+    """
+    Una única llamada a la API de transcripción, respetando los límites de
+    peticiones y de minutos de audio por minuto y registrando su latencia.
+    on_admitted se llama cuando la petición supera esos límites y sale.
+    """
+    def request():
+        start_time = time.monotonic()
+        with open(segment_path, "rb") as audio_file:
+            transcription = client.audio.transcriptions.create(
+                model=WHISPER_MODEL,
+                file=audio_file,
+                language=TRANSCRIPTION_LANGUAGE
+            )
+        latency_tracker.record(time.monotonic() - start_time, os.path.getsize(segment_path))
+        return transcription.text
+    
+    return limited_call("whisper", request, [
+        ("whisper.requests", 1, current_app.config.get('WHISPER_REQUESTS_PER_MINUTE', 0)),
+        ("whisper.audio_minutes", audio_minutes, current_app.config.get('WHISPER_AUDIO_MINUTES_PER_MINUTE', 0))
+    ], on_admitted=on_admitted)
+
+def transcribe_segment(client, segment_path, max_retries=3):
+    """
+    Transcribe un segmento de audio, reintentando si la llamada a la API falla.
+    
+    Si TRANSCRIPTION_HEDGE_ENABLED está activado y la llamada tarda más que
+    el percentil configurado de las recientes, se envía una petición
+    duplicada y se usa la primera que responda (ver hedging.hedged_call).
+    
+    Los reintentos esperan un tiempo aleatorio creciente (o el Retry-After
+    de la API) para no saturarla de nuevo a la vez desde varios procesos.
+    """
+    audio_minutes = 0
+    if current_app.config.get('WHISPER_AUDIO_MINUTES_PER_MINUTE', 0):
+        audio_minutes = get_file_duration(segment_path) / 60
+    
+    def request(on_admitted=None):
+        return request_transcription(client, segment_path, audio_minutes, on_admitted)
+    
+    for attempt in range(max_retries + 1):
+        try:
+            return hedged_call(request, request, os.path.getsize(segment_path))
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            wait_seconds = retry_delay(attempt, e)
+            current_app.logger.warning(
+                f"Error al transcribir {os.path.basename(segment_path)} "
+                f"(intento {attempt + 1}/{max_retries + 1}): {str(e)}. Reintentando en {wait_seconds:.1f}s..."
+            )
+            time.sleep(wait_seconds)
+
+def transcribe_segments(client, segment_paths, progress_callback=None, segment_callback=None, completed_texts=None):
+    """
+    Transcribe varios segmentos en paralelo con un número limitado de hilos.
+    
+    Los resultados se devuelven en el mismo orden que los segmentos y cada
+    segmento se reintenta de forma independiente si falla. Si se indica
+    progress_callback, se llama con (completados, total) desde el hilo que
+    invoca esta función cada vez que termina un segmento; segment_callback
+    recibe (índice, total, texto) de cada segmento según va terminando.
+    completed_texts (índice -> texto) son los segmentos ya transcritos en
+    un intento anterior, que no se vuelven a enviar a la API.
+    """
+    app = current_app._get_current_object()
+    completed_texts = completed_texts or {}
+    pending = [i for i in range(len(segment_paths)) if i not in completed_texts]
+    max_workers = max(1, min(app.config.get('TRANSCRIPTION_MAX_WORKERS', 4), len(pending)))
+    max_retries = app.config.get('TRANSCRIPTION_SEGMENT_RETRIES', 3)
+    
+    def worker(index, segment_path):
+        # Cada hilo necesita su propio contexto de aplicación
+        with app.app_context():
+            current_app.logger.info(f"Transcribiendo segmento {index + 1}/{len(segment_paths)}")
+            return transcribe_segment(client, segment_path, max_retries)
+    
+    segment_transcriptions = [completed_texts.get(i) for i in range(len(segment_paths))]
+    if segment_callback:
+        for index in sorted(completed_texts):
+            segment_callback(index, len(segment_paths), completed_texts[index])
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(worker, i, segment_paths[i]): i
+            for i in pending
+        }
+        try:
+            for completed, future in enumerate(as_completed(futures), start=len(completed_texts) + 1):
+                index = futures[future]
+                segment_transcriptions[index] = future.result()
+                if segment_callback:
+                    segment_callback(index, len(segment_paths), segment_transcriptions[index])
+                
+                # Eliminar el archivo del segmento una vez entregado su texto
+                os.remove(segment_paths[index])
+                if progress_callback:
+                    progress_callback(completed, len(segment_paths))
+        except BaseException:
+            # Si un segmento falla definitivamente el archivo no se va a
+            # completar: no enviar a la API los segmentos que aún esperan
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    return segment_transcriptions
+
+def prepare_audio(file_path, temp_folder):
+    """
+    Prepara el audio antes de transcribirlo: recodifica a un formato
+    compacto para voz si está activado, o al menos descarta el video.
+    
+    Returns:
+        Ruta al audio que se debe enviar a la API
+    """
+    if current_app.config.get('TRANSCRIPTION_NORMALIZE_AUDIO'):
+        try:
+            speech_path = transcode_for_speech(
+                file_path,
+                output_folder=temp_folder,
+                audio_format=current_app.config.get('TRANSCRIPTION_NORMALIZE_FORMAT', 'opus'),
+                bitrate=current_app.config.get('TRANSCRIPTION_NORMALIZE_BITRATE', '24k')
+            )
+            # Solo compensa si el resultado es más pequeño que el original
+            if get_file_size(speech_path) < get_file_size(file_path):
+                return speech_path
+            os.remove(speech_path)
+        except Exception as e:
+            current_app.logger.warning(f"No se pudo recodificar el audio, se usa el original: {str(e)}")
+    
+    # Quedarse solo con el audio de los videos antes de decidir si hay que dividir
+    return extract_audio_stream(file_path, output_folder=temp_folder)
+
+def remove_silence_from_audio(audio_path, temp_folder, stats):
+    """
+    Elimina los tramos sin voz antes de transcribir para no pagar ni procesar
+    silencio. Guarda en stats los segundos eliminados y la tabla de offsets
+    para poder llevar cualquier instante al audio original.
+    
+    Returns:
+        Ruta al audio filtrado, o audio_path si no se ha eliminado nada
+    """
+    from modules.utils.vad import remove_silence
+    
+    try:
+        result = remove_silence(
+            audio_path,
+            output_folder=temp_folder,
+            min_silence=current_app.config.get('TRANSCRIPTION_VAD_MIN_SILENCE_SECONDS', 1.0),
+            keep_silence=current_app.config.get('TRANSCRIPTION_VAD_KEEP_SILENCE_SECONDS', 0.3),
+            audio_format=current_app.config.get('TRANSCRIPTION_NORMALIZE_FORMAT', 'opus'),
+            bitrate=current_app.config.get('TRANSCRIPTION_NORMALIZE_BITRATE', '24k')
+        )
+    except Exception as e:
+        current_app.logger.warning(f"No se pudieron eliminar los silencios, se usa el audio completo: {str(e)}")
+        return audio_path
     
-    if client is None and api_key:
-        client = OpenAI(api_key=api_key)
-        current_app.logger.info("Cliente OpenAI inicializado correctamente")
+    stats["silence_removed"] = round(result["dropped_seconds"], 2)
+    stats["offset_map"] = result["offset_map"]
+    current_app.logger.info(
+        f"Eliminados {result['dropped_seconds']:.1f} s de silencio "
+        f"de {result['original_duration']:.1f} s de audio"
+    )
+    return result["path"]
+
+def transcribe_audio(file_path, stats=None, progress_callback=None, audio_hash=None, segment_callback=None, engine=None, tier=None,
+                     checkpoint=None):
+    """
+    Transcribe un archivo de audio con el motor indicado ('openai' o 'local';
+    por defecto, TRANSCRIPTION_ENGINE) y, en el motor local, con el modelo
+    tier (ver tiering.py).
     
-    return client
+    Si se pasa un diccionario en stats, se rellena con el tamaño original
+    del archivo, el tamaño del audio realmente enviado a la API y, si se
+    eliminan silencios, los segundos quitados y la tabla de offsets.
+    progress_callback recibe (segmentos completados, total de segmentos) y
+    segment_callback (índice, total, texto) de cada segmento transcrito.
+    Si se indica audio_hash (SHA-256 del archivo), se reutiliza la
+    transcripción de una subida anterior del mismo audio con el mismo motor.
+    Con checkpoint (JobCheckpoint del trabajo), un archivo dividido en
+    segmentos se puede retomar sin repetir los ya transcritos.
+    """
+    if stats is None:
+        stats = {}
+    engine = get_engine(engine, tier)
+    
+    if audio_hash:
+        cached_text = get_cached_transcription(audio_hash, engine.name, TRANSCRIPTION_LANGUAGE, engine.model_name)
+        if cached_text is not None:
+            stats["original_size"] = get_file_size(file_path)
+            stats["cache_hit"] = True
+            if segment_callback:
+                segment_callback(0, 1, cached_text)
+            if progress_callback:
+                progress_callback(1, 1)
+            return cached_text
+    
+    text = engine.transcribe(file_path, stats, progress_callback, segment_callback, checkpoint)
+    
+    if audio_hash:
+        store_cached_transcription(audio_hash, engine.name, TRANSCRIPTION_LANGUAGE, engine.model_name, text)
+    return text
 
-def transcribe_audio(file_path):
-    """Transcribe un archivo de audio usando la API de OpenAI"""
+def transcribe_audio_file(file_path, stats, progress_callback=None, segment_callback=None, checkpoint=None):
+    """
+    Prepara, divide si es necesario y transcribe un archivo con la API de OpenAI.
+    
+    Con checkpoint, los segmentos y su plan se conservan hasta terminar: si
+    el proceso muere a mitad del archivo, el siguiente intento retoma el
+    plan guardado y solo transcribe los segmentos que faltan.
+    """
     client = initialize_openai_client()
     if not client:
         raise ValueError("No se ha configurado la clave de API de OpenAI")
     
-    # Verificar el tamaño del archivo
-    file_size_bytes = get_file_size(file_path)
-    max_size_bytes = 25 * 1024 * 1024  # 25 MB en bytes
+    if checkpoint:
+        plan = checkpoint.load_plan()
+        if plan:
+            stats.update(plan["stats"])
+            return transcribe_planned_segments(client, plan["segments"], checkpoint, progress_callback, segment_callback)
+        # Carpeta del trabajo, vacía de cualquier intento anterior
+        temp_folder = checkpoint.folder
+        checkpoint.reset()
+    else:
+        # Crear carpeta temporal (una por archivo para no mezclar peticiones concurrentes)
+        temp_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "temp_segments", uuid.uuid4().hex)
+        os.makedirs(temp_folder, exist_ok=True)
     
-    if file_size_bytes > max_size_bytes:
-        current_app.logger.info(f"Archivo grande ({file_size_bytes/1024/1024:.2f} MB) detectado, dividiendo en segmentos...")
+    keep_segments = False
+    try:
+        stats["original_size"] = get_file_size(file_path)
+        audio_path = prepare_audio(file_path, temp_folder)
+        if current_app.config.get('TRANSCRIPTION_VAD_FILTER'):
+            audio_path = remove_silence_from_audio(audio_path, temp_folder, stats)
         
-        # Crear carpeta temporal para segmentos
-        temp_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "temp_segments")
-        os.makedirs(temp_folder, exist_ok=True)
+        # Verificar el tamaño del archivo
+        file_size_bytes = get_file_size(audio_path)
+        stats["processed_size"] = file_size_bytes
+        if audio_path != file_path:
+            current_app.logger.info(
+                f"Audio preparado para transcripción: {stats['original_size']/1024/1024:.2f} MB -> "
+                f"{file_size_bytes/1024/1024:.2f} MB"
+            )
+        max_size_bytes = current_app.config.get('WHISPER_MAX_FILE_MB', 25) * 1024 * 1024
         
-        try:
-            # Dividir el archivo en segmentos de máximo 10 MB para tener margen
-            segment_paths = split_audio_file(file_path, max_size_mb=10, output_folder=temp_folder)
+        if file_size_bytes > max_size_bytes:
+            current_app.logger.info(f"Archivo grande ({file_size_bytes/1024/1024:.2f} MB) detectado, dividiendo en segmentos...")
+            
+            # Dividir en el menor número de segmentos que quepan bajo el límite de la API
+            segments = split_audio_to_limit(
+                audio_path,
+                max_size_bytes,
+                output_folder=temp_folder,
+                safety_margin=current_app.config.get('TRANSCRIPTION_SEGMENT_SAFETY_MARGIN', 0.9),
+                split_on_silence=current_app.config.get('TRANSCRIPTION_SPLIT_ON_SILENCE', False),
+                overlap=current_app.config.get('TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS', 0)
+            )
+            segment_paths = [segment["path"] for segment in segments]
             current_app.logger.info(f"Archivo dividido en {len(segment_paths)} segmentos")
             
-            # Transcribir cada segmento
-            segment_transcriptions = []
-            for i, segment_path in enumerate(segment_paths):
-                current_app.logger.info(f"Transcribiendo segmento {i+1}/{len(segment_paths)}")
-                
-                with open(segment_path, "rb") as audio_file:
-                    transcription = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        language="es"
-                    )
-                segment_transcriptions.append(transcription.text)
-                
-                # Eliminar el archivo del segmento después de procesarlo
-                os.remove(segment_path)
+            if checkpoint:
+                # Los segmentos pendientes se quedan en la carpeta del trabajo
+                # hasta terminar (ver transcribe_planned_segments)
+                checkpoint.save_plan(segments, stats)
+                keep_segments = True
+                return transcribe_planned_segments(client, segments, checkpoint, progress_callback, segment_callback)
             
-            # Combinar todas las transcripciones
-            full_transcription = combine_transcriptions(segment_transcriptions)
+            # Transcribir los segmentos en paralelo, conservando el orden
+            if progress_callback:
+                progress_callback(0, len(segment_paths))
+            segment_transcriptions = transcribe_segments(client, segment_paths, progress_callback, segment_callback)
+            
+            # Combinar todas las transcripciones, quitando el texto repetido en los solapamientos
+            overlap = max(segment.get("overlap", 0) for segment in segments)
+            full_transcription = combine_transcriptions(segment_transcriptions, overlap=overlap)
             return full_transcription
         
-        finally:
-            # Limpiar cualquier archivo temporal restante y eliminar carpeta temporal
-            if os.path.exists(temp_folder):
-                for file in os.listdir(temp_folder):
-                    try:
-                        os.remove(os.path.join(temp_folder, file))
-                    except:
-                        pass
+        # Proceso normal para archivos pequeños
+        if progress_callback:
+            progress_callback(0, 1)
+        text = transcribe_segment(client, audio_path, current_app.config.get('TRANSCRIPTION_SEGMENT_RETRIES', 3))
+        if segment_callback:
+            segment_callback(0, 1, text)
+        if progress_callback:
+            progress_callback(1, 1)
+        return text
+    
+    finally:
+        # Limpiar cualquier archivo temporal restante y eliminar carpeta temporal
+        if not keep_segments and os.path.exists(temp_folder):
+            for file in os.listdir(temp_folder):
                 try:
-                    os.rmdir(temp_folder)
+                    os.remove(os.path.join(temp_folder, file))
                 except:
                     pass
-    
-    # Proceso normal para archivos pequeños
-    with open(file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            language="es"
+            try:
+                os.rmdir(temp_folder)
+            except:
+                pass
+
+def transcribe_planned_segments(client, segments, checkpoint, progress_callback=None, segment_callback=None):
+    """
+    Transcribe los segmentos de un plan guardado que aún no tienen texto y
+    combina el resultado. La carpeta de los segmentos solo se elimina al
+    terminar: si el proceso muere antes, los pendientes siguen disponibles.
+    """
+    completed_texts = checkpoint.completed_texts()
+    if completed_texts:
+        current_app.logger.info(
+            f"Retomando la transcripción: {len(completed_texts)} de {len(segments)} segmentos ya transcritos"
         )
     
-    return transcription.text
+    if progress_callback:
+        progress_callback(len(completed_texts), len(segments))
+    segment_transcriptions = transcribe_segments(
+        client,
+        [segment["path"] for segment in segments],
+        progress_callback,
+        segment_callback,
+        completed_texts
+    )
+    shutil.rmtree(checkpoint.folder, ignore_errors=True)
+    
+    # Combinar todas las transcripciones, quitando el texto repetido en los solapamientos
+    overlap = max(segment.get("overlap", 0) for segment in segments)
+    return combine_transcriptions(segment_transcriptions, overlap=overlap)
 
-def generate_meeting_minutes(transcription):
-    """Genera un acta de reunión basada en la transcripción"""
+def get_document_provider():
+    """
+    Proveedor preferido ahora mismo para generar documentos (el más rápido
+    de los que están configurados y sanos).
+    """
+    provider = document_router.best()
+    if provider is None:
+        raise ValueError("No se ha configurado ninguna clave de API para generar documentos")
+    return provider
+
+def cached_document_keys(document_type):
+    """Claves de caché (proveedor, modelo, versión del prompt) de los proveedores configurados"""
+    return [
+        (provider.name, provider.model, provider.prompt_versions[document_type])
+        for provider in document_router.configured()
+    ]
+
+def generate_document(transcription, document_type, source="request"):
+    """
+    Genera un documento (acta o requerimientos) a partir de la transcripción.
+    
+    El documento se pide al proveedor más rápido de los que están sanos y,
+    si falla, al siguiente. El resultado se guarda en la caché de documentos
+    con la clave (hash de la transcripción, tipo, proveedor, modelo, versión
+    del prompt), de modo que volver a pedir el mismo documento no repite la
+    llamada al modelo. Si ese documento se está pregenerando en segundo
+    plano, se espera a que termine en lugar de generarlo otra vez.
+    """
+    result_key = DOCUMENT_RESULT_KEYS[document_type]
+    transcript_hash = hash_text(transcription)
+    
+    if source != "speculative":
+        wait_for_speculative(transcript_hash, document_type)
+    
+    cached = get_cached_document(transcript_hash, document_type, cached_document_keys(document_type))
+    if cached is not None:
+        return {"success": True, result_key: cached.content, "provider": cached.provider_label, "cached": True}
+    
+    def generate(provider):
+        current_app.logger.info(f"Generando {document_type} con {provider.label}")
+        complete, extract = provider.generators(document_type)
+        return map_reduce_document(transcription, document_type, complete, extract, provider.input_tokens())
+    
     try:
-        # Intentar con Google AI primero si está configurado
-        if current_app.config.get('GOOGLE_AI_API_KEY'):
-            current_app.logger.info("Generando acta con Google AI (Gemini)")
-            return generate_meeting_minutes_with_google(transcription)
+        provider, content = document_router.call(generate)
+    except Exception as e:
+        current_app.logger.error(f"Error al generar el documento: {str(e)}")
+        return {"success": False, "error": str(e), "provider": "Error en generación"}
+    
+    current_app.logger.info(f"Documento '{document_type}' generado exitosamente con {provider.label}")
+    store_cached_document(
+        transcript_hash, document_type, provider.name, provider.model, provider.prompt_versions[document_type],
+        content, provider.label, source=source
+    )
+    return {"success": True, result_key: content, "provider": provider.label}
+
+def stream_document(transcription, document_type):
+    """
+    Versión en streaming de generate_document.
+    
+    Si un proveedor falla antes de enviar el primer fragmento se pasa al
+    siguiente; si falla a mitad de la respuesta, el error se propaga.
+    
+    Yields:
+        Tuplas (evento, datos): ("provider", nombre del proveedor), ("delta",
+        fragmento de texto) por cada trozo generado y, al terminar, ("done",
+        diccionario con content, provider y cached)
+    """
+    transcript_hash = hash_text(transcription)
+    
+    wait_for_speculative(transcript_hash, document_type)
+    cached = get_cached_document(transcript_hash, document_type, cached_document_keys(document_type))
+    if cached is not None:
+        yield "provider", cached.provider_label
+        yield "delta", cached.content
+        yield "done", {"content": cached.content, "provider": cached.provider_label, "cached": True}
+        return
+    
+    last_error = None
+    for provider in document_router.candidates():
+        current_app.logger.info(f"Generando {document_type} en streaming con {provider.label}")
+        start_time = time.monotonic()
+        chunks = provider.stream(transcription, document_type, provider.input_tokens())
+        try:
+            parts = [next(chunks, "")]
+        except Exception as e:
+            document_router.record_failure(provider, e)
+            last_error = e
+            continue
         
-        # Si no está configurado Google AI, usar OpenAI como fallback
-        current_app.logger.info("Generando acta con OpenAI (GPT)")
-        client = initialize_openai_client()
-        if not client:
-            return {"success": False, "error": "No se pudo inicializar el cliente de OpenAI", "provider": "OpenAI"}
+        recorded = False
+        try:
+            yield "provider", provider.label
+            if parts[0]:
+                yield "delta", parts[0]
+            try:
+                for chunk in chunks:
+                    parts.append(chunk)
+                    yield "delta", chunk
+            except Exception as e:
+                recorded = True
+                document_router.record_failure(provider, e)
+                raise
+            recorded = True
+            document_router.record_success(provider, time.monotonic() - start_time)
+        finally:
+            # Si el cliente se desconecta (GeneratorExit) no hay resultado
+            # que registrar, pero la petición de prueba debe quedar libre
+            if not recorded:
+                document_router.release(provider)
+                chunks.close()
         
-        # Crear el prompt para la API
-        system_message = "Eres un asistente especializado en crear actas de reunión."
-        user_message = f"""
-        Por favor, convierte la siguiente transcripción en un acta de reunión formal. 
+        content = "".join(parts)
+        store_cached_document(
+            transcript_hash, document_type, provider.name, provider.model, provider.prompt_versions[document_type],
+            content, provider.label
+        )
+        yield "done", {"content": content, "provider": provider.label, "cached": False}
+        return
+    
+    raise last_error or Exception("No hay ningún proveedor de IA configurado y disponible")
+
+def generate_meeting_minutes(transcription):
+    """Genera un acta de reunión basada en la transcripción"""
+    return generate_document(transcription, "acta")
+
+def generate_requirements(transcription):
+    """Genera un documento de requerimientos de software basado en la transcripción"""
+    return generate_document(transcription, "requirements")
 
+def openai_chat(client, system_message, user_message, temperature):
+    """Realiza una petición de chat a OpenAI y devuelve el texto de la respuesta"""
+    def request():
+        return client.chat.completions.create(
+            model=OPENAI_CHAT_MODEL,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": user_message}
+            ],
+            temperature=temperature
+        )
+    
+    response = limited_call("openai_chat", request, [
+        ("openai_chat.requests", 1, current_app.config.get('OPENAI_CHAT_REQUESTS_PER_MINUTE', 0))
+    ])
+    return response.choices[0].message.content
+
+def build_openai_minutes_prompt(transcription):
+    """Prompt de OpenAI para convertir una transcripción en un acta de reunión"""
+    return f"""
+        Por favor, convierte la siguiente transcripción en un acta de reunión formal. 
+        
         Formato esperado:
         1. Título "ACTA DE REUNIÓN"
         2. Fecha y hora (extráelas del contenido si es posible, si no están, usa "No especificado")
@@ -113,51 +544,17 @@ def generate_meeting_minutes(transcription):
         5. Desarrollo (resumen por temas tratados, sin omitir detalles relevantes)
         6. Acuerdos y compromisos (extrae **todos los compromisos concretos**, responsables y fechas si se mencionan)
         7. Conclusión (resumen de lo acordado con énfasis en próximos pasos)
-
+        
         Aquí está la transcripción:
-
+        
         {transcription}
         """
-        
-        # Realizar la solicitud a la API usando el cliente de OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.7
-        )
-        
-        # Obtener la respuesta
-        acta_text = response.choices[0].message.content
-        current_app.logger.info("Acta generada exitosamente con OpenAI (GPT)")
-        return {"success": True, "acta": acta_text, "provider": "OpenAI (GPT-4)"}
-    
-    except Exception as e:
-        current_app.logger.error(f"Error al generar el acta: {str(e)}")
-        return {"success": False, "error": str(e), "provider": "Error en generación"}
 
-def generate_requirements(transcription):
-    """Genera un documento de requerimientos de software basado en la transcripción"""
-    try:
-        # Intentar con Google AI primero si está configurado
-        if current_app.config.get('GOOGLE_AI_API_KEY'):
-            from modules.transcription.google_ai_service import extract_requirements_with_google
-            current_app.logger.info("Generando requerimientos con Google AI (Gemini)")
-            return extract_requirements_with_google(transcription)
-        
-        # Si no está configurado Google AI, usar OpenAI como fallback
-        current_app.logger.info("Generando requerimientos con OpenAI (GPT)")
-        client = initialize_openai_client()
-        if not client:
-            return {"success": False, "error": "No se pudo inicializar el cliente de OpenAI", "provider": "OpenAI"}
-        
-        # Crear el prompt para la API
-        system_message = "Eres un ingeniero de requerimientos experimentado especializado en análisis y documentación de requisitos de software."
-        user_message = f"""
+def build_openai_requirements_prompt(transcription):
+    """Prompt de OpenAI para extraer requerimientos de software de una transcripción"""
+    return f"""
         Actúa como un ingeniero de requerimientos experimentado especializado en análisis y documentación de requisitos de software. Tu tarea es analizar la siguiente transcripción de reunión y extraer todos los requerimientos del sistema mencionados.
-
+        
         INSTRUCCIONES ESPECÍFICAS:
         1. Analiza minuciosamente la transcripción completa, sin omitir ninguna información relevante.
         2. Identifica y categoriza claramente todos los requerimientos mencionados (explícita o implícitamente).
@@ -166,7 +563,7 @@ def generate_requirements(transcription):
         5. Detecta posibles conflictos o ambigüedades entre los requerimientos.
         6. Captura criterios de aceptación cuando se mencionen.
         7. Identifica stakeholders relacionados con cada requerimiento.
-
+        
         FORMATO DEL DOCUMENTO DE REQUERIMIENTOS:
         1. TÍTULO: "DOCUMENTO DE ESPECIFICACIÓN DE REQUERIMIENTOS"
         2. INFORMACIÓN GENERAL:
@@ -207,29 +604,99 @@ def generate_requirements(transcription):
         10. PUNTOS DE AMBIGÜEDAD:
             - Aspectos que requieren clarificación adicional
             - Posibles conflictos entre requerimientos
-
+        
         TRANSCRIPCIÓN:
         {transcription}
         """
-        
-        # Realizar la solicitud a la API usando el cliente de OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.1
-        )
-        
-        # Obtener la respuesta
-        requirements_doc = response.choices[0].message.content
-        current_app.logger.info("Documento de requerimientos generado exitosamente con OpenAI (GPT)")
-        return {"success": True, "requirements_doc": requirements_doc, "provider": "OpenAI (GPT-4)"}
+
+# Mensaje de sistema, prompt y temperatura de cada tipo de documento
+OPENAI_DOCUMENT_PROMPTS = {
+    "acta": (
+        "Eres un asistente especializado en crear actas de reunión.",
+        build_openai_minutes_prompt,
+        0.7
+    ),
+    "requirements": (
+        "Eres un ingeniero de requerimientos experimentado especializado en análisis y documentación de requisitos de software.",
+        build_openai_requirements_prompt,
+        0.1
+    )
+}
+
+def openai_document_generators(document_type):
+    """Funciones (complete, extract) de OpenAI para un tipo de documento"""
+    client = initialize_openai_client()
+    if not client:
+        raise Exception("No se pudo inicializar el cliente de OpenAI")
     
-    except Exception as e:
-        current_app.logger.error(f"Error al generar el documento de requerimientos: {str(e)}")
-        return {"success": False, "error": str(e), "provider": "Error en generación"}
+    system_message, build_prompt, temperature = OPENAI_DOCUMENT_PROMPTS[document_type]
+    return (
+        lambda text: openai_chat(client, system_message, build_prompt(text), temperature),
+        lambda prompt: openai_chat(client, system_message, prompt, temperature)
+    )
+
+def stream_document_with_openai(transcription, document_type, max_tokens):
+    """
+    Genera un documento con OpenAI devolviendo el texto a trozos según lo
+    produce el modelo (stream=True).
+    
+    Las transcripciones de más de max_tokens se condensan antes por
+    fragmentos; solo se transmite la llamada final.
+    
+    Yields:
+        Fragmentos de texto del documento
+    """
+    client = initialize_openai_client()
+    if not client:
+        raise Exception("No se pudo inicializar el cliente de OpenAI")
+    
+    system_message, build_prompt, temperature = OPENAI_DOCUMENT_PROMPTS[document_type]
+    text = condense_transcription(
+        transcription,
+        document_type,
+        extract=lambda prompt: openai_chat(client, system_message, prompt, temperature),
+        max_tokens=max_tokens
+    )
+    
+    # Los errores de límite llegan al abrir el stream, así que basta con limitar esta llamada
+    stream = limited_call("openai_chat", lambda: client.chat.completions.create(
+        model=OPENAI_CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": build_prompt(text)}
+        ],
+        temperature=temperature,
+        stream=True
+    ), [("openai_chat.requests", 1, current_app.config.get('OPENAI_CHAT_REQUESTS_PER_MINUTE', 0))])
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+# Proveedores de generación de documentos, en orden de preferencia inicial
+document_router = ProviderRouter([
+    DocumentProvider(
+        "google",
+        "Google AI (Gemini)",
+        GEMINI_MODEL,
+        GOOGLE_PROMPT_VERSIONS,
+        is_configured=lambda: bool(current_app.config.get('GOOGLE_AI_API_KEY')),
+        generators=google_document_generators,
+        stream=stream_document_with_google,
+        context_tokens=GEMINI_CONTEXT_TOKENS,
+        output_tokens=GEMINI_OUTPUT_TOKENS
+    ),
+    DocumentProvider(
+        "openai",
+        "OpenAI (GPT-4)",
+        OPENAI_CHAT_MODEL,
+        OPENAI_PROMPT_VERSIONS,
+        is_configured=lambda: bool(current_app.config.get('OPENAI_API_KEY')),
+        generators=openai_document_generators,
+        stream=stream_document_with_openai,
+        context_tokens=OPENAI_CHAT_CONTEXT_TOKENS,
+        output_tokens=OPENAI_CHAT_OUTPUT_TOKENS
+    )
+])
 
 def save_uploaded_file(file, user_id):
     """Guarda un archivo subido y devuelve información sobre el mismo"""
@@ -242,13 +709,21 @@ def save_uploaded_file(file, user_id):
     # Ruta completa donde se guardará el archivo
     filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], safe_filename)
     
-    # Guardar el archivo
-    file.save(filepath)
+    # Guardar el archivo por bloques calculando a la vez su hash SHA-256
+    sha256 = hashlib.sha256()
+    with open(filepath, "wb") as f:
+        while True:
+            chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            f.write(chunk)
     
     return {
         "original_filename": original_filename,
         "safe_filename": safe_filename,
-        "filepath": filepath
+        "filepath": filepath,
+        "sha256": sha256.hexdigest()
     }
 
 def save_transcription(transcription_text, original_filename, user_id):
@@ -275,14 +750,29 @@ def save_transcription(transcription_text, original_filename, user_id):
         "transcript_path": transcript_path
     }
 
-def process_audio_file(file, user_id):
+def process_audio_file(file, user_id, progress_callback=None):
     """Procesa un archivo de audio: guarda, transcribe y almacena la transcripción"""
     # Guardar el archivo
     file_info = save_uploaded_file(file, user_id)
     
+    return process_saved_audio_file(file_info, user_id, progress_callback)
+
+def process_saved_audio_file(file_info, user_id, progress_callback=None, segment_callback=None, engine=None, tier=None,
+                             checkpoint=None):
+    """Transcribe un archivo ya guardado y almacena la transcripción (checkpoint: ver transcribe_audio)"""
     # Transcribir el audio
     start_time = time.time()
-    transcription_text = transcribe_audio(file_info["filepath"])
+    audio_stats = {}
+    transcription_text = transcribe_audio(
+        file_info["filepath"],
+        stats=audio_stats,
+        progress_callback=progress_callback,
+        audio_hash=file_info.get("sha256"),
+        segment_callback=segment_callback,
+        engine=engine,
+        tier=tier,
+        checkpoint=checkpoint
+    )
     processing_time = time.time() - start_time
     
     # Guardar la transcripción
@@ -299,5 +789,10 @@ def process_audio_file(file, user_id):
         "transcript_path": transcription_info["transcript_path"],
         "transcript_filename": transcription_info["transcript_filename"],
         "transcription_text": transcription_text,
-        "processing_time": round(processing_time, 2)
+        "processing_time": round(processing_time, 2),
+        "original_size": audio_stats.get("original_size"),
+        "processed_size": audio_stats.get("processed_size"),
+        "silence_removed": audio_stats.get("silence_removed"),
+        "offset_map": audio_stats.get("offset_map"),
+        "model_tier": tier
     }
\ No newline at end of file
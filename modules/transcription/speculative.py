@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from modules.transcription.cache import hash_text
+from modules.transcription.counters import increment_counter
+
+# Tiempo máximo que una petición espera a un acta que se está pregenerando
+SPECULATIVE_WAIT_SECONDS = 120
+
+# Pool de hilos para pregenerar actas, separado del de transcripciones
+executor = None
+executor_lock = threading.Lock()
+
+# Documentos que se están pregenerando: (hash de la transcripción, tipo) -> Future
+in_flight = {}
+lock = threading.Lock()
+
+def get_executor(app):
+    """Devuelve el pool de pregeneración, creándolo la primera vez"""
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=app.config.get('SPECULATIVE_ACTA_WORKERS', 2),
+                thread_name_prefix="speculative-acta"
+            )
+    return executor
+
+def should_pregenerate(user):
+    """Comprueba si hay que pregenerar el acta de las transcripciones del usuario"""
+    plans = [plan.strip() for plan in current_app.config.get('SPECULATIVE_ACTA_PLANS', '').split(',') if plan.strip()]
+    return user.wants_speculative_acta(plans)
+
+def pregenerate_acta(app, transcription_text):
+    """Genera el acta en segundo plano y la deja en la caché de documentos"""
+    with app.app_context():
+        from modules.transcription.services import generate_document
+        result = generate_document(transcription_text, "acta", source="speculative")
+        if result.get("success"):
+            increment_counter("speculative_acta.generated")
+        else:
+            increment_counter("speculative_acta.failed")
+        return result
+
+def schedule_speculative_acta(app, transcription_text):
+    """
+    Encola la pregeneración del acta de una transcripción recién terminada.
+    Si el usuario la pide mientras tanto, generate_document espera a este
+    resultado en lugar de lanzar otra llamada al modelo.
+    """
+    key = (hash_text(transcription_text), "acta")
+    with lock:
+        if key in in_flight:
+            return
+        future = get_executor(app).submit(pregenerate_acta, app, transcription_text)
+        in_flight[key] = future
+    
+    def forget(_):
+        with lock:
+            in_flight.pop(key, None)
+    
+    future.add_done_callback(forget)
+
+def wait_for_speculative(transcript_hash, document_type):
+    """Espera a que termine la pregeneración de un documento, si hay una en curso en este proceso"""
+    with lock:
+        future = in_flight.get((transcript_hash, document_type))
+    if future is None:
+        return
+    
+    current_app.logger.info("Esperando al acta que se está pregenerando")
+    try:
+        future.result(timeout=SPECULATIVE_WAIT_SECONDS)
+    except TimeoutError:
+        current_app.logger.warning("El acta pregenerada no ha terminado a tiempo, se genera de nuevo")
+    except Exception as e:
+        current_app.logger.error(f"Error en la pregeneración del acta: {str(e)}")
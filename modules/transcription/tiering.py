@@ -0,0 +1,74 @@
+from flask import current_app
+from modules.utils.audio_processing import get_file_duration
+from modules.transcription.models import TranscriptionJob
+
+def parse_list(value):
+    """Convierte 'a,b,c' en ['a', 'b', 'c'], ignorando los elementos vacíos"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+def parse_plan_tiers(value):
+    """Convierte 'free:small,premium:large' en {'free': 'small', 'premium': 'large'}"""
+    plan_tiers = {}
+    for item in parse_list(value):
+        plan, _, tier = item.partition(':')
+        plan_tiers[plan.strip()] = tier.strip()
+    return plan_tiers
+
+def choose_tier(tiers, plan_tier, queue_depth, duration_seconds, queue_thresholds, long_audio_seconds):
+    """
+    Elige el modelo con el que transcribir un archivo.
+    
+    Se parte del mejor modelo que permite el plan y se baja un nivel por
+    cada umbral de cola superado; con cola, un audio largo baja además otro
+    nivel para no hacer esperar a todos los demás. Sin carga, todos reciben
+    el modelo de su plan.
+    
+    Args:
+        tiers: Modelos de más rápido a más preciso (p. ej. small, medium, large)
+        plan_tier: Mejor modelo que permite el plan del usuario
+        queue_depth: Trabajos pendientes o en curso además de este
+        duration_seconds: Duración del audio
+        queue_thresholds: Trabajos en cola a partir de los que se baja cada nivel
+        long_audio_seconds: Duración a partir de la que un audio se considera largo
+    
+    Returns:
+        El modelo elegido (uno de tiers)
+    """
+    level = tiers.index(plan_tier) if plan_tier in tiers else len(tiers) - 1
+    drops = sum(1 for threshold in queue_thresholds if queue_depth >= threshold)
+    if queue_depth > 0 and duration_seconds and duration_seconds >= long_audio_seconds:
+        drops += 1
+    return tiers[max(0, level - drops)]
+
+def count_queued_jobs():
+    """Trabajos pendientes o en curso en todos los procesos"""
+    return TranscriptionJob.query.filter(
+        TranscriptionJob.status.in_([TranscriptionJob.PENDING, TranscriptionJob.RUNNING])
+    ).count()
+
+def select_tier(user, file_path):
+    """
+    Modelo local con el que transcribir ahora un archivo del usuario
+    (LOCAL_WHISPER_MODEL si no hay varios en LOCAL_WHISPER_TIERS)
+    """
+    config = current_app.config
+    tiers = parse_list(config.get('LOCAL_WHISPER_TIERS'))
+    if len(tiers) < 2:
+        return tiers[0] if tiers else config.get('LOCAL_WHISPER_MODEL', 'medium')
+    
+    plan_tier = parse_plan_tiers(config.get('LOCAL_WHISPER_PLAN_TIERS')).get(user.plan or 'free')
+    # El propio trabajo ya cuenta como en curso
+    queue_depth = max(0, count_queued_jobs() - 1)
+    duration = get_file_duration(file_path)
+    tier = choose_tier(
+        tiers,
+        plan_tier,
+        queue_depth,
+        duration,
+        [int(threshold) for threshold in parse_list(config.get('LOCAL_WHISPER_TIER_QUEUE_THRESHOLDS'))],
+        config.get('LOCAL_WHISPER_LONG_AUDIO_MINUTES', 60) * 60
+    )
+    current_app.logger.info(
+        f"Modelo '{tier}' elegido (plan {user.plan}, {queue_depth} trabajos en cola, {duration / 60:.1f} min de audio)"
+    )
+    return tier
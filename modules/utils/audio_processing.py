@@ -1,9 +1,29 @@
 import os
+import csv
 import subprocess
 import json
 import math
+import re
 import uuid
 
+# Duración mínima de audio que acepta la API de Whisper
+MIN_SEGMENT_SECONDS = 0.1
+
+# Palabras por segundo de un discurso rápido, para saber cuántas palabras
+# puede contener el solapamiento entre dos segmentos
+WORDS_PER_SECOND = 3.5
+
+# Contenedor de audio en el que se puede copiar cada códec sin recodificar
+AUDIO_CODEC_EXTENSIONS = {
+    'aac': '.m4a',
+    'alac': '.m4a',
+    'mp3': '.mp3',
+    'opus': '.ogg',
+    'vorbis': '.ogg',
+    'flac': '.flac',
+    'pcm_s16le': '.wav'
+}
+
 def get_file_duration(file_path):
     """
     Obtiene la duración de un archivo de audio usando ffprobe
@@ -62,17 +82,362 @@ def get_file_size(file_path):
     """
     return os.path.getsize(file_path)
 
-def split_audio_file(file_path, max_size_mb=24, output_folder=None):
+def probe_audio(file_path):
     """
-    Divide un archivo de audio en segmentos más pequeños usando ffmpeg.
+    Obtiene con ffprobe la información necesaria para planificar la división:
+    duración, tamaño, bitrate total y bitrate de cada stream.
+    
+    Returns:
+        Diccionario con duration, size, bit_rate (total del contenedor),
+        audio_bit_rate, audio_codec y has_video
+    """
+    info = {
+        "duration": None,
+        "size": get_file_size(file_path),
+        "bit_rate": None,
+        "audio_bit_rate": None,
+        "audio_codec": None,
+        "has_video": False,
+        "streams_bit_rate": 0
+    }
+    
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format=duration,bit_rate:stream=codec_type,codec_name,bit_rate:stream_disposition=attached_pic',
+        '-of', 'json',
+        file_path
+    ]
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode == 0:
+            data = json.loads(result.stdout)
+            fmt = data.get('format', {})
+            if fmt.get('duration') not in (None, 'N/A'):
+                info["duration"] = float(fmt['duration'])
+            if fmt.get('bit_rate') not in (None, 'N/A'):
+                info["bit_rate"] = int(fmt['bit_rate'])
+            
+            for stream in data.get('streams', []):
+                codec_type = stream.get('codec_type')
+                bit_rate = stream.get('bit_rate')
+                bit_rate = int(bit_rate) if bit_rate not in (None, 'N/A') else None
+                
+                if codec_type == 'video' and not stream.get('disposition', {}).get('attached_pic'):
+                    # Las carátulas de los MP3/M4A aparecen como video pero no cuentan
+                    info["has_video"] = True
+                if codec_type == 'audio' and info["audio_codec"] is None:
+                    info["audio_codec"] = stream.get('codec_name')
+                    info["audio_bit_rate"] = bit_rate
+                if bit_rate:
+                    info["streams_bit_rate"] += bit_rate
+    except Exception as e:
+        print(f"Error al analizar el archivo con ffprobe: {str(e)}")
+    
+    if not info["duration"]:
+        info["duration"] = get_file_duration(file_path)
+    if not info["bit_rate"] and info["duration"]:
+        info["bit_rate"] = int(info["size"] * 8 / info["duration"])
+    
+    return info
+
+def container_overhead(info):
+    """Bytes del archivo que no son datos de los streams (etiquetas, carátula, índices)"""
+    if not info["streams_bit_rate"] or not info["duration"]:
+        return 0
+    return max(0, int(info["size"] - info["streams_bit_rate"] * info["duration"] / 8))
+
+def plan_segments(info, max_segment_bytes, safety_margin=0.9, header_bytes=64 * 1024):
+    """
+    Calcula el menor número de segmentos que cumple el límite de tamaño.
+    
+    El overhead del contenedor (etiquetas, carátula) se repite en cada
+    segmento al copiar sin recodificar, así que se reserva en cada uno
+    (como mínimo header_bytes) y el resto del archivo se reparte según su
+    bitrate real. Un overhead de más de medio segmento no puede ser una
+    cabecera repetida (split_audio_to_limit la quita antes de dividir), así
+    que se reparte con el bitrate. Se deja además un margen para compensar
+    el bitrate variable.
+    
+    Returns:
+        Diccionario con num_segments, segment_duration, bytes_per_second
+        (bytes que ocupa cada segundo de segmento) y overhead_bytes
+        (reservados en cada segmento)
+    """
+    duration = info["duration"]
+    size = info["size"]
+    segment_bytes = max_segment_bytes * safety_margin
+    
+    overhead_bytes = container_overhead(info)
+    if overhead_bytes > segment_bytes / 2:
+        overhead_bytes = 0
+    
+    data_bytes = size - overhead_bytes
+    bytes_per_second = data_bytes / duration if duration else info["bit_rate"] / 8
+    
+    overhead_bytes = max(header_bytes, overhead_bytes)
+    usable_bytes = segment_bytes - overhead_bytes
+    num_segments = max(1, math.ceil(duration * bytes_per_second / usable_bytes))
+    
+    # Redondear hacia arriba para no generar un segmento extra diminuto al
+    # final, añadiendo un segmento si el redondeo hace que no quepan
+    segment_duration = math.ceil(duration / num_segments)
+    while num_segments > 1 and segment_duration * bytes_per_second > usable_bytes:
+        num_segments += 1
+        segment_duration = math.ceil(duration / num_segments)
+    
+    return {
+        "num_segments": num_segments,
+        "segment_duration": segment_duration,
+        "bytes_per_second": bytes_per_second,
+        "overhead_bytes": overhead_bytes
+    }
+
+def extract_audio_stream(file_path, output_folder=None, info=None):
+    """
+    Extrae solo el stream de audio de un archivo de video (por ejemplo MP4).
+    
+    Se intenta copiar el audio sin recodificar; si el códec no tiene un
+    contenedor de audio conocido o la copia falla, se recodifica a MP3.
+    
+    Args:
+        file_path: Ruta al archivo original
+        output_folder: Carpeta donde guardar el audio extraído
+        info: Resultado de probe_audio, si ya se tiene
+        
+    Returns:
+        Ruta al archivo de audio extraído, o file_path si no contiene video
+    """
+    if info is None:
+        info = probe_audio(file_path)
+    
+    if not info["has_video"]:
+        return file_path
+    
+    if output_folder is None:
+        output_folder = os.path.dirname(file_path)
+    
+    base_name = f"audio_{uuid.uuid4().hex}"
+    ext = AUDIO_CODEC_EXTENSIONS.get(info["audio_codec"])
+    
+    if ext:
+        audio_path = os.path.join(output_folder, base_name + ext)
+        cmd = [
+            'ffmpeg',
+            '-y',
+            '-v', 'error',
+            '-i', file_path,
+            '-vn',  # Descartar el video
+            '-map', '0:a:0',
+            '-c:a', 'copy',
+            audio_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode == 0:
+            return audio_path
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+    
+    # Recodificar si no se puede copiar el stream tal cual
+    audio_path = os.path.join(output_folder, base_name + '.mp3')
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', file_path,
+        '-vn',
+        '-map', '0:a:0',
+        '-c:a', 'libmp3lame',
+        '-b:a', '128k',
+        audio_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Error al extraer el audio: {result.stderr}")
+    
+    return audio_path
+
+def transcode_for_speech(file_path, output_folder=None, audio_format='opus', bitrate='24k', sample_rate=16000):
+    """
+    Recodifica el audio a un formato compacto pensado para voz
+    (mono, 16 kHz, Opus o MP3 de bajo bitrate), descartando el video.
+    
+    Args:
+        file_path: Ruta al archivo original
+        output_folder: Carpeta donde guardar el audio recodificado
+        audio_format: 'opus' (contenedor OGG) o 'mp3'
+        bitrate: Bitrate de salida para ffmpeg (por ejemplo '24k')
+        sample_rate: Frecuencia de muestreo de salida
+        
+    Returns:
+        Ruta al archivo recodificado
+    """
+    if output_folder is None:
+        output_folder = os.path.dirname(file_path)
+    
+    if audio_format == 'mp3':
+        ext, codec_args = '.mp3', ['-c:a', 'libmp3lame']
+    else:
+        # 'voip' ajusta el codificador Opus para voz
+        ext, codec_args = '.ogg', ['-c:a', 'libopus', '-application', 'voip']
+    
+    output_path = os.path.join(output_folder, f"speech_{uuid.uuid4().hex}{ext}")
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', file_path,
+        '-vn',
+        '-map', '0:a:0',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        *codec_args,
+        '-b:a', bitrate,
+        output_path
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Error al recodificar el audio: {result.stderr}")
+    
+    return output_path
+
+def detect_silences(file_path, noise_db=-35, min_silence=0.5):
+    """
+    Detecta los tramos de silencio de un archivo con el filtro silencedetect
+    de ffmpeg.
     
     Args:
         file_path: Ruta al archivo de audio
-        max_size_mb: Tamaño máximo deseado para cada segmento en MB
+        noise_db: Nivel en dB por debajo del cual se considera silencio
+        min_silence: Duración mínima en segundos de un silencio
+        
+    Returns:
+        Lista de tuplas (inicio, fin) en segundos
+    """
+    cmd = [
+        'ffmpeg',
+        '-v', 'info',
+        '-nostats',
+        '-i', file_path,
+        '-vn',
+        '-af', f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        '-f', 'null',
+        '-'
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Error al detectar silencios: {result.stderr}")
+    
+    silences = []
+    silence_start = None
+    for line in result.stderr.splitlines():
+        start_match = re.search(r'silence_start: (-?[\d.]+)', line)
+        if start_match:
+            silence_start = max(0.0, float(start_match.group(1)))
+            continue
+        end_match = re.search(r'silence_end: ([\d.]+)', line)
+        if end_match and silence_start is not None:
+            silences.append((silence_start, float(end_match.group(1))))
+            silence_start = None
+    
+    return silences
+
+def choose_split_points(duration, segment_duration, silences, search_window):
+    """
+    Elige los instantes de corte haciendo coincidir cada corte con el
+    silencio más cercano antes del corte ideal.
+    
+    Solo se buscan silencios en los search_window segundos anteriores a
+    cada corte ideal, para que ningún segmento supere segment_duration.
+    Si no hay ningún silencio en esa ventana se corta en el instante ideal.
+    
+    Returns:
+        Lista ordenada de instantes de corte en segundos
+    """
+    points = []
+    previous = 0.0
+    
+    while duration - previous > segment_duration:
+        target = previous + segment_duration
+        
+        best = None
+        for silence_start, silence_end in silences:
+            middle = (silence_start + silence_end) / 2
+            if target - search_window <= middle <= target and middle > previous:
+                if best is None or middle > best:
+                    best = middle
+        
+        cut = best if best is not None else target
+        points.append(cut)
+        previous = cut
+    
+    return points
+
+def split_audio_with_overlap(file_path, split_points, overlap, output_folder=None, total_duration=None):
+    """
+    Divide un archivo en los instantes indicados, haciendo que cada segmento
+    empiece overlap segundos antes de su corte para no perder palabras.
+    
+    Cada segmento se extrae con búsqueda en la entrada (-ss antes de -i),
+    por lo que ffmpeg salta directamente a su inicio sin leer lo anterior.
+    
+    Returns:
+        Lista de diccionarios con path, start, duration y overlap (segundos
+        compartidos con el segmento anterior)
+    """
+    if output_folder is None:
+        output_folder = os.path.dirname(file_path)
+    
+    _, ext = os.path.splitext(file_path)
+    prefix = f"segment_{uuid.uuid4().hex}"
+    bounds = [0.0] + list(split_points) + [None]
+    
+    segments = []
+    for i in range(len(bounds) - 1):
+        cut, end = bounds[i], bounds[i + 1]
+        start = max(0.0, cut - overlap) if i > 0 else 0.0
+        segment_path = os.path.join(output_folder, f"{prefix}_{i:04d}{ext}")
+        
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-ss', f"{start:.3f}", '-i', file_path]
+        if end is not None:
+            cmd += ['-t', f"{end - start:.3f}"]
+        cmd += ['-c', 'copy', segment_path]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            raise Exception(f"Error al dividir el archivo: {result.stderr}")
+        
+        segments.append({
+            "path": segment_path,
+            "start": start,
+            "duration": (end if end is not None else total_duration or get_file_duration(file_path)) - start,
+            "overlap": cut - start
+        })
+    
+    return segments
+
+def split_audio_segments(file_path, segment_duration=None, output_folder=None, segment_times=None):
+    """
+    Divide un archivo de audio en segmentos en una sola pasada usando el
+    muxer de segmentos de ffmpeg.
+    
+    Args:
+        file_path: Ruta al archivo de audio
+        segment_duration: Duración objetivo de cada segmento en segundos
         output_folder: Carpeta donde guardar los segmentos
+        segment_times: Lista de instantes de corte en segundos; si se indica,
+            se usa en lugar de segment_duration
         
     Returns:
-        Lista de rutas a los archivos de segmentos creados
+        Lista de diccionarios con la ruta (path), el inicio (start) y la
+        duración (duration) de cada segmento, en orden
     """
     if output_folder is None:
         output_folder = os.path.dirname(file_path)
@@ -80,54 +445,260 @@ def split_audio_file(file_path, max_size_mb=24, output_folder=None):
     # Determinar extensión del archivo
     _, ext = os.path.splitext(file_path)
     
-    # Obtener duración total del archivo
-    duration = get_file_duration(file_path)
-    file_size = get_file_size(file_path)
+    # Prefijo único para no mezclar segmentos de distintos archivos
+    prefix = f"segment_{uuid.uuid4().hex}"
+    segment_pattern = os.path.join(output_folder, f"{prefix}_%04d{ext}")
+    segment_list_path = os.path.join(output_folder, f"{prefix}.csv")
     
-    # Calcular cuántos segmentos necesitamos
-    max_size_bytes = max_size_mb * 1024 * 1024
-    num_segments = math.ceil(file_size / max_size_bytes)
+    if segment_times:
+        split_args = ['-segment_times', ",".join(f"{t:.3f}" for t in segment_times)]
+    else:
+        split_args = ['-segment_time', f"{segment_duration:.3f}"]
     
-    # Calcular duración de cada segmento
-    segment_duration = duration / num_segments
+    # Comando ffmpeg que lee el archivo una sola vez y escribe todos los segmentos
+    cmd = [
+        'ffmpeg',
+        '-y',  # Sobrescribir archivos existentes
+        '-v', 'error',
+        '-i', file_path,
+        '-c', 'copy',  # Copiar sin recodificar para mayor velocidad
+        '-f', 'segment',
+        *split_args,
+        '-reset_timestamps', '1',
+        '-segment_list', segment_list_path,
+        '-segment_list_type', 'csv',
+        segment_pattern
+    ]
     
-    # Crear segmentos
-    segment_paths = []
+    # Ejecutar comando
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Error al dividir el archivo: {result.stderr}")
+    
+    # La lista CSV contiene una línea por segmento: nombre,inicio,fin
+    segments = []
+    try:
+        with open(segment_list_path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                start, end = float(row[1]), float(row[2])
+                segments.append({
+                    "path": os.path.join(output_folder, row[0]),
+                    "start": start,
+                    "duration": end - start
+                })
+    finally:
+        os.remove(segment_list_path)
     
-    for i in range(num_segments):
-        start_time = i * segment_duration
-        segment_filename = f"segment_{uuid.uuid4().hex}{ext}"
-        segment_path = os.path.join(output_folder, segment_filename)
+    # Al cortar por paquetes puede quedar un último segmento de unos pocos
+    # milisegundos que la API rechaza; se descarta y se suma al anterior
+    if len(segments) > 1 and segments[-1]["duration"] < MIN_SEGMENT_SECONDS:
+        tail = segments.pop()
+        os.remove(tail["path"])
+        segments[-1]["duration"] += tail["duration"]
+    
+    return segments
+
+def strip_container_overhead(file_path, output_folder=None):
+    """
+    Copia solo el audio del archivo, sin carátulas ni metadatos, para que
+    no se repitan en cada segmento. No se recodifica nada.
+    
+    Returns:
+        Ruta al archivo sin overhead
+    """
+    if output_folder is None:
+        output_folder = os.path.dirname(file_path)
+    
+    _, ext = os.path.splitext(file_path)
+    output_path = os.path.join(output_folder, f"stripped_{uuid.uuid4().hex}{ext}")
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', file_path,
+        '-map', '0:a',
+        '-map_metadata', '-1',
+        '-c', 'copy',
+        output_path
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    if result.returncode != 0:
+        raise Exception(f"Error al quitar los metadatos del audio: {result.stderr}")
+    
+    return output_path
+
+def split_audio_to_limit(file_path, max_segment_bytes, output_folder=None, safety_margin=0.9, max_depth=3,
+                         split_on_silence=False, overlap=0.0):
+    """
+    Divide un archivo en el menor número de segmentos que no superen
+    max_segment_bytes, comprobando el tamaño real de cada segmento.
+    
+    Los segmentos que aun así superan el límite (picos de bitrate variable)
+    se vuelven a dividir individualmente sin repetir el resto.
+    
+    Args:
+        split_on_silence: Hacer coincidir los cortes con pausas del audio
+        overlap: Segundos que cada segmento repite del anterior
+    
+    Si la carátula o los metadatos ocupan más de medio segmento, se quitan
+    antes de dividir, porque cada segmento los repetiría.
+    
+    Returns:
+        Lista de diccionarios con path, start y duration de cada segmento,
+        con los inicios relativos al archivo original
+    
+    Raises:
+        Exception: si tras la última división algún segmento sigue
+            superando max_segment_bytes
+    """
+    info = probe_audio(file_path)
+    if container_overhead(info) > max_segment_bytes * safety_margin / 2:
+        stripped_path = strip_container_overhead(file_path, output_folder)
+        try:
+            return split_audio_to_limit(
+                stripped_path, max_segment_bytes, output_folder, safety_margin, max_depth,
+                split_on_silence=split_on_silence, overlap=overlap
+            )
+        finally:
+            os.remove(stripped_path)
+    
+    plan = plan_segments(info, max_segment_bytes, safety_margin)
+    segment_duration = plan["segment_duration"]
+    
+    if split_on_silence or overlap > 0:
+        # Reservar el tamaño del solapamiento dentro de cada segmento
+        segment_duration = max(1.0, segment_duration - overlap)
         
-        # Comando ffmpeg para extraer el segmento
-        cmd = [
-            'ffmpeg',
-            '-y',  # Sobrescribir archivos existentes
-            '-i', file_path,
-            '-ss', str(start_time),
-            '-t', str(segment_duration),
-            '-c', 'copy',  # Copiar sin recodificar para mayor velocidad
-            segment_path
-        ]
+        silences = []
+        if split_on_silence:
+            try:
+                silences = detect_silences(file_path)
+            except Exception as e:
+                print(f"Error al detectar silencios, se corta por tiempo: {str(e)}")
         
-        # Ejecutar comando
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Buscar pausas en el último 10% de cada segmento
+        split_points = choose_split_points(info["duration"], segment_duration, silences, segment_duration * 0.1)
+        if overlap > 0:
+            segments = split_audio_with_overlap(file_path, split_points, overlap, output_folder, info["duration"])
+        elif split_points:
+            segments = split_audio_segments(file_path, output_folder=output_folder, segment_times=split_points)
+        else:
+            segments = split_audio_segments(file_path, info["duration"] + 1, output_folder)
+    else:
+        segments = split_audio_segments(file_path, segment_duration, output_folder)
+    
+    checked_segments = []
+    for segment in segments:
+        segment_size = get_file_size(segment["path"])
+        if segment_size <= max_segment_bytes:
+            checked_segments.append(segment)
+            continue
         
-        if result.returncode != 0:
-            raise Exception(f"Error al dividir el archivo: {result.stderr}")
+        if max_depth <= 0:
+            raise Exception(
+                f"Un segmento sigue ocupando {segment_size/1024/1024:.2f} MB tras dividir el archivo, "
+                f"por encima del límite de {max_segment_bytes/1024/1024:.2f} MB"
+            )
+        
+        # Volver a dividir solo el segmento que se ha pasado del límite
+        sub_segments = split_audio_to_limit(
+            segment["path"], max_segment_bytes, output_folder, safety_margin, max_depth - 1,
+            split_on_silence=split_on_silence, overlap=overlap
+        )
+        os.remove(segment["path"])
+        for j, sub_segment in enumerate(sub_segments):
+            sub_segment["start"] += segment["start"]
+            if j == 0:
+                # El primer trozo conserva el solapamiento del segmento original
+                sub_segment["overlap"] = segment.get("overlap", 0.0)
+            checked_segments.append(sub_segment)
+    
+    return checked_segments
+
+def split_audio_file(file_path, max_size_mb=24, output_folder=None):
+    """
+    Divide un archivo de audio en segmentos más pequeños usando ffmpeg.
+    
+    Args:
+        file_path: Ruta al archivo de audio
+        max_size_mb: Tamaño máximo deseado para cada segmento en MB
+        output_folder: Carpeta donde guardar los segmentos
         
-        segment_paths.append(segment_path)
+    Returns:
+        Lista de rutas a los archivos de segmentos creados
+    """
+    max_size_bytes = max_size_mb * 1024 * 1024
+    segments = split_audio_to_limit(file_path, max_size_bytes, output_folder)
+    return [segment["path"] for segment in segments]
+
+def _normalize_word(word):
+    """Normaliza una palabra para compararla sin mayúsculas ni puntuación"""
+    return re.sub(r'[^\w]', '', word.lower())
+
+def stitch_overlap(previous_text, next_text, overlap_seconds, edge_words=3, min_match_words=4):
+    """
+    Une dos transcripciones cuyos audios se solapan overlap_seconds,
+    eliminando las palabras repetidas en la zona común.
+    
+    La zona común solo puede estar al final del texto anterior y al
+    principio del siguiente, así que se busca la secuencia de palabras más
+    larga que termina a menos de edge_words palabras del final del texto
+    anterior y empieza a menos de edge_words del principio del siguiente
+    (Whisper puede cortar o cambiar alguna palabra en los bordes). Las
+    coincidencias más cortas que min_match_words se ignoran, porque
+    secuencias como "de la" o "en el" se repiten constantemente. Si no hay
+    coincidencia en los bordes, los textos se concatenan.
+    """
+    previous_words = previous_text.split()
+    next_words = next_text.split()
+    if not previous_words or not next_words:
+        return " ".join(previous_words + next_words)
+    
+    # Palabras que caben en el solapamiento, más el margen de los bordes
+    window_words = math.ceil(overlap_seconds * WORDS_PER_SECOND) + edge_words
+    tail = [_normalize_word(w) for w in previous_words[-window_words:]]
+    head = [_normalize_word(w) for w in next_words[:window_words]]
+    
+    best_length, best_end, best_start = 0, None, None
+    for next_start in range(min(edge_words + 1, len(head))):
+        for tail_start in range(len(tail)):
+            length = 0
+            while (tail_start + length < len(tail) and next_start + length < len(head)
+                   and tail[tail_start + length] and tail[tail_start + length] == head[next_start + length]):
+                length += 1
+            tail_end = tail_start + length
+            if length > best_length and tail_end >= len(tail) - edge_words:
+                best_length, best_end, best_start = length, tail_end, next_start
     
-    return segment_paths
+    if best_length < min_match_words:
+        return " ".join(previous_words + next_words)
+    
+    # Conservar el texto anterior hasta el final de la coincidencia
+    # y continuar con lo que sigue a la coincidencia en el texto nuevo
+    keep_previous = len(previous_words) - len(tail) + best_end
+    return " ".join(previous_words[:keep_previous] + next_words[best_start + best_length:])
 
-def combine_transcriptions(transcriptions):
+def combine_transcriptions(transcriptions, overlap=0):
     """
     Combina múltiples transcripciones en una sola.
     
     Args:
         transcriptions: Lista de textos transcritos
+        overlap: Segundos que cada segmento repite del anterior (0 si no
+            se solapan); el texto repetido se elimina en las uniones
         
     Returns:
         Texto combinado
     """
-    return " ".join(transcriptions)
\ No newline at end of file
+    if not overlap:
+        return " ".join(transcriptions)
+    
+    combined = ""
+    for text in transcriptions:
+        combined = stitch_overlap(combined, text, overlap) if combined else text
+    return combined
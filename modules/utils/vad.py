@@ -0,0 +1,221 @@
+import os
+import subprocess
+import uuid
+import numpy as np
+
+# Frecuencia de muestreo a la que se decodifica el audio para analizarlo
+VAD_SAMPLE_RATE = 16000
+
+def compute_frame_energies(file_path, frame_ms=30, sample_rate=VAD_SAMPLE_RATE):
+    """
+    Calcula la energía (dBFS) de cada trama del audio.
+    
+    El audio se decodifica con ffmpeg a PCM mono de 16 bits y se procesa por
+    bloques con NumPy, de modo que nunca se guarda el archivo completo en memoria.
+    
+    Returns:
+        Array de NumPy con la energía en dBFS de cada trama de frame_ms
+    """
+    frame_samples = int(sample_rate * frame_ms / 1000)
+    # Leer bloques de ~10 segundos, múltiplos exactos de una trama
+    block_bytes = frame_samples * 2 * int(10000 / frame_ms)
+    
+    cmd = [
+        'ffmpeg',
+        '-v', 'error',
+        '-i', file_path,
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        '-'
+    ]
+    
+    energies = []
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            
+            samples = np.frombuffer(block, dtype=np.int16)
+            num_frames = len(samples) // frame_samples
+            if num_frames == 0:
+                break
+            
+            frames = samples[:num_frames * frame_samples].reshape(num_frames, frame_samples).astype(np.float32)
+            rms = np.sqrt(np.mean(frames ** 2, axis=1))
+            energies.append(20 * np.log10(rms / 32768.0 + 1e-10))
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors='replace')
+        process.stderr.close()
+        process.wait()
+    
+    if process.returncode != 0:
+        raise Exception(f"Error al decodificar el audio: {stderr}")
+    
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+def detect_speech_regions(energies, frame_ms=30, min_silence=1.0, padding=0.15, threshold_margin_db=12, min_threshold_db=-50):
+    """
+    Detecta los tramos con voz a partir de la energía de cada trama.
+    
+    El umbral se adapta al ruido de fondo de cada grabación (percentil 10
+    de la energía más un margen). Las pausas más cortas que min_silence se
+    consideran parte de la voz y cada tramo se amplía padding segundos por
+    cada lado para no recortar el inicio o el final de las palabras.
+    
+    Returns:
+        Lista de tuplas (inicio, fin) en segundos
+    """
+    if len(energies) == 0:
+        return []
+    
+    frame_seconds = frame_ms / 1000
+    noise_floor = np.percentile(energies, 10)
+    threshold = max(noise_floor + threshold_margin_db, min_threshold_db)
+    is_speech = energies > threshold
+    
+    if not is_speech.any():
+        return []
+    
+    # Inicios y finales de cada racha de tramas con voz
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    
+    # Unir los tramos separados por pausas cortas
+    gaps = starts[1:] - ends[:-1]
+    keep = np.concatenate(([True], gaps * frame_seconds >= min_silence))
+    starts = starts[keep]
+    ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+    
+    total_seconds = len(energies) * frame_seconds
+    region_starts = np.maximum(starts * frame_seconds - padding, 0.0)
+    region_ends = np.minimum(ends * frame_seconds + padding, total_seconds)
+    
+    return [(float(start), float(end)) for start, end in zip(region_starts, region_ends)]
+
+def build_offset_map(regions):
+    """
+    Construye la tabla que relaciona el audio filtrado con el original.
+    
+    Returns:
+        Lista de tuplas (inicio_filtrado, inicio_original, duración)
+    """
+    offset_map = []
+    filtered_start = 0.0
+    for start, end in regions:
+        offset_map.append((filtered_start, start, end - start))
+        filtered_start += end - start
+    return offset_map
+
+def build_trim_filter(regions, sample_rate=VAD_SAMPLE_RATE):
+    """
+    Construye el filtergraph que recorta cada tramo con atrim y los une con
+    concat. El audio se pasa antes a mono y a sample_rate para que cada rama
+    de asplit mueva el menor número de muestras posible.
+    
+    Returns:
+        Texto del filtergraph, con la salida en la etiqueta [out]
+    """
+    count = len(regions)
+    branches = "".join(f"[s{i}]" for i in range(count))
+    lines = [f"[0:a]aformat=channel_layouts=mono,aresample={sample_rate},asplit={count}{branches}"]
+    for i, (start, end) in enumerate(regions):
+        lines.append(f"[s{i}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[a{i}]")
+    lines.append("".join(f"[a{i}]" for i in range(count)) + f"concat=n={count}:v=0:a=1[out]")
+    return ";\n".join(lines)
+
+def map_to_original(timestamp, offset_map):
+    """Convierte un instante del audio filtrado al instante del audio original"""
+    for filtered_start, original_start, duration in offset_map:
+        if timestamp < filtered_start + duration:
+            return original_start + max(0.0, timestamp - filtered_start)
+    
+    if offset_map:
+        filtered_start, original_start, duration = offset_map[-1]
+        return original_start + timestamp - filtered_start
+    return timestamp
+
+def remove_silence(file_path, output_folder=None, min_silence=1.0, keep_silence=0.3, audio_format='opus', bitrate='24k'):
+    """
+    Elimina los tramos sin voz de un archivo de audio.
+    
+    De cada pausa de al menos min_silence segundos se conservan keep_silence
+    segundos (la mitad a cada lado) para que las frases no queden pegadas.
+    
+    Returns:
+        Diccionario con path (audio filtrado, o el original si no hay nada
+        que quitar), offset_map, original_duration, kept_duration y
+        dropped_seconds
+    """
+    frame_ms = 30
+    energies = compute_frame_energies(file_path, frame_ms=frame_ms)
+    original_duration = len(energies) * frame_ms / 1000
+    regions = detect_speech_regions(energies, frame_ms=frame_ms, min_silence=min_silence, padding=keep_silence / 2)
+    
+    # Unir tramos que se solapan después de añadir el margen
+    merged = []
+    for start, end in regions:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    
+    kept_duration = sum(end - start for start, end in merged)
+    result = {
+        "path": file_path,
+        "offset_map": build_offset_map(merged),
+        "original_duration": original_duration,
+        "kept_duration": kept_duration,
+        "dropped_seconds": original_duration - kept_duration
+    }
+    
+    # Sin voz detectada o sin silencios que merezca la pena quitar
+    if not merged or result["dropped_seconds"] < min_silence:
+        result["offset_map"] = [(0.0, 0.0, original_duration)]
+        result["kept_duration"] = original_duration
+        result["dropped_seconds"] = 0.0
+        return result
+    
+    if output_folder is None:
+        output_folder = os.path.dirname(file_path)
+    
+    if audio_format == 'mp3':
+        ext, codec_args = '.mp3', ['-c:a', 'libmp3lame']
+    else:
+        ext, codec_args = '.ogg', ['-c:a', 'libopus', '-application', 'voip']
+    
+    name = f"vad_{uuid.uuid4().hex}"
+    output_path = os.path.join(output_folder, name + ext)
+    # Una grabación larga tiene miles de tramos: el filtergraph va en un archivo
+    # porque no cabría como argumento de la línea de comandos
+    script_path = os.path.join(output_folder, name + ".filter")
+    with open(script_path, 'w') as script:
+        script.write(build_trim_filter(merged))
+    
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', file_path,
+        '-filter_complex_script', script_path,
+        '-map', '[out]',
+        *codec_args,
+        '-b:a', bitrate,
+        output_path
+    ]
+    
+    try:
+        process = subprocess.run(cmd, capture_output=True, text=True)
+    finally:
+        os.remove(script_path)
+    
+    if process.returncode != 0:
+        raise Exception(f"Error al eliminar silencios: {process.stderr}")
+    
+    result["path"] = output_path
+    return result
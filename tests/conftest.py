@@ -0,0 +1,49 @@
+import os
+import sys
+import pytest
+
+# Permitir importar los módulos de la aplicación al ejecutar pytest desde cualquier carpeta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from modules.auth.models import db
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Crea la aplicación con una base de datos SQLite y carpetas temporales,
+    ya con las tablas creadas y su contexto activo. Los argumentos
+    sobrescriben opciones de Config.
+    """
+    contexts = []
+    
+    def factory(**settings):
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+            UPLOAD_FOLDER = str(tmp_path / "uploads")
+            TRANSCRIPT_FOLDER = str(tmp_path / "transcripts")
+            PROVIDER_CLIENT_PREWARM = False
+        
+        for name, value in settings.items():
+            setattr(TestConfig, name, value)
+        
+        app = create_app(TestConfig)
+        context = app.app_context()
+        context.push()
+        contexts.append(context)
+        db.create_all()
+        return app
+    
+    yield factory
+    
+    db.session.remove()
+    for context in reversed(contexts):
+        context.pop()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,162 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from modules.auth.models import db, User
+import modules.transcription.services as services
+from modules.transcription.jobs import create_job, claim_job, process_job
+from modules.transcription.models import Transcription, TranscriptionJob, TranscriptionSegment
+
+SEGMENTS = 6
+
+
+class WorkerKilled(BaseException):
+    """Simula la muerte del worker: no la captura ningún except Exception"""
+
+
+class FakeOpenAI:
+    """Cliente de OpenAI falso que cuenta las llamadas de transcripción"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.kill_after = None
+        self.lock = threading.Lock()
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self.create))
+    
+    def create(self, model, file, language):
+        with self.lock:
+            if self.kill_after is not None and self.calls >= self.kill_after:
+                raise WorkerKilled()
+            self.calls += 1
+        return SimpleNamespace(text=f"texto {os.path.basename(file.name)[-8:-4]}")
+
+
+@pytest.fixture
+def app(make_app, monkeypatch):
+    def fake_split(file_path, max_segment_bytes, output_folder=None, **kwargs):
+        segments = []
+        for i in range(SEGMENTS):
+            path = os.path.join(output_folder, f"segment_{i:04d}.mp3")
+            with open(path, "wb") as f:
+                f.write(b"audio")
+            segments.append({"path": path, "start": i * 60.0, "duration": 60.0, "overlap": 0})
+        return segments
+    
+    monkeypatch.setattr(services, "split_audio_to_limit", fake_split)
+    monkeypatch.setattr(services, "prepare_audio", lambda file_path, temp_folder: file_path)
+    
+    return make_app(
+        OPENAI_API_KEY="sk-test",
+        SPECULATIVE_ACTA_PLANS="",
+        WHISPER_MAX_FILE_MB=0,  # Cualquier archivo se divide en segmentos
+        WHISPER_REQUESTS_PER_MINUTE=0,
+        TRANSCRIPTION_MAX_WORKERS=1,  # Segmentos en orden, uno a uno
+        TRANSCRIPTION_HEDGE_ENABLED=False
+    )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeOpenAI()
+    monkeypatch.setattr(services, "initialize_openai_client", lambda: client)
+    return client
+
+
+def create_pending_job(app):
+    user = User(username="usuario", email="usuario@example.com")
+    user.set_password("password1")
+    db.session.add(user)
+    db.session.commit()
+    
+    audio_path = os.path.join(app.config["UPLOAD_FOLDER"], "reunion.mp3")
+    with open(audio_path, "wb") as f:
+        f.write(b"audio original")
+    return create_job({"original_filename": "reunion.mp3", "filepath": audio_path}, user.id)
+
+
+@pytest.mark.parametrize("completed", [1, 3, 5])
+def test_resume_only_transcribes_missing_segments(app, client, completed):
+    job_id = create_pending_job(app).id
+    
+    # Primer intento: el worker muere tras transcribir `completed` segmentos
+    client.kill_after = completed
+    job = claim_job("worker-1", job_id=job_id)
+    with pytest.raises(WorkerKilled):
+        process_job(app, job, "worker-1")
+    db.session.rollback()
+    
+    assert client.calls == completed
+    assert TranscriptionSegment.query.filter_by(job_id=job_id).count() == completed
+    assert db.session.get(TranscriptionJob, job_id).status == TranscriptionJob.RUNNING
+    
+    # La reserva caduca y otro worker retoma el trabajo
+    job = db.session.get(TranscriptionJob, job_id)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    
+    client.calls = 0
+    client.kill_after = None
+    job = claim_job("worker-2")
+    assert job is not None and job.id == job_id and job.attempts == 2
+    process_job(app, job, "worker-2")
+    
+    job = db.session.get(TranscriptionJob, job_id)
+    assert job.status == TranscriptionJob.COMPLETED
+    assert client.calls == SEGMENTS - completed
+    
+    transcription = db.session.get(Transcription, job.transcription_id)
+    assert transcription.transcript_text == " ".join(f"texto {i:04d}" for i in range(SEGMENTS))
+    
+    # Los puntos de control se eliminan al terminar
+    assert job.segment_plan is None
+    assert TranscriptionSegment.query.filter_by(job_id=job_id).count() == 0
+    assert not os.path.exists(os.path.join(app.config["UPLOAD_FOLDER"], "temp_segments", f"job_{job_id}"))
+
+
+def test_failed_job_clears_checkpoints(app, client):
+    job_id = create_pending_job(app).id
+    
+    def fail(model, file, language):
+        raise ValueError("archivo no válido")
+    
+    client.audio.transcriptions.create = fail
+    app.config["TRANSCRIPTION_SEGMENT_RETRIES"] = 0
+    process_job(app, claim_job("worker-1", job_id=job_id), "worker-1")
+    
+    job = db.session.get(TranscriptionJob, job_id)
+    assert job.status == TranscriptionJob.FAILED
+    assert job.segment_plan is None
+    assert not os.path.exists(os.path.join(app.config["UPLOAD_FOLDER"], "temp_segments", f"job_{job_id}"))
+
+
+def test_offset_map_survives_resume(app, client, monkeypatch):
+    offset_map = [[0.0, 0.0, 120.0], [120.0, 150.0, 240.0]]
+    
+    def fake_remove_silence(audio_path, temp_folder, stats):
+        stats["silence_removed"] = 30.0
+        stats["offset_map"] = offset_map
+        return audio_path
+    
+    monkeypatch.setattr(services, "remove_silence_from_audio", fake_remove_silence)
+    app.config["TRANSCRIPTION_VAD_FILTER"] = True
+    job_id = create_pending_job(app).id
+    
+    client.kill_after = 2
+    with pytest.raises(WorkerKilled):
+        process_job(app, claim_job("worker-1", job_id=job_id), "worker-1")
+    db.session.rollback()
+    
+    job = db.session.get(TranscriptionJob, job_id)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    
+    # El nuevo intento no vuelve a filtrar el audio: los datos salen del plan
+    monkeypatch.setattr(services, "remove_silence_from_audio", None)
+    client.kill_after = None
+    process_job(app, claim_job("worker-2"), "worker-2")
+    
+    transcription = db.session.get(Transcription, db.session.get(TranscriptionJob, job_id).transcription_id)
+    assert transcription.silence_removed == 30.0
+    assert json.loads(transcription.offset_map) == offset_map
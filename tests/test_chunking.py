@@ -0,0 +1,49 @@
+import pytest
+from flask import Flask
+import modules.transcription.chunking as chunking
+from modules.transcription.chunking import chunk_text, condense_transcription, count_tokens
+from modules.transcription.services import document_router
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    with app.app_context():
+        yield app
+
+
+def test_half_hour_meeting_fits_in_a_single_call(app):
+    # Media hora de reunión a unas 150 palabras por minuto
+    transcription = "Se revisaron los acuerdos pendientes del área de operaciones. " * 500
+    
+    def extract(prompt):
+        raise AssertionError("no debería extraer notas")
+    
+    for provider in document_router.providers:
+        assert count_tokens(transcription) < provider.input_tokens()
+        assert condense_transcription(transcription, "acta", extract, provider.input_tokens()) == transcription
+
+
+def test_chunk_tokens_setting_lowers_the_provider_limit(app):
+    provider = document_router.providers[0]
+    assert provider.input_tokens() > 100000
+    
+    app.config["DOCUMENT_CHUNK_TOKENS"] = 1000
+    assert provider.input_tokens() == 1000
+
+
+def test_unpunctuated_text_is_split_by_words_in_linear_time(monkeypatch):
+    words = [f"palabra{i}" for i in range(3000)]
+    calls = []
+    
+    def counting(text):
+        calls.append(text)
+        return count_tokens(text)
+    
+    monkeypatch.setattr(chunking, "count_tokens", counting)
+    chunks = chunk_text(" ".join(words), 100)
+    
+    assert " ".join(chunks).split() == words
+    assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+    # Una cuenta por palabra, más una por frase y por trozo
+    assert len(calls) <= len(words) + 1 + len(chunks)
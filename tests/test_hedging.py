@@ -0,0 +1,47 @@
+import time
+import pytest
+from flask import Flask
+import modules.transcription.hedging as hedging
+from modules.transcription.hedging import hedged_call, LatencyTracker, HedgeBudget, MIN_LATENCY_SAMPLES
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config["TRANSCRIPTION_HEDGE_ENABLED"] = True
+    
+    # Las llamadas recientes tardan 0,1 s por MB y hay cupo para duplicar
+    tracker = LatencyTracker()
+    for _ in range(MIN_LATENCY_SAMPLES):
+        tracker.record(0.1, MB)
+    budget = HedgeBudget()
+    budget.credits = budget.max_credits
+    monkeypatch.setattr(hedging, "latency_tracker", tracker)
+    monkeypatch.setattr(hedging, "hedge_budget", budget)
+    monkeypatch.setattr(hedging, "increment_counter", lambda name: None)
+    
+    with app.app_context():
+        yield app
+
+
+def test_waiting_for_own_limits_does_not_fire_hedge(app):
+    hedges = []
+    
+    def primary(on_admitted):
+        time.sleep(0.5)  # En cola de los límites propios
+        on_admitted()
+        return "normal"
+    
+    assert hedged_call(primary, lambda: hedges.append(1) or "duplicada", MB) == "normal"
+    assert hedges == []
+
+
+def test_slow_response_after_admission_fires_hedge(app):
+    def primary(on_admitted):
+        on_admitted()
+        time.sleep(1)
+        return "normal"
+    
+    assert hedged_call(primary, lambda: "duplicada", MB) == "duplicada"
@@ -0,0 +1,62 @@
+import pytest
+from modules.auth.models import db, User
+from modules.transcription.models import TranscriptionJob, TranscriptionSegment
+
+
+@pytest.fixture
+def app(make_app):
+    # Una sola consulta por conexión: el plazo vence en la primera vuelta
+    app = make_app(TRANSCRIPTION_STREAM_POLL_SECONDS=0, TRANSCRIPTION_STREAM_MAX_SECONDS=0)
+    user = User(username="usuario", email="usuario@example.com")
+    user.set_password("password1")
+    db.session.add(user)
+    db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(User.query.first().id)
+    return client
+
+
+def add_running_job(segments):
+    job = TranscriptionJob(
+        user_id=User.query.first().id,
+        original_filename="reunion.mp3",
+        file_path="/tmp/reunion.mp3",
+        status=TranscriptionJob.RUNNING,
+        total_segments=segments
+    )
+    db.session.add(job)
+    db.session.commit()
+    segment_ids = []
+    for index in range(segments):
+        segment = TranscriptionSegment(job_id=job.id, index=index, text=f"segmento {index}")
+        db.session.add(segment)
+        db.session.commit()
+        segment_ids.append(segment.id)
+    return job.id, segment_ids
+
+
+def test_stream_closes_after_max_seconds(client):
+    job_id, segment_ids = add_running_job(2)
+    
+    body = client.get(f"/transcription/jobs/{job_id}/stream").get_data(as_text=True)
+    
+    assert f"id: {segment_ids[1]}\nevent: segment\n" in body
+    assert "segmento 0" in body and "segmento 1" in body
+    assert "event: progress" in body
+    assert "event: done" not in body
+
+
+def test_reconnect_resumes_after_last_event_id(client):
+    job_id, segment_ids = add_running_job(3)
+    
+    response = client.get(f"/transcription/jobs/{job_id}/stream", headers={"Last-Event-ID": str(segment_ids[0])})
+    body = response.get_data(as_text=True)
+    
+    assert "segmento 0" not in body
+    assert "segmento 1" in body and "segmento 2" in body
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import pytest
+from modules.auth.models import db, User
+import modules.transcription.jobs as jobs
+from modules.transcription.models import TranscriptionJob
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(TRANSCRIPTION_JOB_MAX_ATTEMPTS=3)
+    user = User(username="usuario", email="usuario@example.com")
+    user.set_password("password1")
+    db.session.add(user)
+    db.session.commit()
+    return app
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Trabajos que el barrido encola en el pool, sin ejecutarlos"""
+    calls = []
+    
+    class FakeExecutor:
+        def submit(self, fn, *args):
+            calls.append(args)
+    
+    monkeypatch.setattr(jobs, "get_executor", lambda app: FakeExecutor())
+    monkeypatch.setattr(jobs, "active_runs", 0)
+    return calls
+
+
+def add_running_job(attempts, lease_expires_at):
+    job = TranscriptionJob(
+        user_id=User.query.first().id,
+        original_filename="reunion.mp3",
+        file_path="/tmp/reunion.mp3",
+        status=TranscriptionJob.RUNNING,
+        attempts=attempts,
+        claimed_by="host:1:muerto",
+        lease_expires_at=lease_expires_at
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_sweep_fails_jobs_that_exhausted_their_attempts(app, submitted):
+    job_id = add_running_job(3, datetime.utcnow() - timedelta(seconds=1))
+    
+    assert jobs.sweep_jobs(app) is False
+    
+    job = db.session.get(TranscriptionJob, job_id, populate_existing=True)
+    assert job.status == TranscriptionJob.FAILED
+    assert jobs.count_active_jobs(job.user_id) == 0
+    assert submitted == []
+
+
+def test_sweep_reclaims_expired_leases(app, submitted):
+    job_id = add_running_job(1, datetime.utcnow() - timedelta(seconds=1))
+    
+    assert jobs.sweep_jobs(app) is True
+    assert submitted == [(app, None)]
+    assert db.session.get(TranscriptionJob, job_id).status == TranscriptionJob.RUNNING
+
+
+def test_sweep_ignores_jobs_with_a_live_lease(app, submitted):
+    add_running_job(1, datetime.utcnow() + timedelta(seconds=60))
+    
+    assert jobs.sweep_jobs(app) is False
+    assert submitted == []
+
+
+def test_sweep_does_not_queue_behind_a_busy_pool(app, submitted, monkeypatch):
+    add_running_job(1, datetime.utcnow() - timedelta(seconds=1))
+    monkeypatch.setattr(jobs, "active_runs", app.config["TRANSCRIPTION_JOB_WORKERS"])
+    
+    assert jobs.sweep_jobs(app) is False
+    assert submitted == []
+
+
+def test_repeated_sweeps_fill_only_the_idle_threads(app, submitted):
+    add_running_job(1, datetime.utcnow() - timedelta(seconds=1))
+    
+    for _ in range(5):
+        jobs.sweep_jobs(app)
+    
+    assert len(submitted) == app.config["TRANSCRIPTION_JOB_WORKERS"]
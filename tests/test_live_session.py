@@ -0,0 +1,21 @@
+import os
+from types import SimpleNamespace
+from flask import Flask
+import modules.transcription.live as live
+from modules.transcription.live import LiveSession
+
+
+def test_abort_removes_partial_audio(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    app.config["LIVE_TRANSCRIPTION_MODEL"] = "tiny"
+    monkeypatch.setattr(live, "get_engine", lambda name, model: SimpleNamespace(name=name, model_size=model))
+    
+    session = LiveSession(app, 1, lambda index, text: None)
+    session.audio_file.writeframes(b"\x00\x00" * 1600)
+    assert os.path.exists(session.audio_path) and os.path.isdir(session.folder)
+    
+    session.abort()
+    
+    assert not os.path.exists(session.audio_path)
+    assert not os.path.exists(session.folder)
@@ -0,0 +1,75 @@
+import threading
+from types import SimpleNamespace
+import pytest
+import modules.transcription.pipeline as pipeline
+from modules.transcription.chunking import count_tokens
+
+
+class FakeProvider:
+    """Proveedor de documentos falso que cuenta las llamadas de extracción y de documento final"""
+    
+    name = "fake"
+    model = "fake-model"
+    label = "Falso"
+    prompt_versions = {"acta": 1}
+    
+    def __init__(self):
+        self.extract_calls = 0
+        self.complete_calls = 0
+        self.lock = threading.Lock()
+    
+    def input_tokens(self):
+        return 200
+    
+    def generators(self, document_type):
+        def complete(text):
+            with self.lock:
+                self.complete_calls += 1
+            return "ACTA"
+        
+        def extract(prompt):
+            with self.lock:
+                self.extract_calls += 1
+            return "notas"
+        
+        return complete, extract
+
+
+@pytest.fixture
+def provider(app, monkeypatch):
+    provider = FakeProvider()
+    provider.app = app
+    monkeypatch.setattr(pipeline, "get_document_provider", lambda: provider)
+    return provider
+
+
+def summarize(provider, texts):
+    summarizer = pipeline.IncrementalSummarizer(provider.app)
+    for index, text in enumerate(texts):
+        summarizer.add_segment(index, len(texts), text)
+    return summarizer.finish(" ".join(texts))
+
+
+def test_single_segment_makes_only_the_final_call(provider):
+    assert summarize(provider, ["Se aprobó el presupuesto del año próximo."]) == "ACTA"
+    assert provider.extract_calls == 0
+    assert provider.complete_calls == 1
+
+
+def test_short_multi_segment_transcription_skips_extraction(provider):
+    texts = ["Primera parte de la reunión.", "Segunda parte.", "Cierre de la sesión."]
+    
+    assert summarize(provider, texts) == "ACTA"
+    assert provider.extract_calls == 0
+    assert provider.complete_calls == 1
+
+
+def test_long_transcription_extracts_every_segment_once(provider):
+    texts = [f"Punto {i}: " + "se revisaron los acuerdos pendientes del área. " * 20 for i in range(4)]
+    assert count_tokens(" ".join(texts)) > 200
+    
+    assert summarize(provider, texts) == "ACTA"
+    # Una extracción por fragmento de cada segmento, ninguna repetida al final
+    expected = sum(len(pipeline.chunk_text(text, 200)) for text in texts)
+    assert provider.extract_calls == expected
+    assert provider.complete_calls == 1
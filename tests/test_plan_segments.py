@@ -0,0 +1,104 @@
+import os
+import pytest
+import modules.utils.audio_processing as audio_processing
+from modules.utils.audio_processing import plan_segments, split_audio_to_limit
+
+MB = 1024 * 1024
+
+
+def audio_info(duration, size, streams_bit_rate=0):
+    return {"duration": duration, "size": size, "bit_rate": int(size * 8 / duration), "streams_bit_rate": streams_bit_rate}
+
+
+def assert_segments_fit(plan, max_segment_bytes, safety_margin=0.9):
+    segment_bytes = plan["segment_duration"] * plan["bytes_per_second"] + plan["overhead_bytes"]
+    assert segment_bytes <= max_segment_bytes * safety_margin
+
+
+def test_unknown_stream_bit_rate_uses_file_bit_rate():
+    plan = plan_segments(audio_info(3600, 100 * MB), 25 * MB)
+    
+    assert plan["bytes_per_second"] == 100 * MB / 3600
+    assert plan["overhead_bytes"] == 64 * 1024
+    assert plan["num_segments"] == 5
+    assert_segments_fit(plan, 25 * MB)
+
+
+def test_cover_art_is_reserved_in_every_segment():
+    # MP3 de 128 kbps con 4 MB de carátula: la carátula se repite en cada segmento
+    duration = 3600
+    data_bytes = 128000 * duration // 8
+    plan = plan_segments(audio_info(duration, data_bytes + 4 * MB, streams_bit_rate=128000), 25 * MB)
+    
+    assert plan["overhead_bytes"] == 4 * MB
+    assert plan["bytes_per_second"] == 128000 / 8
+    assert_segments_fit(plan, 25 * MB)
+
+
+def test_huge_overhead_is_spread_with_the_bit_rate():
+    plan = plan_segments(audio_info(600, 60 * MB, streams_bit_rate=64000), 25 * MB)
+    
+    assert plan["bytes_per_second"] == 60 * MB / 600
+    assert plan["num_segments"] == 3
+    assert_segments_fit(plan, 25 * MB)
+
+
+def test_rounded_segment_duration_still_fits():
+    # 3 segmentos de 1200,4 s se redondean a 1201 s, que ya no caben
+    plan = plan_segments(audio_info(3601.2, 3601.2 * 6000), 1200.5 * 6000, safety_margin=1, header_bytes=0)
+    
+    assert plan["num_segments"] == 4
+    assert_segments_fit(plan, 1200.5 * 6000, safety_margin=1)
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Sustituye ffprobe/ffmpeg: cada segmento ocupa lo que indica sizes"""
+    calls = {"stripped": [], "sizes": {}}
+    
+    def fake_probe(file_path):
+        return calls["probe"](file_path)
+    
+    def fake_split(file_path, segment_duration=None, output_folder=None, segment_times=None):
+        segments = []
+        for i, size in enumerate(calls["split"](file_path)):
+            path = os.path.join(output_folder, f"{os.path.basename(file_path)}_{i}")
+            open(path, "wb").close()
+            calls["sizes"][path] = size
+            segments.append({"path": path, "start": i * 60.0, "duration": 60.0})
+        return segments
+    
+    def fake_strip(file_path, output_folder=None):
+        path = os.path.join(output_folder, "stripped.mp3")
+        open(path, "wb").close()
+        calls["stripped"].append(file_path)
+        return path
+    
+    monkeypatch.setattr(audio_processing, "probe_audio", fake_probe)
+    monkeypatch.setattr(audio_processing, "split_audio_segments", fake_split)
+    monkeypatch.setattr(audio_processing, "strip_container_overhead", fake_strip)
+    monkeypatch.setattr(audio_processing, "get_file_size", lambda path: calls["sizes"][path])
+    return calls
+
+
+def test_large_cover_art_is_stripped_before_splitting(tmp_path, fake_ffmpeg):
+    original = str(tmp_path / "reunion.mp3")
+    stripped = str(tmp_path / "stripped.mp3")
+    fake_ffmpeg["probe"] = lambda path: (
+        audio_info(600, 60 * MB, streams_bit_rate=64000) if path == original else audio_info(600, 4.8 * MB, streams_bit_rate=64000)
+    )
+    fake_ffmpeg["split"] = lambda path: [4.8 * MB] if path == stripped else [30 * MB, 30 * MB]
+    
+    segments = split_audio_to_limit(original, 25 * MB, str(tmp_path))
+    
+    assert fake_ffmpeg["stripped"] == [original]
+    assert len(segments) == 1
+    assert not os.path.exists(stripped)
+
+
+def test_oversized_segment_after_last_split_raises(tmp_path, fake_ffmpeg):
+    fake_ffmpeg["probe"] = lambda path: audio_info(600, 30 * MB)
+    fake_ffmpeg["split"] = lambda path: [30 * MB, 30 * MB]
+    
+    with pytest.raises(Exception, match="límite"):
+        split_audio_to_limit(str(tmp_path / "reunion.mp3"), 25 * MB, str(tmp_path), max_depth=1)
@@ -0,0 +1,62 @@
+from modules.utils.audio_processing import stitch_overlap, combine_transcriptions
+
+
+def test_removes_repeated_words_at_the_join():
+    previous = "Se revisó el presupuesto con los responsables del área técnica."
+    following = "los responsables del área técnica. También se habló de la agenda de formación."
+    
+    assert stitch_overlap(previous, following, 2) == (
+        "Se revisó el presupuesto con los responsables del área técnica. "
+        "También se habló de la agenda de formación."
+    )
+
+
+def test_tolerates_words_changed_at_the_edges():
+    previous = "Se revisó el presupuesto con los responsables del área técnica, eh"
+    following = "y los responsables del área técnica. También se habló de la agenda."
+    
+    # Se conserva el texto anterior hasta el final de la coincidencia
+    assert stitch_overlap(previous, following, 2) == (
+        "Se revisó el presupuesto con los responsables del área técnica, "
+        "También se habló de la agenda."
+    )
+
+
+def test_ignores_common_phrases_away_from_the_edges():
+    # "de la agenda de formación" se repite, pero no en la zona solapada
+    previous = "Hoy hablamos de la agenda de formación con los responsables del área técnica."
+    following = "Después se revisó también de la agenda de formación para el resto del año próximo."
+    
+    assert stitch_overlap(previous, following, 2) == f"{previous} {following}"
+
+
+def test_ignores_short_matches_at_the_edges():
+    previous = "El informe se entregará antes de la"
+    following = "de la reunión del jueves con la dirección."
+    
+    assert stitch_overlap(previous, following, 2) == f"{previous} {following}"
+
+
+def test_does_not_look_beyond_the_overlap():
+    # La frase repetida está a más palabras del borde de las que caben en 1 s
+    previous = "Se aprobó el plan anual de formación y después se cerró la sesión con un resumen breve."
+    following = "Se aprobó el plan anual de formación y después se cerró la sesión con un resumen breve."
+    
+    assert stitch_overlap(previous, following, 1) == f"{previous} {following}"
+
+
+def test_combine_without_overlap_concatenates():
+    assert combine_transcriptions(["uno dos", "tres cuatro"]) == "uno dos tres cuatro"
+
+
+def test_combine_with_overlap_stitches_every_join():
+    texts = [
+        "primera parte de la reunión sobre el presupuesto anual",
+        "sobre el presupuesto anual y luego la segunda parte del orden del día",
+        "segunda parte del orden del día y el cierre"
+    ]
+    
+    assert combine_transcriptions(texts, overlap=2) == (
+        "primera parte de la reunión sobre el presupuesto anual "
+        "y luego la segunda parte del orden del día y el cierre"
+    )
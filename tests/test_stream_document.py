@@ -0,0 +1,54 @@
+import pytest
+from flask import Flask
+import modules.transcription.services as services
+from modules.transcription.providers import DocumentProvider, ProviderRouter, ProviderStats
+
+
+def fake_stream(transcription, document_type, max_tokens):
+    yield "Acta "
+    yield "de la "
+    yield "reunión"
+
+
+@pytest.fixture
+def router(monkeypatch):
+    app = Flask(__name__)
+    app.config["DOCUMENT_PROVIDER_COOLDOWN_SECONDS"] = 0
+    provider = DocumentProvider(
+        "fake", "Proveedor falso", "modelo", {"acta": 1},
+        is_configured=lambda: True, generators=None, stream=fake_stream,
+        context_tokens=8000, output_tokens=1000
+    )
+    router = ProviderRouter([provider])
+    
+    monkeypatch.setattr(services, "document_router", router)
+    monkeypatch.setattr(services, "get_cached_document", lambda *args: None)
+    monkeypatch.setattr(services, "store_cached_document", lambda *args: None)
+    
+    with app.app_context():
+        # Circuito abierto tras un fallo: la siguiente petición es la de prueba
+        stats = router.stats["fake"]
+        stats.state = ProviderStats.OPEN
+        stats.opened_at = 0
+        yield router
+
+
+def test_client_disconnect_releases_half_open_trial(router):
+    events = services.stream_document("texto", "acta")
+    assert next(events) == ("provider", "Proveedor falso")
+    assert router.stats["fake"].trial_in_progress
+    
+    # El cliente SSE se desconecta a mitad de la respuesta
+    events.close()
+    
+    stats = router.stats["fake"]
+    assert not stats.trial_in_progress
+    assert stats.state == ProviderStats.HALF_OPEN
+    assert list(router.candidates()) == router.providers
+
+
+def test_completed_trial_closes_circuit(router):
+    events = list(services.stream_document("texto", "acta"))
+    
+    assert events[-1] == ("done", {"content": "Acta de la reunión", "provider": "Proveedor falso", "cached": False})
+    assert router.stats["fake"].state == ProviderStats.CLOSED
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+from config import Config
+from app import create_app
+from modules.auth.models import db
+from modules.transcription.services import transcribe_segments
+
+
+class FakeOpenAI:
+    """Cliente de OpenAI falso en el que falla siempre el segmento indicado"""
+    
+    def __init__(self, failing_segment):
+        self.failing_segment = failing_segment
+        self.calls = []
+        self.lock = threading.Lock()
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self.create))
+    
+    def create(self, model, file, language):
+        name = os.path.basename(file.name)
+        with self.lock:
+            self.calls.append(name)
+        if name == self.failing_segment:
+            raise ValueError("archivo no válido")
+        time.sleep(0.1)
+        return SimpleNamespace(text=name)
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        UPLOAD_FOLDER = str(tmp_path / "uploads")
+        TRANSCRIPT_FOLDER = str(tmp_path / "transcripts")
+        WHISPER_REQUESTS_PER_MINUTE = 0
+        TRANSCRIPTION_HEDGE_ENABLED = False
+        TRANSCRIPTION_SEGMENT_RETRIES = 0
+        TRANSCRIPTION_MAX_WORKERS = 1
+    
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def make_segments(folder, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"segment_{i:04d}.mp3")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        paths.append(path)
+    return paths
+
+
+def test_returns_texts_in_order(app, tmp_path):
+    paths = make_segments(tmp_path, 4)
+    
+    assert transcribe_segments(FakeOpenAI(None), paths) == [os.path.basename(path) for path in paths]
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_failed_segment_cancels_pending_segments(app, tmp_path):
+    paths = make_segments(tmp_path, 6)
+    client = FakeOpenAI("segment_0001.mp3")
+    
+    with pytest.raises(ValueError):
+        transcribe_segments(client, paths)
+    
+    # Con un solo hilo, como mucho llega a empezar el siguiente al fallido
+    assert client.calls[:2] == ["segment_0000.mp3", "segment_0001.mp3"]
+    assert len(client.calls) <= 3
+
+
+def test_skips_segments_already_transcribed(app, tmp_path):
+    paths = make_segments(tmp_path, 4)
+    client = FakeOpenAI(None)
+    
+    texts = transcribe_segments(client, paths, completed_texts={0: "uno", 2: "tres"})
+    
+    assert texts == ["uno", "segment_0001.mp3", "tres", "segment_0003.mp3"]
+    assert client.calls == ["segment_0001.mp3", "segment_0003.mp3"]
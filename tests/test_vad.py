@@ -0,0 +1,36 @@
+import os
+import numpy as np
+import modules.utils.vad as vad
+
+
+def test_trim_filter_concatenates_every_region():
+    graph = vad.build_trim_filter([(0.0, 1.5), (3.2, 7.25), (9.0, 10.0)])
+    
+    assert "asplit=3[s0][s1][s2]" in graph
+    assert "[s1]atrim=start=3.200:end=7.250,asetpts=PTS-STARTPTS[a1]" in graph
+    assert graph.endswith("[a0][a1][a2]concat=n=3:v=0:a=1[out]")
+    assert "between(" not in graph
+
+
+def test_remove_silence_passes_the_filter_in_a_script(tmp_path, monkeypatch):
+    # Voz y silencio alternos cada 3 s durante una hora: 600 tramos
+    frames_per_second = 1000 // 30
+    pattern = np.concatenate((np.full(3 * frames_per_second, -20.0), np.full(3 * frames_per_second, -80.0)))
+    monkeypatch.setattr(vad, "compute_frame_energies", lambda *args, **kwargs: np.tile(pattern, 600))
+    calls = []
+    
+    def fake_run(cmd, **kwargs):
+        script_path = cmd[cmd.index('-filter_complex_script') + 1]
+        with open(script_path) as script:
+            calls.append((cmd, script.read()))
+        return type("Process", (), {"returncode": 0, "stderr": ""})()
+    
+    monkeypatch.setattr(vad.subprocess, "run", fake_run)
+    
+    result = vad.remove_silence(str(tmp_path / "reunion.mp3"), str(tmp_path))
+    
+    cmd, graph = calls[0]
+    assert len(result["offset_map"]) == 600
+    assert "concat=n=600:v=0:a=1[out]" in graph
+    assert max(len(arg) for arg in cmd) < 1000
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,30 @@
+"""
+Proceso de trabajo que transcribe en segundo plano los trabajos pendientes.
+
+Se pueden lanzar varios procesos, en uno o varios hosts, siempre que todos
+usen la misma base de datos (DATABASE_URL) y la misma carpeta de subidas:
+    
+    python worker.py
+    python worker.py --concurrencia 4
+
+Para que los workers web solo encolen trabajos, configurar
+TRANSCRIPTION_JOB_MODE=worker.
+"""
+import argparse
+from app import create_app
+from modules.transcription.jobs import run_worker
+from modules.transcription.clients import prewarm_clients
+from modules.transcription.google_ai_service import GEMINI_MODEL
+from modules.transcription.engines import preload_engines
+
+app = create_app()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de transcripción de ZentraText")
+    parser.add_argument("--concurrencia", type=int, default=None,
+                        help="Trabajos que procesa a la vez este proceso (por defecto TRANSCRIPTION_JOB_WORKERS)")
+    args = parser.parse_args()
+    
+    prewarm_clients(app, GEMINI_MODEL)
+    preload_engines(app)
+    run_worker(app, args.concurrencia)
@@ -1,6 +1,19 @@
 from app import create_app
+from modules.transcription.clients import prewarm_clients
+from modules.transcription.google_ai_service import GEMINI_MODEL
+from modules.transcription.engines import preload_engines
+from modules.transcription.jobs import start_job_sweeper
 
 app = create_app()
 
+# Abrir las conexiones con los proveedores de IA antes de la primera petición
+prewarm_clients(app, GEMINI_MODEL)
+
+# Cargar el modelo de transcripción si este proceso transcribe los trabajos
+# y, en ese caso, retomar los trabajos que deje a medias un worker caído
+if app.config.get('TRANSCRIPTION_JOB_MODE', 'thread') == 'thread':
+    preload_engines(app, background=True)
+    start_job_sweeper(app)
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file